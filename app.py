@@ -1,21 +1,78 @@
-import tkinter as tk
-from tkinter import ttk, scrolledtext, messagebox
+import argparse
+import asyncio
+import base64
+import bisect
+import csv
+import hashlib
+import importlib
+import importlib.util
+import itertools
+import sys
 import threading
 import queue
+import random
+import re
 import time
+from contextlib import contextmanager
 import json
 import os
-from datetime import datetime
-import speech_recognition as sr
-import pyttsx3
-import googletrans
-import pyaudio
+import struct
+import zlib
+import sqlite3
+import tempfile
+import atexit
+from collections import OrderedDict, deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from datetime import datetime, timedelta
 import wave
-import numpy as np
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.naive_bayes import MultinomialNB
-from sklearn.pipeline import Pipeline
-import pickle
+import io
+
+PROCESS_START = time.perf_counter()
+IMPORT_TIMINGS = OrderedDict()   # module name -> seconds spent importing it
+STARTUP_TIMINGS = OrderedDict()  # subsystem name -> seconds spent initialising it
+
+class LazyModule:
+    """Module proxy that imports the real module on first attribute access"""
+    
+    def __init__(self, name):
+        self._name = name
+        self._module = None
+    
+    def __getattr__(self, attr):
+        if self._module is None:
+            started = time.perf_counter()
+            self._module = importlib.import_module(self._name)
+            IMPORT_TIMINGS.setdefault(self._name, time.perf_counter() - started)
+        return getattr(self._module, attr)
+
+@contextmanager
+def startup_timer(name):
+    """Record how long a startup step takes in STARTUP_TIMINGS"""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        STARTUP_TIMINGS[name] = time.perf_counter() - started
+
+def print_startup_report():
+    """Print an -X importtime style breakdown of startup cost"""
+    print(f"{'seconds':>9}  startup step")
+    for name, seconds in IMPORT_TIMINGS.items():
+        print(f"{seconds:9.3f}  import {name}")
+    for name, seconds in STARTUP_TIMINGS.items():
+        print(f"{seconds:9.3f}  {name}")
+
+# Heavy modules are imported on first use so the window can appear quickly and
+# headless modes never load the GUI or audio stacks
+googletrans = LazyModule("googletrans")
+np = LazyModule("numpy")
+tk = LazyModule("tkinter")
+ttk = LazyModule("tkinter.ttk")
+scrolledtext = LazyModule("tkinter.scrolledtext")
+messagebox = LazyModule("tkinter.messagebox")
+sr = LazyModule("speech_recognition")
+pyttsx3 = LazyModule("pyttsx3")
+pyaudio = LazyModule("pyaudio")
 
 # Define supported languages dictionary
 LANGUAGES = {
@@ -45,137 +102,3524 @@ LANGUAGES = {
     "uz": "uzbek"
 }
 
+class _NullTimer:
+    """Timer handed out while metrics are disabled; does nothing"""
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc):
+        return False
+
+class _StageTimer:
+    def __init__(self, metrics, name):
+        self.metrics = metrics
+        self.name = name
+    
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+    
+    def __exit__(self, *exc):
+        self.metrics.observe(self.name, time.perf_counter() - self.started)
+        return False
+
+class Metrics:
+    """Pipeline counters and latency histograms
+    
+    Latencies are kept as a window of recent samples per stage, plus running
+    count and sum, and percentiles are computed only when exported. While
+    disabled, every call returns before taking the lock.
+    """
+    
+    WINDOW = 2048
+    QUANTILES = (0.5, 0.95, 0.99)
+    
+    def __init__(self, enabled=False):
+        self.enabled = enabled
+        self.counters = OrderedDict()
+        self.histograms = OrderedDict()  # name -> [count, sum, deque of recent samples]
+        self._lock = threading.Lock()
+        self._null_timer = _NullTimer()
+        self._dump_thread = None
+    
+    def count(self, name, amount=1):
+        if not self.enabled:
+            return
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + amount
+    
+    def observe(self, name, seconds):
+        if not self.enabled:
+            return
+        with self._lock:
+            histogram = self.histograms.get(name)
+            if histogram is None:
+                histogram = self.histograms[name] = [0, 0.0, deque(maxlen=self.WINDOW)]
+            histogram[0] += 1
+            histogram[1] += seconds
+            histogram[2].append(seconds)
+    
+    def timer(self, name):
+        """Context manager recording the duration of a stage"""
+        if not self.enabled:
+            return self._null_timer
+        return _StageTimer(self, name)
+    
+    def reset(self):
+        with self._lock:
+            self.counters.clear()
+            self.histograms.clear()
+    
+    def snapshot(self):
+        """Counters and per-stage count/mean/p50/p95/p99/max in seconds"""
+        with self._lock:
+            counters = dict(self.counters)
+            histograms = [(name, count, total, sorted(samples))
+                          for name, (count, total, samples) in self.histograms.items()]
+        stages = {}
+        for name, count, total, samples in histograms:
+            stage = {"count": count, "mean": total / count if count else 0.0,
+                     "max": samples[-1] if samples else 0.0}
+            for quantile in self.QUANTILES:
+                index = min(len(samples) - 1, int(quantile * len(samples)))
+                stage[f"p{int(quantile * 100)}"] = samples[index] if samples else 0.0
+            stages[name] = stage
+        return {"timestamp": datetime.now().isoformat(), "counters": counters, "stages": stages}
+    
+    def to_json(self):
+        return json.dumps(self.snapshot(), indent=2)
+    
+    def to_prometheus(self):
+        """Prometheus text exposition format"""
+        snapshot = self.snapshot()
+        lines = []
+        for name, value in snapshot["counters"].items():
+            metric = f"translator_{name}_total"
+            lines += [f"# TYPE {metric} counter", f"{metric} {value}"]
+        for name, stage in snapshot["stages"].items():
+            metric = f"translator_{name}_seconds"
+            lines.append(f"# TYPE {metric} summary")
+            for quantile in self.QUANTILES:
+                lines.append(f'{metric}{{quantile="{quantile}"}} {stage[f"p{int(quantile * 100)}"]:.6f}')
+            lines.append(f"{metric}_sum {stage['mean'] * stage['count']:.6f}")
+            lines.append(f"{metric}_count {stage['count']}")
+        return "\n".join(lines) + "\n"
+    
+    def format_table(self):
+        """Human-readable summary for the diagnostics window"""
+        snapshot = self.snapshot()
+        lines = [f"{'stage':<16}{'count':>8}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'max ms':>10}"]
+        for name, stage in snapshot["stages"].items():
+            lines.append(f"{name:<16}{stage['count']:>8}{stage['p50'] * 1000:>10.1f}"
+                         f"{stage['p95'] * 1000:>10.1f}{stage['p99'] * 1000:>10.1f}{stage['max'] * 1000:>10.1f}")
+        lines.append("")
+        for name, value in snapshot["counters"].items():
+            lines.append(f"{name:<24}{value:>10}")
+        return "\n".join(lines)
+    
+    def dump(self, path, fmt="json"):
+        """Atomically replace `path` with a JSON or Prometheus dump"""
+        try:
+            content = self.to_prometheus() if fmt == "prometheus" else self.to_json()
+            with open(path + ".tmp", 'w', encoding='utf-8') as f:
+                f.write(content)
+            os.replace(path + ".tmp", path)
+        except Exception as e:
+            print(f"Error writing metrics: {e}")
+    
+    def start_periodic_dump(self, path, interval=10.0, fmt="json"):
+        """Rewrite `path` every `interval` seconds, and once more at exit"""
+        def dump_loop():
+            while True:
+                time.sleep(interval)
+                self.dump(path, fmt)
+        
+        atexit.register(self.dump, path, fmt)
+        
+        self._dump_thread = threading.Thread(target=dump_loop, name="metrics-dump", daemon=True)
+        self._dump_thread.start()
+
+METRICS = Metrics()
+
+class NgramLanguageModel:
+    """Character n-gram TF-IDF + multinomial Naive Bayes scorer in plain NumPy
+    
+    Holds what a fitted scikit-learn pipeline of TfidfVectorizer(char_wb,
+    1-3 grams, sublinear tf) and MultinomialNB needs at prediction time:
+    the n-gram vocabulary, IDF weights and per-class log-probabilities.
+    Saved as an .npz archive, so loading it needs neither scikit-learn nor
+    unpickling.
+    """
+    
+    def __init__(self, vocabulary, idf, feature_log_prob, class_log_prior, classes):
+        self.vocabulary = {gram: index for index, gram in enumerate(vocabulary)}
+        self.idf = idf
+        self.feature_log_prob = feature_log_prob
+        self.class_log_prior = class_log_prior
+        self.classes_ = classes
+    
+    @classmethod
+    def from_pipeline(cls, pipeline):
+        """Extract the arrays from a fitted tfidf/clf pipeline"""
+        tfidf, clf = pipeline.named_steps['tfidf'], pipeline.named_steps['clf']
+        vocabulary = sorted(tfidf.vocabulary_, key=tfidf.vocabulary_.get)
+        return cls(vocabulary, tfidf.idf_, clf.feature_log_prob_, clf.class_log_prior_,
+                   np.asarray(clf.classes_, dtype=str))
+    
+    def to_bytes(self):
+        buffer = io.BytesIO()
+        np.savez(buffer, vocabulary=np.array(list(self.vocabulary), dtype=str), idf=self.idf,
+                 feature_log_prob=self.feature_log_prob, class_log_prior=self.class_log_prior,
+                 classes=self.classes_)
+        return buffer.getvalue()
+    
+    @classmethod
+    def from_bytes(cls, data):
+        with np.load(io.BytesIO(data), allow_pickle=False) as arrays:
+            return cls(arrays['vocabulary'].tolist(), arrays['idf'], arrays['feature_log_prob'],
+                       arrays['class_log_prior'], arrays['classes'])
+    
+    @staticmethod
+    def ngrams(text):
+        """char_wb n-grams: 1-3 character slices of each space-padded word"""
+        grams = []
+        for word in text.lower().split():
+            word = f" {word} "
+            for n in (1, 2, 3):
+                grams.extend(word[i:i + n] for i in range(len(word) - n + 1))
+        return grams
+    
+    def predict_proba(self, texts):
+        """Class probabilities for each text, one row per text"""
+        rows, columns, counts = [], [], []
+        for row, text in enumerate(texts):
+            grams = {}
+            for gram in self.ngrams(text):
+                index = self.vocabulary.get(gram)
+                if index is not None:
+                    grams[index] = grams.get(index, 0) + 1
+            rows.extend([row] * len(grams))
+            columns.extend(grams)
+            counts.extend(grams.values())
+        
+        # Sublinear tf times idf, L2-normalised per text, then the NB joint log-likelihood
+        rows, columns = np.array(rows, dtype=np.intp), np.array(columns, dtype=np.intp)
+        weights = (1 + np.log(np.array(counts, dtype=np.float64))) * self.idf[columns]
+        norms = np.zeros(len(texts))
+        np.add.at(norms, rows, weights ** 2)
+        weights /= np.sqrt(norms[rows])
+        scores = np.tile(self.class_log_prior, (len(texts), 1))
+        np.add.at(scores, rows, weights[:, None] * self.feature_log_prob[:, columns].T)
+        scores -= scores.max(axis=1, keepdims=True)
+        probabilities = np.exp(scores)
+        return probabilities / probabilities.sum(axis=1, keepdims=True)
+
 class LanguageDetector:
-    """Language detection using scikit-learn"""
+    """Language detection using script ranges and a cached n-gram model
+    
+    Text written mostly in a script that belongs to a single supported
+    language (Devanagari, Hangul, Kana, Thai, ...) is classified from its
+    characters alone. Latin-script text goes through a character n-gram
+    Naive Bayes model trained with scikit-learn on language_corpus.json.
+    The fitted model is saved as NumPy arrays in the per-user cache
+    directory and scored with NumPy, so later launches neither import
+    scikit-learn nor retrain. A JSON sidecar records the corpus hash and
+    the archive's own SHA-256, and the archive is only loaded when both
+    match.
+    """
+    
+    CORPUS_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "language_corpus.json")
+    MODEL_DIR = os.path.join(os.environ.get("XDG_CACHE_HOME") or os.path.expanduser("~/.cache"),
+                             "realtime-translator")
+    MODEL_FILE = os.path.join(MODEL_DIR, "language_model.npz")
+    
+    # (first code point, last code point, language) for scripts we map directly
+    SCRIPT_RANGES = [
+        (0x0400, 0x04FF, "ru"),  # Cyrillic
+        (0x0600, 0x06FF, "ar"),  # Arabic (Urdu is told apart below)
+        (0x0750, 0x077F, "ar"),  # Arabic Supplement
+        (0x0900, 0x097F, "hi"),  # Devanagari
+        (0x0980, 0x09FF, "bn"),  # Bengali
+        (0x0A00, 0x0A7F, "pa"),  # Gurmukhi
+        (0x0B80, 0x0BFF, "ta"),  # Tamil
+        (0x0C00, 0x0C7F, "te"),  # Telugu
+        (0x0C80, 0x0CFF, "kn"),  # Kannada
+        (0x0D00, 0x0D7F, "ml"),  # Malayalam
+        (0x0E00, 0x0E7F, "th"),  # Thai
+        (0x1100, 0x11FF, "ko"),  # Hangul Jamo
+        (0x3040, 0x30FF, "ja"),  # Hiragana and Katakana
+        (0x3130, 0x318F, "ko"),  # Hangul Compatibility Jamo
+        (0x4E00, 0x9FFF, "zh"),  # CJK Unified Ideographs
+        (0xAC00, 0xD7AF, "ko"),  # Hangul Syllables
+    ]
+    
+    # Letters used in Urdu but not in Arabic (ٹ ڈ ڑ ں ھ ہ ۂ ی ے)
+    URDU_LETTERS = frozenset("ٹڈڑںھہۂیے")
+    
+    # Cross-validated on two-word snippets of the corpus, about 96% of
+    # guesses at or above 0.8 are right; at 0.5 only about 85% are
+    def __init__(self, min_confidence=0.8):
+        self.model = None
+        self.min_confidence = min_confidence
+        self._range_starts = [start for start, _, _ in self.SCRIPT_RANGES]
+        self.setup_model()
+    
+    def _corpus(self):
+        with open(self.CORPUS_FILE, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    
+    def setup_model(self):
+        """Load the cached model, retraining it if the corpus has changed"""
+        with open(self.CORPUS_FILE, 'rb') as f:
+            corpus_hash = hashlib.sha256(f.read()).hexdigest()
+        sidecar = self.MODEL_FILE + ".json"
+        
+        try:
+            if os.path.exists(sidecar) and os.path.exists(self.MODEL_FILE):
+                with open(sidecar, 'r', encoding='utf-8') as f:
+                    expected = json.load(f)
+                if expected.get("corpus_hash") == corpus_hash:
+                    with open(self.MODEL_FILE, 'rb') as f:
+                        data = f.read()
+                    if hashlib.sha256(data).hexdigest() == expected.get("model_hash"):
+                        self.model = NgramLanguageModel.from_bytes(data)
+                        return
+        except Exception as e:
+            print(f"Error loading language model, retraining: {e}")
+        
+        self.model = self.train(self._corpus())
+        try:
+            data = self.model.to_bytes()
+            os.makedirs(self.MODEL_DIR, mode=0o700, exist_ok=True)
+            with open(self.MODEL_FILE + ".tmp", 'wb') as f:
+                f.write(data)
+            os.replace(self.MODEL_FILE + ".tmp", self.MODEL_FILE)
+            with open(sidecar + ".tmp", 'w', encoding='utf-8') as f:
+                json.dump({"corpus_hash": corpus_hash, "model_hash": hashlib.sha256(data).hexdigest()}, f)
+            os.replace(sidecar + ".tmp", sidecar)
+        except Exception as e:
+            print(f"Error saving language model: {e}")
+    
+    def train(self, corpus):
+        """Fit the n-gram model on a {language: [sentences]} corpus with scikit-learn"""
+        from sklearn.feature_extraction.text import TfidfVectorizer
+        from sklearn.naive_bayes import MultinomialNB
+        from sklearn.pipeline import Pipeline
+        
+        texts = [text for lang in corpus for text in corpus[lang]]
+        labels = [lang for lang in corpus for _ in corpus[lang]]
+        
+        # Create pipeline with TF-IDF and Naive Bayes
+        model = Pipeline([
+            ('tfidf', TfidfVectorizer(analyzer='char_wb', ngram_range=(1, 3), sublinear_tf=True)),
+            ('clf', MultinomialNB(alpha=0.05))
+        ])
+        model.fit(texts, labels)
+        return NgramLanguageModel.from_pipeline(model)
+    
+    def detect_script(self, text):
+        """Return (language, confidence) from the dominant script, or None for Latin text"""
+        counts = {}
+        letters = 0
+        for char in text:
+            if not char.isalpha():
+                continue
+            letters += 1
+            code = ord(char)
+            index = bisect.bisect_right(self._range_starts, code) - 1
+            if index >= 0 and code <= self.SCRIPT_RANGES[index][1]:
+                lang = self.SCRIPT_RANGES[index][2]
+                counts[lang] = counts.get(lang, 0) + 1
+        
+        if not counts or sum(counts.values()) * 2 < letters:
+            return None
+        
+        # Japanese mixes Kanji with Kana; any Kana means Japanese
+        if "ja" in counts and "zh" in counts:
+            counts["ja"] += counts.pop("zh")
+        lang = max(counts, key=counts.get)
+        confidence = counts[lang] / letters
+        if lang == "ar" and any(char in self.URDU_LETTERS for char in text):
+            lang = "ur"
+        return lang, confidence
+    
+    def detect_with_confidence(self, text):
+        """Detect language of given text, returning (language, confidence)"""
+        return self.detect_many([text])[0]
+    
+    def detect_many(self, texts):
+        """Detect the language of each text, returning a list of (language, confidence)
+        
+        Script detection runs per text; every text left over goes through
+        the model in a single vectorised predict_proba call.
+        """
+        results = [("en", 0.0)] * len(texts)  # Default to English
+        model_indexes = []
+        for index, text in enumerate(texts):
+            if not text.strip():
+                continue
+            script = self.detect_script(text)
+            if script is not None:
+                results[index] = script
+            else:
+                model_indexes.append(index)
+        
+        if model_indexes:
+            try:
+                probabilities = self.model.predict_proba([texts[index] for index in model_indexes])
+                best = probabilities.argmax(axis=1)
+                confidences = probabilities[np.arange(len(best)), best]
+                labels = self.model.classes_[best]
+                for index, label, confidence in zip(model_indexes, labels, confidences):
+                    results[index] = (str(label), float(confidence))
+            except Exception:
+                pass  # Fallback to English
+        return results
+    
+    def detect(self, text):
+        """Detect language of given text"""
+        return self.detect_with_confidence(text)[0]
+
+# Scripts written without spaces between words: Thai, Kana and CJK ideographs
+UNSPACED_SCRIPT = re.compile('[\u0E00-\u0E7F\u3040-\u30FF\u3400-\u4DBF\u4E00-\u9FFF\uF900-\uFAFF]')
+
+class HistoryBackend:
+    """Base class for translation history storage backends"""
+    
+    def append_many(self, entries):
+        """Persist a batch of history entries"""
+        raise NotImplementedError
+    
+    def tail(self, limit):
+        """Return the last `limit` entries, oldest first"""
+        raise NotImplementedError
+    
+    def iter_entries(self):
+        """Iterate over every stored entry, oldest first"""
+        raise NotImplementedError
+    
+    def count(self):
+        """Return the number of stored entries"""
+        raise NotImplementedError
+    
+    def _matches(self, entry, terms, source_lang, target_lang, since, until):
+        if source_lang and entry.get("source_language") != source_lang:
+            return False
+        if target_lang and entry.get("target_language") != target_lang:
+            return False
+        timestamp = entry.get("timestamp") or ""
+        if (since and timestamp < since) or (until and timestamp >= until):
+            return False
+        text = f"{entry.get('source_text', '')}\n{entry.get('translated_text', '')}".lower()
+        return all(term in text for term in terms)
+    
+    def search(self, query="", source_lang=None, target_lang=None, since=None, until=None,
+               offset=0, limit=50, before=None):
+        """Return matching entries, newest first
+        
+        `query` words must all occur in the source or translated text;
+        `since`/`until` are ISO date or timestamp prefixes. Each entry
+        carries an "id" that grows with insertion order; `before` keeps
+        only entries with a smaller id, so the next page can be fetched
+        from the last id of the previous one instead of a growing offset.
+        This default scans every entry; indexed backends override it.
+        """
+        terms = query.lower().split()
+        matches = [dict(entry, id=entry_id) for entry_id, entry in enumerate(self.iter_entries(), 1)
+                   if (before is None or entry_id < before)
+                   and self._matches(entry, terms, source_lang, target_lang, since, until)]
+        matches.reverse()
+        return matches[offset:offset + limit]
+    
+    def count_matching(self, query="", source_lang=None, target_lang=None, since=None, until=None):
+        """Number of entries `search` would page through"""
+        if not (query.strip() or source_lang or target_lang or since or until):
+            return self.count()
+        terms = query.lower().split()
+        return sum(1 for entry in self.iter_entries()
+                   if self._matches(entry, terms, source_lang, target_lang, since, until))
+    
+    def close(self):
+        """Release any open handles"""
+        pass
+
+class AppendLogHistoryBackend(HistoryBackend):
+    """Append-only log of length/CRC framed JSON records
+    
+    Each record is written as ``<length><crc32><payload><length>``. The
+    trailing length lets the tail be read backwards without scanning the
+    whole file, and the CRC lets a torn final write be detected and cut off
+    when the log is reopened after a crash.
+    """
+    
+    HEADER = struct.Struct('<II')
+    TRAILER = struct.Struct('<I')
+    
+    def __init__(self, filename="translation_history.log"):
+        self.filename = filename
+        self._lock = threading.Lock()
+        self._file = open(self.filename, 'a+b')
+        self._count = None
+        self.recover()
+    
+    def _frame_at(self, offset, size):
+        """Return (payload, end_offset) for a valid frame at offset, else None"""
+        if offset + self.HEADER.size > size:
+            return None
+        self._file.seek(offset)
+        length, crc = self.HEADER.unpack(self._file.read(self.HEADER.size))
+        end = offset + self.HEADER.size + length + self.TRAILER.size
+        if end > size:
+            return None
+        payload = self._file.read(length)
+        trailer, = self.TRAILER.unpack(self._file.read(self.TRAILER.size))
+        if trailer != length or zlib.crc32(payload) != crc:
+            return None
+        return payload, end
+    
+    def _size(self):
+        self._file.seek(0, os.SEEK_END)
+        return self._file.tell()
+    
+    def _last_frame_start(self, end):
+        """Locate the start of the frame ending at `end` using its trailer"""
+        if end < self.HEADER.size + self.TRAILER.size:
+            return None
+        self._file.seek(end - self.TRAILER.size)
+        length, = self.TRAILER.unpack(self._file.read(self.TRAILER.size))
+        start = end - self.TRAILER.size - length - self.HEADER.size
+        return start if start >= 0 else None
+    
+    def recover(self):
+        """Truncate any partially written record left by a crash"""
+        with self._lock:
+            size = self._size()
+            if size == 0:
+                return
+            start = self._last_frame_start(size)
+            if start is not None:
+                frame = self._frame_at(start, size)
+                if frame is not None and frame[1] == size:
+                    return
+            
+            # Tail is damaged: walk forward to the last intact frame
+            offset = 0
+            while True:
+                frame = self._frame_at(offset, size)
+                if frame is None:
+                    break
+                offset = frame[1]
+            print(f"History log damaged, truncating {size - offset} bytes")
+            self._file.truncate(offset)
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            self._count = None
+    
+    def append_many(self, entries):
+        """Append entries and fsync once for the whole batch"""
+        if not entries:
+            return
+        chunks = []
+        for entry in entries:
+            payload = json.dumps(entry, ensure_ascii=False).encode('utf-8')
+            chunks.append(self.HEADER.pack(len(payload), zlib.crc32(payload)))
+            chunks.append(payload)
+            chunks.append(self.TRAILER.pack(len(payload)))
+        with self._lock:
+            self._file.write(b''.join(chunks))
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            if self._count is not None:
+                self._count += len(entries)
+    
+    def tail(self, limit):
+        """Read the last `limit` records by walking trailers backwards"""
+        entries = []
+        with self._lock:
+            end = self._size()
+            while end > 0 and len(entries) < limit:
+                start = self._last_frame_start(end)
+                if start is None:
+                    break
+                self._file.seek(start + self.HEADER.size)
+                entries.append(json.loads(self._file.read(end - start - self.HEADER.size - self.TRAILER.size)))
+                end = start
+        entries.reverse()
+        return entries
+    
+    def iter_entries(self):
+        """Iterate forwards over all records"""
+        offset = 0
+        while True:
+            with self._lock:
+                frame = self._frame_at(offset, self._size())
+            if frame is None:
+                return
+            payload, offset = frame
+            yield json.loads(payload)
+    
+    def count(self):
+        """Count records by hopping from header to header"""
+        with self._lock:
+            if self._count is None:
+                size = self._size()
+                offset = count = 0
+                while offset + self.HEADER.size <= size:
+                    self._file.seek(offset)
+                    length, _ = self.HEADER.unpack(self._file.read(self.HEADER.size))
+                    offset += self.HEADER.size + length + self.TRAILER.size
+                    count += 1
+                self._count = count
+            return self._count
+    
+    def close(self):
+        with self._lock:
+            self._file.close()
+
+class SQLiteHistoryBackend(HistoryBackend):
+    """SQLite history store in WAL mode
+    
+    Source and translated text are indexed in an FTS5 table kept in sync by
+    a trigger, and language pair and timestamp have ordinary indexes, so
+    searches stay interactive at millions of entries. Terms in scripts
+    without word spacing, and SQLite builds without FTS5, fall back to LIKE
+    matching.
+    """
+    
+    FIELDS = ("timestamp", "source_text", "translated_text",
+              "source_language", "target_language")
+    
+    def __init__(self, filename="translation_history.db"):
+        self.filename = filename
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(self.filename, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS history (
+                id INTEGER PRIMARY KEY,
+                timestamp TEXT NOT NULL,
+                source_text TEXT NOT NULL,
+                translated_text TEXT NOT NULL,
+                source_language TEXT,
+                target_language TEXT
+            )
+        """)
+        self.conn.execute("CREATE INDEX IF NOT EXISTS history_pair "
+                          "ON history (source_language, target_language)")
+        self.conn.execute("CREATE INDEX IF NOT EXISTS history_timestamp ON history (timestamp)")
+        self.fts = self._create_fts()
+        self.conn.commit()
+    
+    def _create_fts(self):
+        """Create the full-text index, backfilling it for existing databases"""
+        exists = self.conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE name = 'history_fts'").fetchone()
+        try:
+            self.conn.execute("""
+                CREATE VIRTUAL TABLE IF NOT EXISTS history_fts USING fts5(
+                    source_text, translated_text,
+                    content='history', content_rowid='id',
+                    tokenize='unicode61 remove_diacritics 2'
+                )
+            """)
+        except sqlite3.OperationalError:
+            return False
+        self.conn.execute("""
+            CREATE TRIGGER IF NOT EXISTS history_fts_insert AFTER INSERT ON history BEGIN
+                INSERT INTO history_fts (rowid, source_text, translated_text)
+                VALUES (new.id, new.source_text, new.translated_text);
+            END
+        """)
+        if not exists:
+            self.conn.execute("INSERT INTO history_fts (history_fts) VALUES ('rebuild')")
+        return True
+    
+    def _where(self, query, source_lang, target_lang, since, until, before=None):
+        """SQL conditions and parameters for a search"""
+        conditions, params = [], []
+        terms = query.split()
+        # The unicode61 tokenizer cannot split text in scripts written without
+        # spaces (Chinese, Japanese, Thai) and drops punctuation, so those
+        # terms are matched with LIKE
+        fts_terms = [term for term in terms
+                     if self.fts and re.search(r'\w', term) and not UNSPACED_SCRIPT.search(term)]
+        if fts_terms:
+            # Every word must match, as a prefix, in either column
+            conditions.append("id IN (SELECT rowid FROM history_fts WHERE history_fts MATCH ?)")
+            params.append(" ".join('"' + term.replace('"', '""') + '"*' for term in fts_terms))
+        for term in terms:
+            if term not in fts_terms:
+                conditions.append("(source_text LIKE ? OR translated_text LIKE ?)")
+                params += [f"%{term}%"] * 2
+        for condition, value in (("id < ?", before), ("source_language = ?", source_lang),
+                                 ("target_language = ?", target_lang),
+                                 ("timestamp >= ?", since), ("timestamp < ?", until)):
+            if value:
+                conditions.append(condition)
+                params.append(value)
+        return (" WHERE " + " AND ".join(conditions) if conditions else ""), params
+    
+    def search(self, query="", source_lang=None, target_lang=None, since=None, until=None,
+               offset=0, limit=50, before=None):
+        where, params = self._where(query, source_lang, target_lang, since, until, before)
+        with self._lock:
+            rows = self.conn.execute(
+                f"SELECT id, {', '.join(self.FIELDS)} FROM history{where} "
+                f"ORDER BY id DESC LIMIT ? OFFSET ?", params + [limit, offset]).fetchall()
+        return [dict(self._row_to_entry(row[1:]), id=row[0]) for row in rows]
+    
+    def count_matching(self, query="", source_lang=None, target_lang=None, since=None, until=None):
+        where, params = self._where(query, source_lang, target_lang, since, until)
+        with self._lock:
+            return self.conn.execute(f"SELECT COUNT(*) FROM history{where}", params).fetchone()[0]
+    
+    def _row_to_entry(self, row):
+        return dict(zip(self.FIELDS, row))
+    
+    def append_many(self, entries):
+        """Insert a batch of entries in one transaction"""
+        if not entries:
+            return
+        rows = [tuple(entry.get(field) for field in self.FIELDS) for entry in entries]
+        with self._lock, self.conn:
+            self.conn.executemany(
+                f"INSERT INTO history ({', '.join(self.FIELDS)}) VALUES (?, ?, ?, ?, ?)",
+                rows)
+    
+    def tail(self, limit):
+        with self._lock:
+            rows = self.conn.execute(
+                f"SELECT {', '.join(self.FIELDS)} FROM history ORDER BY id DESC LIMIT ?",
+                (limit,)).fetchall()
+        return [self._row_to_entry(row) for row in reversed(rows)]
+    
+    def iter_entries(self, batch_size=1000):
+        last_id = 0
+        while True:
+            with self._lock:
+                rows = self.conn.execute(
+                    f"SELECT id, {', '.join(self.FIELDS)} FROM history WHERE id > ? ORDER BY id LIMIT ?",
+                    (last_id, batch_size)).fetchall()
+            if not rows:
+                return
+            last_id = rows[-1][0]
+            for row in rows:
+                yield self._row_to_entry(row[1:])
+    
+    def count(self):
+        with self._lock:
+            return self.conn.execute("SELECT COUNT(*) FROM history").fetchone()[0]
+    
+    def close(self):
+        with self._lock:
+            self.conn.close()
+
+HISTORY_BACKENDS = {
+    "sqlite": SQLiteHistoryBackend,
+    "log": AppendLogHistoryBackend,
+}
+
+class TranslationHistory:
+    """Manage translation history
+    
+    New entries are buffered in memory and flushed to the storage backend in
+    batches by a background writer, so adding a translation never blocks the
+    caller on disk I/O.
+    """
+    
+    def __init__(self, backend="sqlite", flush_interval=0.5, batch_size=64):
+        self.filename = "translation_history.json"  # Legacy format, migrated on load
+        if isinstance(backend, str):
+            backend = HISTORY_BACKENDS[backend]()
+        self.backend = backend
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self._pending = []
+        self._pending_lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._closed = False
+        self.load_history()
+        
+        self._writer = threading.Thread(target=self._writer_loop, daemon=True)
+        self._writer.start()
+        atexit.register(self.close)
+    
+    def add_translation(self, source_text, translated_text, source_lang, target_lang):
+        """Add a translation to history"""
+        entry = {
+            "timestamp": datetime.now().isoformat(),
+            "source_text": source_text,
+            "translated_text": translated_text,
+            "source_language": source_lang,
+            "target_language": target_lang
+        }
+        with self._pending_lock:
+            self._pending.append(entry)
+            if len(self._pending) >= self.batch_size:
+                self._wake.set()
+    
+    def add_translations(self, translations):
+        """Record several (source, translated, source_lang, target_lang) tuples in one write"""
+        timestamp = datetime.now().isoformat()
+        entries = [{
+            "timestamp": timestamp,
+            "source_text": source_text,
+            "translated_text": translated_text,
+            "source_language": source_lang,
+            "target_language": target_lang
+        } for source_text, translated_text, source_lang, target_lang in translations]
+        with self._pending_lock:
+            self._pending.extend(entries)
+        self.save_history()
+    
+    def save_history(self):
+        """Flush buffered entries to the backend"""
+        with self._flush_lock:
+            with self._pending_lock:
+                batch, self._pending = self._pending, []
+            if not batch:
+                return
+            try:
+                with METRICS.timer("history_write"):
+                    self.backend.append_many(batch)
+                METRICS.count("history_entries", len(batch))
+            except Exception as e:
+                print(f"Error saving history: {e}")
+                with self._pending_lock:
+                    self._pending[:0] = batch
+    
+    def _writer_loop(self):
+        """Background thread flushing history in batches"""
+        while not self._closed:
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            if self._closed:
+                break
+            self.save_history()
+    
+    def load_history(self):
+        """Import the legacy JSON history file into an empty backend
+        
+        The JSON file is left where it is, since it may be tracked in version
+        control; once the backend holds entries it is no longer read.
+        """
+        try:
+            if os.path.exists(self.filename) and self.backend.count() == 0:
+                with open(self.filename, 'r', encoding='utf-8') as f:
+                    self.backend.append_many(json.load(f))
+        except Exception as e:
+            print(f"Error loading history: {e}")
+    
+    def get_recent_translations(self, limit=10):
+        """Get recent translations"""
+        with self._flush_lock:
+            with self._pending_lock:
+                pending = list(self._pending[-limit:])
+            stored = self.backend.tail(limit - len(pending)) if len(pending) < limit else []
+        return stored + pending
+    
+    def search(self, query="", source_lang=None, target_lang=None, since=None, until=None,
+               offset=0, limit=50, before=None):
+        """Search stored history, newest first; see HistoryBackend.search
+        
+        Reads never flush: entries still buffered for the writer thread
+        show up once it has stored them.
+        """
+        return self.backend.search(query, source_lang, target_lang, since, until, offset, limit, before)
+    
+    def count_matching(self, query="", source_lang=None, target_lang=None, since=None, until=None):
+        return self.backend.count_matching(query, source_lang, target_lang, since, until)
+    
+    def close(self):
+        """Flush outstanding entries and close the backend"""
+        if self._closed:
+            return
+        self._closed = True
+        self._wake.set()
+        self._writer.join(timeout=2)
+        self.save_history()
+        self.backend.close()
+
+def format_history_entry(entry, width=30):
+    """One-line summary of a history entry for list views"""
+    # Timestamps are ISO strings, so "%m/%d %H:%M" is a slice rather than a parse
+    stamp = entry['timestamp']
+    timestamp = f"{stamp[5:7]}/{stamp[8:10]} {stamp[11:16]}"
+    return f"[{timestamp}] {entry['source_text'][:width]}... → {entry['translated_text'][:width]}..."
+
+class TranslationCache:
+    """Two-tier cache of translation results
+    
+    The first tier is an in-memory LRU bounded by entry count and TTL. The
+    second tier is a small SQLite file that survives restarts; entries found
+    there are promoted back into memory.
+    """
+    
+    def __init__(self, max_size=1024, ttl=3600, disk_filename="translation_cache.db",
+                 disk_ttl=7 * 24 * 3600):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.disk_ttl = disk_ttl
+        self.bypass = False
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "disk_hits": 0, "misses": 0, "evictions": 0, "expired": 0}
+        
+        self.disk = None
+        if disk_filename:
+            try:
+                self.disk = sqlite3.connect(disk_filename, check_same_thread=False)
+                self.disk.execute("PRAGMA journal_mode=WAL")
+                self.disk.execute("""
+                    CREATE TABLE IF NOT EXISTS cache (
+                        source_text TEXT NOT NULL,
+                        source_language TEXT NOT NULL,
+                        target_language TEXT NOT NULL,
+                        translated_text TEXT NOT NULL,
+                        created REAL NOT NULL,
+                        PRIMARY KEY (source_text, source_language, target_language)
+                    )
+                """)
+                self.disk.commit()
+            except Exception as e:
+                print(f"Error opening translation cache: {e}")
+                self.disk = None
+    
+    def _remember(self, key, translated_text, created):
+        """Insert into the memory tier, evicting least recently used entries"""
+        self._entries[key] = (translated_text, created)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self.stats["evictions"] += 1
+    
+    def get(self, text, source_lang, target_lang):
+        """Return a cached translation or None"""
+        if self.bypass:
+            return None
+        key = (text, source_lang, target_lang)
+        now = time.time()
+        with self._lock:
+            cached = self._entries.get(key)
+            if cached is not None:
+                if now - cached[1] <= self.ttl:
+                    self._entries.move_to_end(key)
+                    self.stats["hits"] += 1
+                    METRICS.count("cache_hits")
+                    return cached[0]
+                del self._entries[key]
+                self.stats["expired"] += 1
+            
+            if self.disk is not None:
+                row = self.disk.execute(
+                    "SELECT translated_text, created FROM cache "
+                    "WHERE source_text = ? AND source_language = ? AND target_language = ?",
+                    key).fetchone()
+                if row is not None and now - row[1] <= self.disk_ttl:
+                    # Promote with a fresh memory TTL; the disk entry keeps its age
+                    self._remember(key, row[0], now)
+                    self.stats["disk_hits"] += 1
+                    METRICS.count("cache_hits")
+                    return row[0]
+            
+            self.stats["misses"] += 1
+            METRICS.count("cache_misses")
+            return None
+    
+    def put(self, text, source_lang, target_lang, translated_text):
+        """Store a translation in both tiers"""
+        self.put_many([(text, source_lang, target_lang, translated_text)])
+    
+    def put_many(self, items, created=None):
+        """Store several (text, source_lang, target_lang, translated_text) tuples"""
+        if self.bypass or not items:
+            return
+        now = time.time()
+        rows = []
+        with self._lock:
+            for text, source_lang, target_lang, translated_text in items:
+                stamp = now if created is None else created
+                self._remember((text, source_lang, target_lang), translated_text, stamp)
+                rows.append((text, source_lang, target_lang, translated_text, stamp))
+            if self.disk is not None:
+                try:
+                    with self.disk:
+                        self.disk.executemany(
+                            "INSERT OR REPLACE INTO cache VALUES (?, ?, ?, ?, ?)", rows)
+                except Exception as e:
+                    print(f"Error writing translation cache: {e}")
+    
+    def warm_from_history(self, history, limit=1000):
+        """Preload the memory tier with recent history entries still within the TTL
+        
+        Entries keep their history timestamps, and the disk tier is left
+        alone so warming neither rewrites rows nor resets their age.
+        """
+        now = time.time()
+        warmed = 0
+        entries = history.get_recent_translations(limit)
+        with self._lock:
+            for entry in entries:
+                try:
+                    created = datetime.fromisoformat(entry["timestamp"]).timestamp()
+                except (KeyError, TypeError, ValueError):
+                    continue
+                if now - created > self.ttl:
+                    continue
+                self._remember((entry["source_text"], entry["source_language"], entry["target_language"]),
+                               entry["translated_text"], created)
+                warmed += 1
+        return warmed
+    
+    def clear(self):
+        """Drop every cached entry from both tiers"""
+        with self._lock:
+            self._entries.clear()
+            if self.disk is not None:
+                with self.disk:
+                    self.disk.execute("DELETE FROM cache")
+    
+    def get_stats(self):
+        """Return counters plus the current memory tier size and hit rate"""
+        with self._lock:
+            stats = dict(self.stats)
+            stats["size"] = len(self._entries)
+        lookups = stats["hits"] + stats["disk_hits"] + stats["misses"]
+        stats["hit_rate"] = (stats["hits"] + stats["disk_hits"]) / lookups if lookups else 0.0
+        return stats
+    
+    def close(self):
+        if self.disk is not None:
+            with self._lock:
+                self.disk.close()
+                self.disk = None
+
+class TranslationScheduler:
+    """Coalesce translation requests so only the latest one per field runs
+    
+    Every submit bumps a per-field generation counter and replaces whatever
+    request for that field is still waiting, so a burst of typing collapses
+    into a single backend call. Results carry their generation and can be
+    checked with is_current() before they are shown. The debounce delay
+    follows a moving average of measured backend latency.
+    """
+    
+    def __init__(self, initial_delay=1000, min_delay=250, max_delay=2000):
+        self.initial_delay = initial_delay
+        self.min_delay = min_delay
+        self.max_delay = max_delay
+        self.latency = None  # Exponential moving average, seconds
+        self._pending = OrderedDict()  # field -> (generation, text, source_lang, target_lang)
+        self._generations = {}
+        self._submitted_at = {}
+        self._cond = threading.Condition()
+    
+    def submit(self, field, text, source_lang, target_lang):
+        """Queue a request for a field, superseding any waiting one"""
+        with self._cond:
+            generation = self._generations.get(field, 0) + 1
+            self._generations[field] = generation
+            self._pending[field] = (generation, text, source_lang, target_lang)
+            self._submitted_at.setdefault(field, time.perf_counter())
+            self._cond.notify()
+            return generation
+    
+    def invalidate(self, field):
+        """Drop any waiting request and mark in-flight results as stale"""
+        with self._cond:
+            self._generations[field] = self._generations.get(field, 0) + 1
+            self._pending.pop(field, None)
+            self._submitted_at.pop(field, None)
+    
+    def next_request(self, timeout=None):
+        """Wait for the next request; returns (field, generation, text, source_lang, target_lang)"""
+        with self._cond:
+            if not self._pending and not self._cond.wait_for(lambda: self._pending, timeout):
+                return None
+            field, request = self._pending.popitem(last=False)
+            METRICS.observe("queue_wait", time.perf_counter() - self._submitted_at.pop(field))
+            return (field,) + request
+    
+    def is_current(self, field, generation):
+        """Check whether a result still matches the latest request for its field"""
+        with self._cond:
+            return self._generations.get(field) == generation
+    
+    def record_latency(self, seconds, weight=0.3):
+        """Feed a measured backend latency into the moving average"""
+        if self.latency is None:
+            self.latency = seconds
+        else:
+            self.latency = weight * seconds + (1 - weight) * self.latency
+    
+    def debounce_delay(self):
+        """Debounce delay in ms: roughly twice the typical backend latency"""
+        if self.latency is None:
+            return self.initial_delay
+        return int(min(self.max_delay, max(self.min_delay, self.latency * 2000)))
+
+class BatchTranslator:
+    """Translate large streams of segments with batched, concurrent backend calls
+    
+    Segments are grouped into batches that share a source language and stay
+    under a size and character budget. Batches run on a bounded thread pool,
+    and results are yielded in input order.
+    """
+    
+    DETECT_CHUNK = 256
+    
+    def __init__(self, backend, target_lang, source_lang="auto", detector=None,
+                 batch_size=32, max_chars=4500, workers=4):
+        self.backend = backend
+        self.target_lang = target_lang
+        self.source_lang = source_lang
+        self.detector = detector
+        self.batch_size = batch_size
+        self.max_chars = max_chars
+        self.workers = workers
+        self.segments = 0
+        self.chars = 0
+    
+    def _sources_for(self, texts):
+        """Source language per text, detected in one call when the source is auto"""
+        if self.source_lang != "auto" or self.detector is None:
+            return [self.source_lang] * len(texts)
+        return [lang if confidence >= self.detector.min_confidence else self.source_lang
+                for lang, confidence in self.detector.detect_many(texts)]
+    
+    def _detected(self, records):
+        """Yield (record, text, source_lang), detecting DETECT_CHUNK records at a time"""
+        records = iter(records)
+        while True:
+            chunk = list(itertools.islice(records, self.DETECT_CHUNK))
+            if not chunk:
+                return
+            sources = self._sources_for([text for _, text in chunk])
+            for (record, text), source_lang in zip(chunk, sources):
+                yield record, text, source_lang
+    
+    def _translate_batch(self, texts, source_lang):
+        """Translate one batch; empty segments are passed through untouched"""
+        indexes = [i for i, text in enumerate(texts) if text.strip()]
+        results = list(texts)
+        if indexes:
+            translations = self.backend.translate_batch([texts[i] for i in indexes],
+                                                        src=source_lang, dest=self.target_lang)
+            for i, translation in zip(indexes, translations):
+                results[i] = translation.text
+        return results, source_lang
+    
+    def _batches(self, records):
+        """Group (record, text) pairs into batches sharing a source language"""
+        batch, chars, batch_lang = [], 0, None
+        for record, text, source_lang in self._detected(records):
+            if not text.strip():
+                source_lang = batch_lang
+            if batch and (source_lang != batch_lang or len(batch) >= self.batch_size
+                          or chars + len(text) > self.max_chars):
+                yield batch, batch_lang
+                batch, chars = [], 0
+            if not batch:
+                batch_lang = source_lang
+            batch.append((record, text))
+            chars += len(text)
+        if batch:
+            yield batch, batch_lang
+    
+    def translate_records(self, records):
+        """Yield (record, text, translation, source_lang) tuples in input order"""
+        in_flight = deque()
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            for batch, source_lang in self._batches(records):
+                texts = [text for _, text in batch]
+                future = pool.submit(self._translate_batch, texts,
+                                     source_lang or self.source_lang)
+                in_flight.append((batch, future))
+                # Bound memory: never keep more than two batches per worker queued
+                while len(in_flight) >= self.workers * 2:
+                    yield from self._drain(in_flight.popleft())
+            while in_flight:
+                yield from self._drain(in_flight.popleft())
+    
+    def _drain(self, item):
+        batch, future = item
+        translations, source_lang = future.result()
+        for (record, text), translation in zip(batch, translations):
+            self.segments += 1
+            self.chars += len(text)
+            yield record, text, translation, source_lang
+
+class TranslationResult:
+    """Result of one translation, shaped like googletrans.models.Translated"""
+    
+    def __init__(self, text, src, dest):
+        self.text = text
+        self.src = src
+        self.dest = dest
+
+class TranslationBackend:
+    """Base class for translation engines
+    
+    Capability flags tell callers how to batch: max_batch_size texts and
+    max_chars characters per translate_batch call, and supported_pairs is
+    either None (any pair) or a set of (src, dest) tuples.
+    """
+    
+    name = "base"
+    max_batch_size = 1
+    max_chars = 5000
+    supported_pairs = None
+    
+    def supports(self, src, dest):
+        """Check whether the backend can translate from src to dest"""
+        if self.supported_pairs is None:
+            return True
+        if src == "auto":
+            return any(pair[1] == dest for pair in self.supported_pairs)
+        return (src, dest) in self.supported_pairs
+    
+    def request_cost(self, texts):
+        """Number of upstream requests a translate_batch call makes, for rate limiting"""
+        return 1
+    
+    def translate(self, text, src="auto", dest="en"):
+        """Translate one text, returning a TranslationResult"""
+        return self.translate_batch([text], src=src, dest=dest)[0]
+    
+    def translate_batch(self, texts, src="auto", dest="en"):
+        """Translate a list of texts sharing a language pair"""
+        raise NotImplementedError
+
+class GoogleBackend(TranslationBackend):
+    """Google Translate through googletrans; one client is shared by all callers"""
+    
+    name = "google"
+    max_batch_size = 50
+    max_chars = 5000
+    
+    def __init__(self):
+        self.client = googletrans.Translator()
+    
+    def request_cost(self, texts):
+        # googletrans sends one HTTP request per list item
+        return len(texts)
+    
+    def translate(self, text, src="auto", dest="en"):
+        translation = self.client.translate(text, src=src, dest=dest)
+        return TranslationResult(translation.text, translation.src, dest)
+    
+    def translate_batch(self, texts, src="auto", dest="en"):
+        return [TranslationResult(translation.text, translation.src, dest)
+                for translation in self.client.translate(list(texts), src=src, dest=dest)]
+
+class LocalPhraseBackend(TranslationBackend):
+    """Offline, deterministic phrase-table translation
+    
+    Text is matched against phrase_table.json, longest phrase first; words
+    with no entry are passed through unchanged. Reverse directions are
+    derived from the forward tables, so each pair only needs listing once.
+    """
+    
+    name = "local"
+    max_batch_size = 1000
+    max_chars = 100000
+    PHRASE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "phrase_table.json")
+    TOKEN_PATTERN = re.compile(r"[\w'-]+|[^\w\s]")
+    
+    def __init__(self, phrase_file=None):
+        with open(phrase_file or self.PHRASE_FILE, 'r', encoding='utf-8') as f:
+            raw = json.load(f)
+        
+        self.tables = {}
+        for pair, phrases in raw.items():
+            src, dest = pair.split("-")
+            forward = self.tables.setdefault((src, dest), {})
+            backward = self.tables.setdefault((dest, src), {})
+            for phrase, translation in phrases.items():
+                forward[self._key(phrase)] = translation
+                backward.setdefault(self._key(translation), phrase)
+        self.supported_pairs = set(self.tables)
+        self.max_phrase_words = max(len(key) for table in self.tables.values() for key in table)
+    
+    def _key(self, phrase):
+        return tuple(self.TOKEN_PATTERN.findall(phrase.lower()))
+    
+    def _match(self, tokens, table):
+        """Greedy longest-phrase lookup; returns (output tokens, tokens matched)"""
+        output, matched, i = [], 0, 0
+        while i < len(tokens):
+            for size in range(min(self.max_phrase_words, len(tokens) - i), 0, -1):
+                phrase = tuple(tokens[i:i + size])
+                if phrase in table:
+                    output.append(table[phrase])
+                    matched += size
+                    i += size
+                    break
+            else:
+                output.append(tokens[i])
+                i += 1
+        return output, matched
+    
+    def _guess_source(self, tokens, dest):
+        """Pick the source language whose table covers the most tokens"""
+        best, best_matched = None, 0
+        for (src, table_dest), table in sorted(self.tables.items()):
+            if table_dest == dest:
+                matched = self._match(tokens, table)[1]
+                if matched > best_matched:
+                    best, best_matched = src, matched
+        return best
+    
+    def translate_batch(self, texts, src="auto", dest="en"):
+        return [self._translate_one(text, src, dest) for text in texts]
+    
+    def _translate_one(self, text, src, dest):
+        tokens = self.TOKEN_PATTERN.findall(text.lower())
+        if src == "auto":
+            src = self._guess_source(tokens, dest) or "auto"
+        table = self.tables.get((src, dest))
+        if table is None or src == dest:
+            return TranslationResult(text, src, dest)
+        
+        translated = ""
+        for token in self._match(tokens, table)[0]:
+            if translated and re.match(r"\w", token):
+                translated += " "
+            translated += token
+        if text[:1].isupper():
+            translated = translated[:1].upper() + translated[1:]
+        return TranslationResult(translated, src, dest)
+
+class MockBackend(TranslationBackend):
+    """Backend with configurable latency and failures, for offline measurement"""
+    
+    name = "mock"
+    max_batch_size = 100
+    max_chars = 100000
+    
+    def __init__(self, latency=0.05, jitter=0.0, failure_rate=0.0, per_item_latency=0.0):
+        self.latency = latency
+        self.jitter = jitter
+        self.failure_rate = failure_rate
+        self.per_item_latency = per_item_latency
+        self.calls = 0
+    
+    def translate_batch(self, texts, src="auto", dest="en"):
+        self.calls += 1
+        delay = self.latency + self.per_item_latency * len(texts)
+        time.sleep(max(0.0, delay + random.uniform(-self.jitter, self.jitter)))
+        if self.failure_rate and random.random() < self.failure_rate:
+            raise ConnectionError("Mock backend failure")
+        return [TranslationResult(f"[{dest}] {text}", src, dest) for text in texts]
+
+TRANSLATION_BACKENDS = {
+    "google": GoogleBackend,
+    "local": LocalPhraseBackend,
+    "mock": MockBackend,
+}
+
+def create_backend(name, **options):
+    """Create a translation backend by name"""
+    try:
+        return TRANSLATION_BACKENDS[name](**options)
+    except KeyError:
+        raise ValueError(f"Unknown translation backend: {name}") from None
+
+SEGMENT_BREAK = re.compile(r'(?<=[。！？])|(?<=[.!?؟۔।])[ \t]+|[ \t]*\n\s*')
+
+# Clause boundaries inside a sentence: commas, semicolons, colons and dashes,
+# including the Arabic-script and full-width forms
+CLAUSE_BREAK = re.compile(r'(?<=[，；：])|(?<=[,;:،؛])[ \t]+|[ \t]+[-–—][ \t]+')
+
+def split_segments(text, pattern=SEGMENT_BREAK):
+    """Split text into (segment, separator) pairs at sentence ends and line breaks"""
+    segments = []
+    position = 0
+    for match in pattern.finditer(text):
+        if match.start() > position:
+            segments.append((text[position:match.start()], match.group()))
+        elif segments and match.group():
+            segment, separator = segments[-1]
+            segments[-1] = (segment, separator + match.group())
+        position = max(position, match.end())
+    if position < len(text):
+        segments.append((text[position:], ""))
+    return segments
+
+def split_clauses(sentence):
+    """Split one sentence into (clause, separator) pairs"""
+    return split_segments(sentence, CLAUSE_BREAK)
+
+class SegmentTranslator:
+    """Translate documents segment by segment, reusing unchanged segments
+    
+    Each sentence or line is hashed together with its language pair. The
+    translations of the previous document are kept by hash, so after an
+    edit only the segments that actually changed are sent to the backend,
+    in one batch call per source language. With a translation memory,
+    segments close enough to a past translation are filled from it instead,
+    and weaker fuzzy matches are returned as suggestions.
+    
+    With source language MIXED, each sentence is split into clauses whose
+    languages are detected in one detect_many call, and adjacent clauses in
+    the same language are translated together as one run, so code-mixed
+    input reaches the backend with the right source for every run.
+    """
+    
+    MIXED = "mixed"
+    
+    def __init__(self, backend, cache=None, memory=None, detector=None):
+        self.backend = backend
+        self.cache = cache
+        self.memory = memory
+        self.detector = detector
+        self._segments = {}  # target language -> {digest -> translation} of the last document
+        self._clause_languages = {}  # clause -> language, for the last document
+        self._lock = threading.Lock()
+    
+    @staticmethod
+    def digest(text, source_lang, target_lang):
+        return hashlib.sha1(f"{source_lang}\0{target_lang}\0{text}".encode('utf-8')).hexdigest()
+    
+    def detect_clauses(self, clauses):
+        """Language per clause; unsure clauses take the language of a neighbour"""
+        with self._lock:
+            previous = self._clause_languages
+        unknown = list({clause for clause in clauses if clause not in previous})
+        known = {clause: previous[clause] for clause in clauses if clause in previous}
+        if unknown:
+            with METRICS.timer("detect"):
+                detected = self.detector.detect_many(unknown)
+            for clause, (lang, confidence) in zip(unknown, detected):
+                known[clause] = lang if confidence >= self.detector.min_confidence else None
+        with self._lock:
+            self._clause_languages = known
+        
+        languages = [known[clause] for clause in clauses]
+        last = None
+        for index, lang in enumerate(languages):
+            if lang is None:
+                languages[index] = last
+            else:
+                last = lang
+        last = None
+        for index in range(len(languages) - 1, -1, -1):
+            if languages[index] is None:
+                languages[index] = last
+            else:
+                last = languages[index]
+        return [lang or "auto" for lang in languages]
+    
+    def units(self, text, source_lang):
+        """Split a document into (text, separator, source language) translation units"""
+        segments = split_segments(text)
+        if source_lang != self.MIXED:
+            return [(segment, separator, source_lang) for segment, separator in segments]
+        if self.detector is None:
+            return [(segment, separator, "auto") for segment, separator in segments]
+        
+        sentences = [split_clauses(segment) for segment, _ in segments]
+        languages = iter(self.detect_clauses([clause for clauses in sentences for clause, _ in clauses]))
+        units = []
+        for clauses, (_, separator) in zip(sentences, segments):
+            # Runs never cross sentences, so monolingual text keeps per-sentence reuse
+            run, run_lang = "", None
+            for clause, clause_separator in clauses:
+                lang = next(languages)
+                if run and lang != run_lang:
+                    units.append((run.rstrip(), run[len(run.rstrip()):], run_lang))
+                    run = ""
+                run, run_lang = run + clause + clause_separator, lang
+            units.append((run.rstrip(), run[len(run.rstrip()):] + separator, run_lang))
+        return units
+    
+    def translate(self, text, source_lang, target_lang, units=None):
+        """Return (rendered segments, detected source, stats) for a document
+        
+        `units` may be passed in when the same text goes to several targets,
+        so it is split and its clause languages detected only once.
+        """
+        if units is None:
+            units = self.units(text, source_lang)
+        digests = [self.digest(unit, unit_lang, target_lang) for unit, _, unit_lang in units]
+        translations = {}
+        pending = {}  # source language -> [(unit, digest)]
+        queued = set()  # digests already in pending; repeats are translated once
+        suggestions = []
+        from_memory = 0
+        with self._lock:
+            previous = self._segments.get(target_lang, {})
+        for index, ((unit, _, unit_lang), digest) in enumerate(zip(units, digests)):
+            if digest in translations or digest in queued:
+                continue
+            translated = previous.get(digest)
+            if translated is None and self.cache is not None:
+                translated = self.cache.get(unit, unit_lang, target_lang)
+            if translated is None and self.memory is not None:
+                match = self.memory.lookup(unit, unit_lang, target_lang)
+                if match is not None and match.score >= self.memory.auto_apply_threshold:
+                    translated = match.translated_text
+                    from_memory += 1
+                elif match is not None:
+                    suggestions.append((index, match))
+            if translated is None:
+                pending.setdefault(unit_lang, []).append((unit, digest))
+                queued.add(digest)
+            else:
+                translations[digest] = translated
+        
+        translated_count = len(queued)
+        stats = {"segments": len(units), "translated": translated_count,
+                 "reused": len(units) - translated_count, "memory": from_memory,
+                 "suggestions": suggestions, "backend_seconds": 0.0,
+                 "languages": [lang for lang in dict.fromkeys(unit_lang for _, _, unit_lang in units)
+                               if lang != "auto"]}
+        detected = {}
+        started = time.perf_counter()
+        for unit_lang, items in pending.items():
+            results = self.backend.translate_batch([unit for unit, _ in items],
+                                                   src=unit_lang, dest=target_lang)
+            for (unit, digest), result in zip(items, results):
+                translations[digest] = result.text
+            if unit_lang == "auto":
+                detected[unit_lang] = getattr(results[0], "src", unit_lang)
+            if self.cache is not None:
+                self.cache.put_many([(unit, unit_lang, target_lang, result.text)
+                                     for (unit, _), result in zip(items, results)])
+            if self.memory is not None:
+                for (unit, _), result in zip(items, results):
+                    self.memory.add(unit, result.text, detected.get(unit_lang, unit_lang), target_lang)
+        if pending:
+            stats["backend_seconds"] = time.perf_counter() - started
+        
+        with self._lock:
+            self._segments[target_lang] = translations
+        rendered = [translations[digest] + separator
+                    for (_, separator, _), digest in zip(units, digests)]
+        
+        # Report the language covering most of the text
+        if source_lang != self.MIXED:
+            return rendered, detected.get(source_lang, source_lang), stats
+        sizes = {}
+        for unit, _, unit_lang in units:
+            unit_lang = detected.get(unit_lang, unit_lang)
+            sizes[unit_lang] = sizes.get(unit_lang, 0) + len(unit)
+        return rendered, max(sizes, key=sizes.get) if sizes else "auto", stats
+
+class MemoryMatch:
+    """A translation memory hit; score is 1.0 for a normalised exact match"""
+    
+    def __init__(self, source_text, translated_text, score):
+        self.source_text = source_text
+        self.translated_text = translated_text
+        self.score = score
+
+class TranslationMemory:
+    """Fuzzy translation memory of past segment translations
+    
+    Segments are normalised and shingled into character trigrams. A MinHash
+    signature of the shingles is cut into LSH bands, and the band hashes of
+    all entries are kept in sorted NumPy arrays, so a lookup is a handful of
+    binary searches followed by scoring at most MAX_CANDIDATES entries by
+    the Dice similarity of their trigram sets. Entries added since the last
+    index rebuild are compared with a vectorised scan until REINDEX_EVERY
+    of them have accumulated; they are then merged into the sorted arrays
+    on a background thread, and lookups keep using the old arrays until
+    the merged ones are swapped in.
+    """
+    
+    NUM_PERM = 48
+    BANDS = 12
+    MAX_CANDIDATES = 24
+    REINDEX_EVERY = 4096
+    BULK_REINDEX_EVERY = 65536
+    
+    def __init__(self, threshold=0.7, auto_apply_threshold=1.0, seed=1):
+        self.threshold = threshold
+        self.auto_apply_threshold = auto_apply_threshold
+        rng = random.Random(seed)
+        # Multiply-shift hashing: ((a * x + b) mod 2**64) >> 32, with odd a
+        self._a = np.array([rng.getrandbits(64) | 1 for _ in range(self.NUM_PERM)], dtype=np.uint64)
+        self._b = np.array([rng.getrandbits(64) for _ in range(self.NUM_PERM)], dtype=np.uint64)
+        self._mix = np.array([rng.getrandbits(64) | 1 for _ in range(self.NUM_PERM // self.BANDS)],
+                             dtype=np.uint64)
+        self.sources = []
+        self.targets = []
+        self.pairs = []
+        self._exact = {}  # (src, dst, normalised source) -> entry id
+        self._keys = np.empty((1024, self.BANDS), dtype=np.uint64)
+        self._sorted_keys = [np.empty(0, dtype=np.uint64)] * self.BANDS
+        self._sorted_ids = [np.empty(0, dtype=np.int64)] * self.BANDS
+        self._indexed = 0
+        self._reindexing = False
+        self._lock = threading.Lock()
+        self._reindex_lock = threading.Lock()  # One merge at a time
+    
+    @staticmethod
+    def normalize(text):
+        return " ".join(text.lower().split())
+    
+    @staticmethod
+    def shingles(normalized):
+        padded = f" {normalized} "
+        return {padded[i:i + 3] for i in range(len(padded) - 2)}
+    
+    def band_keys(self, shingles, source_lang, target_lang):
+        """LSH band hashes for a segment's shingles, salted with its language pair"""
+        # str hashes are salted per process, which is fine for an in-memory index
+        hashes = np.array([hash(shingle) for shingle in shingles], dtype=np.int64).view(np.uint64)
+        signature = ((np.outer(hashes, self._a) + self._b) >> np.uint64(32)).min(axis=0)
+        bands = signature.reshape(self.BANDS, -1) * self._mix
+        pair = np.uint64(zlib.crc32(f"{source_lang}\0{target_lang}".encode('utf-8')))
+        return bands.sum(axis=1) ^ pair
+    
+    def __len__(self):
+        return len(self.sources)
+    
+    def add(self, source_text, translated_text, source_lang, target_lang, reindex=True):
+        """Remember a segment translation; later additions replace exact duplicates"""
+        normalized = self.normalize(source_text)
+        if not normalized or source_lang == "auto":
+            return
+        keys = self.band_keys(self.shingles(normalized), source_lang, target_lang)
+        with self._lock:
+            exact_key = (source_lang, target_lang, normalized)
+            entry_id = self._exact.get(exact_key)
+            if entry_id is not None:
+                self.targets[entry_id] = translated_text
+                return
+            entry_id = len(self.sources)
+            self._exact[exact_key] = entry_id
+            self.sources.append(source_text)
+            self.targets.append(translated_text)
+            self.pairs.append((source_lang, target_lang))
+            if entry_id == len(self._keys):
+                self._keys = np.concatenate([self._keys, np.empty_like(self._keys)])
+            self._keys[entry_id] = keys
+            start_reindex = (reindex and not self._reindexing
+                             and entry_id + 1 - self._indexed >= self.REINDEX_EVERY)
+            if start_reindex:
+                self._reindexing = True
+        if start_reindex:
+            threading.Thread(target=self._background_reindex, name="memory-reindex", daemon=True).start()
+    
+    def _background_reindex(self):
+        try:
+            self._reindex()
+        finally:
+            self._reindexing = False
+    
+    def _reindex(self):
+        """Merge entries added since the last rebuild into the sorted band arrays
+        
+        Runs outside the lock: rows of _keys below len(sources) never change
+        and growing _keys allocates a new array, so the snapshot stays valid.
+        Only swapping in the merged arrays takes the lock.
+        """
+        with self._reindex_lock:
+            with self._lock:
+                all_keys, start, count = self._keys, self._indexed, len(self.sources)
+                sorted_keys, sorted_ids = list(self._sorted_keys), list(self._sorted_ids)
+            if count == start:
+                return
+            ids = np.arange(start, count, dtype=np.int64)
+            for band in range(self.BANDS):
+                keys = all_keys[start:count, band]
+                order = np.argsort(keys)
+                positions = np.searchsorted(sorted_keys[band], keys[order], side='right')
+                sorted_keys[band] = np.insert(sorted_keys[band], positions, keys[order])
+                sorted_ids[band] = np.insert(sorted_ids[band], positions, ids[order])
+            with self._lock:
+                self._sorted_keys, self._sorted_ids = sorted_keys, sorted_ids
+                self._indexed = count
+    
+    def build_from_history(self, history):
+        """Index past translations, aligning segments when both sides split evenly"""
+        added = 0
+        for entry in history.backend.iter_entries():
+            source_lang = entry.get("source_language")
+            target_lang = entry.get("target_language")
+            sources = [segment for segment, _ in split_segments(entry["source_text"])]
+            targets = [segment for segment, _ in split_segments(entry["translated_text"])]
+            if len(sources) != len(targets):
+                sources, targets = [entry["source_text"]], [entry["translated_text"]]
+            for source_text, translated_text in zip(sources, targets):
+                self.add(source_text, translated_text, source_lang, target_lang, reindex=False)
+                added += 1
+                if added % self.BULK_REINDEX_EVERY == 0:
+                    self._reindex()
+        self._reindex()
+        return added
+    
+    def lookup(self, text, source_lang, target_lang):
+        """Return the best MemoryMatch scoring at least `threshold`, or None"""
+        normalized = self.normalize(text)
+        if not normalized or source_lang == "auto":
+            return None
+        with self._lock:
+            entry_id = self._exact.get((source_lang, target_lang, normalized))
+            if entry_id is not None:
+                return MemoryMatch(self.sources[entry_id], self.targets[entry_id], 1.0)
+            if not self.sources:
+                return None
+            
+            shingles = self.shingles(normalized)
+            keys = self.band_keys(shingles, source_lang, target_lang)
+            hits = []
+            for band in range(self.BANDS):
+                sorted_keys = self._sorted_keys[band]
+                start = np.searchsorted(sorted_keys, keys[band], side='left')
+                end = np.searchsorted(sorted_keys, keys[band], side='right')
+                if end > start:
+                    hits.append(self._sorted_ids[band][start:end])
+            recent = self._keys[self._indexed:len(self.sources)]
+            if len(recent):
+                hits.append(np.nonzero((recent == keys).any(axis=1))[0] + self._indexed)
+            if not hits:
+                return None
+            
+            # Entries sharing the most bands are the likeliest near-duplicates
+            candidates, shared = np.unique(np.concatenate(hits), return_counts=True)
+            candidates = candidates[np.argsort(-shared, kind='stable')[:self.MAX_CANDIDATES]]
+            best, best_score = None, self.threshold
+            for entry_id in candidates.tolist():
+                if self.pairs[entry_id] != (source_lang, target_lang):
+                    continue
+                other = self.shingles(self.normalize(self.sources[entry_id]))
+                score = 2 * len(shingles & other) / (len(shingles) + len(other))
+                if score >= best_score:
+                    best, best_score = entry_id, score
+            if best is None:
+                return None
+            return MemoryMatch(self.sources[best], self.targets[best], best_score)
+
+class TokenBucket:
+    """Thread-safe token bucket rate limiter"""
+    
+    def __init__(self, rate, capacity):
+        self.rate = rate  # Tokens added per second
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+    
+    def acquire(self, tokens=1):
+        """Block until `tokens` tokens have been taken from the bucket"""
+        for _ in range(tokens):
+            while True:
+                with self._lock:
+                    now = time.monotonic()
+                    self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                    self.updated = now
+                    if self.tokens >= 1:
+                        self.tokens -= 1
+                        break
+                    wait = (1 - self.tokens) / self.rate
+                time.sleep(wait)
+
+class BackendError(Exception):
+    """A translation backend call failed after its retries (network, quota or service error)"""
+
+class BackendUnavailable(BackendError):
+    """Raised without calling the backend while its circuit breaker is open"""
+
+class CircuitBreaker:
+    """Stop calling a failing backend until it has had time to recover
+    
+    After `failure_threshold` consecutive failures the circuit opens and
+    calls fail fast. Once `reset_timeout` has passed a single probe call is
+    let through (half-open); success closes the circuit, failure reopens it
+    with the timeout doubled, up to `max_timeout`.
+    """
+    
+    def __init__(self, failure_threshold=3, reset_timeout=2.0, max_timeout=60.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.max_timeout = max_timeout
+        self.state = "closed"
+        self.failures = 0
+        self.timeout = reset_timeout
+        self.opened_at = 0.0
+        self._probing = False
+        self._lock = threading.Lock()
+    
+    def allow(self):
+        """Return True if a call may go to the backend now"""
+        with self._lock:
+            if self.state == "closed":
+                return True
+            if self.state == "open" and time.monotonic() - self.opened_at >= self.timeout:
+                self.state = "half-open"
+                self._probing = False
+            if self.state == "half-open" and not self._probing:
+                self._probing = True
+                return True
+            return False
+    
+    def retry_after(self):
+        """Seconds until the next probe is allowed"""
+        with self._lock:
+            if self.state != "open":
+                return 0.0
+            return max(0.0, self.opened_at + self.timeout - time.monotonic())
+    
+    def record_success(self):
+        with self._lock:
+            self.state = "closed"
+            self.failures = 0
+            self.timeout = self.reset_timeout
+            self._probing = False
+    
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.state == "half-open":
+                self.timeout = min(self.max_timeout, self.timeout * 2)
+            elif self.failures < self.failure_threshold:
+                return
+            if self.state != "open":
+                METRICS.count("circuit_opened")
+            self.state = "open"
+            self.opened_at = time.monotonic()
+            self._probing = False
+
+class TranslationWorkerPool:
+    """Pool of translation workers sharing one backend instance
+    
+    All workers go through the same backend, so its HTTP session and
+    connections are reused. Calls are throttled by a token bucket (one
+    token per upstream request) and retried with exponential backoff.
+    The pool exposes the backend's translate/translate_batch interface and
+    splits batches to fit the backend's capability limits. A call that still
+    fails after its retries raises BackendError; with a circuit breaker,
+    calls fail fast with BackendUnavailable while it is open.
+    """
+    
+    def __init__(self, backend, workers=4, rate=10.0, burst=20, retries=3, backoff=0.5, breaker=None):
+        self.backend = backend
+        self.breaker = breaker
+        self.workers = workers
+        self.rate_limiter = TokenBucket(rate, burst)
+        self.retries = retries
+        self.backoff = backoff
+        self.threads = []
+        self.stats = {"requests": 0, "retries": 0, "failures": 0}
+        self._stats_lock = threading.Lock()
+    
+    def _count(self, name, amount=1):
+        with self._stats_lock:
+            self.stats[name] += amount
+    
+    def _call(self, call, cost):
+        """Run a backend call under the rate limit, retrying failures"""
+        if self.breaker is not None and not self.breaker.allow():
+            raise BackendUnavailable("Translation backend unavailable, retrying later")
+        for attempt in range(self.retries + 1):
+            self.rate_limiter.acquire(cost)
+            self._count("requests", cost)
+            try:
+                with METRICS.timer("backend"):
+                    result = call()
+                if self.breaker is not None:
+                    self.breaker.record_success()
+                return result
+            except Exception as e:
+                METRICS.count("backend_errors")
+                if attempt == self.retries:
+                    self._count("failures")
+                    if self.breaker is not None:
+                        self.breaker.record_failure()
+                    raise BackendError(str(e) or type(e).__name__) from e
+                self._count("retries")
+                delay = self.backoff * (2 ** attempt)
+                time.sleep(delay + random.uniform(0, delay / 2))
+    
+    def translate(self, text, src="auto", dest="en"):
+        """Rate-limited, retrying backend.translate"""
+        return self._call(lambda: self.backend.translate(text, src=src, dest=dest),
+                          self.backend.request_cost([text]))
+    
+    def chunks(self, texts):
+        """Split texts into lists that respect the backend's batch limits"""
+        chunk, chars = [], 0
+        for text in texts:
+            if chunk and (len(chunk) >= self.backend.max_batch_size
+                          or chars + len(text) > self.backend.max_chars):
+                yield chunk
+                chunk, chars = [], 0
+            chunk.append(text)
+            chars += len(text)
+        if chunk:
+            yield chunk
+    
+    def translate_batch(self, texts, src="auto", dest="en"):
+        """Rate-limited, retrying backend.translate_batch over capability-sized chunks"""
+        results = []
+        for chunk in self.chunks(texts):
+            results.extend(self._call(
+                lambda: self.backend.translate_batch(chunk, src=src, dest=dest),
+                self.backend.request_cost(chunk)))
+        return results
+    
+    def start(self, target):
+        """Start the worker threads, each running `target` until the app exits"""
+        for i in range(self.workers):
+            thread = threading.Thread(target=target, name=f"translation-worker-{i}", daemon=True)
+            thread.start()
+            self.threads.append(thread)
+
+class RequestJournal:
+    """Durable SQLite journal of translation requests the backend could not serve
+    
+    Requests are unique per (text, source, target), so repeated failures of
+    the same input are journaled once. A request journaled for an input
+    field replaces that field's earlier pending request: only the latest
+    draft of a text box is worth replaying.
+    """
+    
+    def __init__(self, filename="translation_journal.db"):
+        self.filename = filename
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(self.filename, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=FULL")
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS pending (
+                id INTEGER PRIMARY KEY,
+                source_text TEXT NOT NULL,
+                source_language TEXT NOT NULL,
+                target_language TEXT NOT NULL,
+                created REAL NOT NULL,
+                field TEXT,
+                UNIQUE (source_text, source_language, target_language)
+            )
+        """)
+        columns = {row[1] for row in self.conn.execute("PRAGMA table_info(pending)")}
+        if "field" not in columns:
+            self.conn.execute("ALTER TABLE pending ADD COLUMN field TEXT")
+        self.conn.commit()
+        self._fields = self._pending_fields()
+    
+    def _pending_fields(self):
+        return {row[0] for row in self.conn.execute(
+            "SELECT DISTINCT field FROM pending WHERE field IS NOT NULL")}
+    
+    def append(self, text, source_lang, target_lang, field=None):
+        """Journal a request, replacing the field's previous one; False if already pending
+        
+        A request that is already pending keeps its place in the queue but
+        takes the new field, so discarding that field later still drops it.
+        """
+        key = (text, source_lang, target_lang)
+        with self._lock, self.conn:
+            pending = self.conn.execute(
+                "SELECT 1 FROM pending WHERE source_text = ? AND source_language = ? AND target_language = ?",
+                key).fetchone()
+            if field is not None:
+                self.conn.execute(
+                    "DELETE FROM pending WHERE field = ? AND NOT "
+                    "(source_text = ? AND source_language = ? AND target_language = ?)", (field, *key))
+            self.conn.execute(
+                "INSERT INTO pending "
+                "(source_text, source_language, target_language, created, field) VALUES (?, ?, ?, ?, ?) "
+                "ON CONFLICT (source_text, source_language, target_language) DO UPDATE SET field = excluded.field",
+                (*key, time.time(), field))
+            self._fields = self._pending_fields()
+        return pending is None
+    
+    def discard(self, field):
+        """Drop the field's pending request, e.g. once newer input has translated"""
+        if field not in self._fields:
+            return
+        with self._lock, self.conn:
+            self.conn.execute("DELETE FROM pending WHERE field = ?", (field,))
+            self._fields = self._pending_fields()
+    
+    def count(self):
+        with self._lock:
+            return self.conn.execute("SELECT COUNT(*) FROM pending").fetchone()[0]
+    
+    def next_batch(self, limit=50):
+        """Oldest pending language pair: (source, target, [(id, text)]), or None"""
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT source_language, target_language FROM pending ORDER BY id LIMIT 1").fetchone()
+            if row is None:
+                return None
+            items = self.conn.execute(
+                "SELECT id, source_text FROM pending WHERE source_language = ? AND target_language = ? "
+                "ORDER BY id LIMIT ?", (row[0], row[1], limit)).fetchall()
+        return row[0], row[1], items
+    
+    def remove(self, ids):
+        with self._lock, self.conn:
+            self.conn.executemany("DELETE FROM pending WHERE id = ?", [(i,) for i in ids])
+            self._fields = self._pending_fields()
+    
+    def close(self):
+        with self._lock:
+            self.conn.close()
+
+class JournalReplayer:
+    """Background thread replaying journaled requests once the backend recovers
+    
+    Each round takes the oldest language pair's pending texts as one batch
+    and sends it through the worker pool, whose circuit breaker decides when
+    a probe is allowed. Successful batches are removed from the journal and
+    handed to on_results([(text, translated, source, target)]).
+    """
+    
+    def __init__(self, journal, pool, on_results, batch_size=50, poll_interval=0.5):
+        self.journal = journal
+        self.pool = pool
+        self.on_results = on_results
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self.stats = {"replayed": 0, "batches": 0, "failed_batches": 0}
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+    
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="journal-replay", daemon=True)
+        self._thread.start()
+    
+    def stop(self):
+        self._stop.set()
+        self._wake.set()
+    
+    def notify(self):
+        """Wake the replayer after new requests were journaled"""
+        self._wake.set()
+    
+    def replay_once(self):
+        """Replay one batch; returns the number of requests recovered"""
+        batch = self.journal.next_batch(self.batch_size)
+        if batch is None:
+            return 0
+        source_lang, target_lang, items = batch
+        try:
+            results = self.pool.translate_batch([text for _, text in items], src=source_lang,
+                                                dest=target_lang)
+        except Exception:
+            self.stats["failed_batches"] += 1
+            raise
+        self.journal.remove([entry_id for entry_id, _ in items])
+        self.stats["batches"] += 1
+        self.stats["replayed"] += len(items)
+        METRICS.count("journal_replayed", len(items))
+        self.on_results([(text, result.text, getattr(result, "src", source_lang), target_lang)
+                         for (_, text), result in zip(items, results)])
+        return len(items)
+    
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                if self.replay_once():
+                    continue
+                delay = self.poll_interval
+            except Exception:
+                breaker = self.pool.breaker
+                delay = max(self.poll_interval, breaker.retry_after() if breaker else 0.0)
+            self._wake.wait(delay)
+            self._wake.clear()
+
+class AudioRingBuffer:
+    """Fixed-size ring buffer of int16 samples shared by capture and segmentation
+    
+    Positions are absolute sample counts, so a slow reader can tell when the
+    writer has lapped it; the overwritten audio is skipped and counted in
+    `overruns` instead of blocking the capture thread.
+    """
+    
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.written = 0
+        self.overruns = 0
+        self.closed = False
+        self._data = np.zeros(capacity, dtype=np.int16)
+        self._cond = threading.Condition()
+    
+    def write(self, samples):
+        with self._cond:
+            total = len(samples)
+            samples = samples[-self.capacity:]
+            start = (self.written + total - len(samples)) % self.capacity
+            first = min(len(samples), self.capacity - start)
+            self._data[start:start + first] = samples[:first]
+            self._data[:len(samples) - first] = samples[first:]
+            self.written += total
+            self._cond.notify_all()
+    
+    def read(self, position, timeout=None):
+        """Return (samples, new_position) written since position, or None once closed and drained"""
+        with self._cond:
+            self._cond.wait_for(lambda: self.written > position or self.closed, timeout)
+            if self.written == position:
+                return None if self.closed else (self._data[:0], position)
+            if self.written - position > self.capacity:
+                self.overruns += self.written - self.capacity - position
+                position = self.written - self.capacity
+            start = position % self.capacity
+            count = self.written - position
+            first = min(count, self.capacity - start)
+            samples = np.concatenate((self._data[start:start + first], self._data[:count - first]))
+            return samples, self.written
+    
+    def close(self):
+        with self._cond:
+            self.closed = True
+            self._cond.notify_all()
+
+class MicrophoneSource:
+    """One persistent 16-bit mono PyAudio input stream"""
+    
+    def __init__(self, rate=16000, frame_ms=30, device_index=None):
+        self.rate = rate
+        self.frame_samples = rate * frame_ms // 1000
+        self.device_index = device_index
+        self._audio = None
+        self._stream = None
+    
+    def open(self):
+        self._audio = pyaudio.PyAudio()
+        self._stream = self._audio.open(format=pyaudio.paInt16, channels=1, rate=self.rate,
+                                        input=True, frames_per_buffer=self.frame_samples,
+                                        input_device_index=self.device_index)
+    
+    def read(self):
+        """Return the next block of samples"""
+        data = self._stream.read(self.frame_samples, exception_on_overflow=False)
+        return np.frombuffer(data, dtype=np.int16)
+    
+    def close(self):
+        if self._stream is not None:
+            self._stream.stop_stream()
+            self._stream.close()
+        if self._audio is not None:
+            self._audio.terminate()
+
+class WavFileSource:
+    """Feed a 16-bit WAV file through the pipeline as if it were a microphone"""
+    
+    def __init__(self, path, frame_ms=30, realtime=False):
+        self.path = path
+        self.frame_ms = frame_ms
+        self.realtime = realtime
+        self._wav = None
+    
+    def open(self):
+        self._wav = wave.open(self.path, 'rb')
+        if self._wav.getsampwidth() != 2:
+            raise ValueError(f"{self.path}: only 16-bit PCM WAV files are supported")
+        self.rate = self._wav.getframerate()
+        self.channels = self._wav.getnchannels()
+        self.frame_samples = self.rate * self.frame_ms // 1000
+    
+    def read(self):
+        """Return the next block of mono samples, or None at end of file"""
+        data = self._wav.readframes(self.frame_samples)
+        if not data:
+            return None
+        samples = np.frombuffer(data, dtype=np.int16)
+        if self.channels > 1:
+            samples = samples.reshape(-1, self.channels).mean(axis=1).astype(np.int16)
+        if self.realtime:
+            time.sleep(len(samples) / self.rate)
+        return samples
+    
+    def close(self):
+        if self._wav is not None:
+            self._wav.close()
+
+class EnergyVAD:
+    """Energy-based voice activity detection that cuts audio into utterances
+    
+    Frame energies are computed for a whole block at once with NumPy. The
+    speech threshold is a multiple of a noise floor that keeps adapting
+    during pauses, so there is no one-off calibration step.
+    """
+    
+    def __init__(self, rate, frame_ms=10, threshold_ratio=3.0, min_energy=200.0,
+                 silence_ms=600, min_speech_ms=200, pre_roll_ms=300, max_utterance_s=15,
+                 noise_adapt=0.05):
+        self.rate = rate
+        self.frame_len = rate * frame_ms // 1000
+        self.threshold_ratio = threshold_ratio
+        self.min_energy = min_energy
+        self.silence_frames = silence_ms // frame_ms
+        self.min_speech_frames = min_speech_ms // frame_ms
+        self.max_frames = int(max_utterance_s * 1000 // frame_ms)
+        self.noise_adapt = noise_adapt
+        self.noise_floor = None
+        self.position = 0  # Samples consumed, for utterance timestamps
+        self._leftover = np.zeros(0, dtype=np.int16)
+        self._pre_roll = deque(maxlen=pre_roll_ms // frame_ms)
+        self._frames = []
+        self._speech_frames = 0
+        self._silence = 0
+        self._start = 0
+    
+    @property
+    def in_speech(self):
+        return bool(self._frames)
+    
+    def frame_energies(self, samples):
+        """RMS energy of each complete frame, vectorised"""
+        usable = len(samples) - len(samples) % self.frame_len
+        frames = samples[:usable].reshape(-1, self.frame_len)
+        squared = np.square(frames, dtype=np.float32)
+        return frames, np.sqrt(squared.mean(axis=1))
+    
+    def threshold(self):
+        floor = self.noise_floor if self.noise_floor is not None else self.min_energy
+        return max(self.min_energy, floor * self.threshold_ratio)
+    
+    def feed(self, samples):
+        """Consume samples; return a list of (start_seconds, utterance samples)"""
+        samples = np.concatenate((self._leftover, samples))
+        frames, energies = self.frame_energies(samples)
+        self._leftover = samples[len(frames) * self.frame_len:]
+        
+        utterances = []
+        threshold = self.threshold()
+        for frame, energy in zip(frames, energies):
+            frame_start = self.position
+            self.position += self.frame_len
+            if energy > threshold:
+                if not self._frames:
+                    self._start = frame_start - len(self._pre_roll) * self.frame_len
+                    self._frames.extend(self._pre_roll)
+                    self._pre_roll.clear()
+                self._frames.append(frame)
+                self._speech_frames += 1
+                self._silence = 0
+            elif self._frames:
+                self._frames.append(frame)
+                self._silence += 1
+                if self._silence >= self.silence_frames:
+                    utterances.extend(self._finish())
+            else:
+                self._pre_roll.append(frame)
+                self.noise_floor = energy if self.noise_floor is None else (
+                    (1 - self.noise_adapt) * self.noise_floor + self.noise_adapt * energy)
+                threshold = self.threshold()
+            if len(self._frames) >= self.max_frames:
+                utterances.extend(self._finish())
+        return utterances
+    
+    def current_utterance(self):
+        """Samples of the utterance in progress (empty when not in speech)"""
+        return np.concatenate(self._frames) if self._frames else np.zeros(0, dtype=np.int16)
+    
+    def _finish(self):
+        frames, speech = self._frames, self._speech_frames
+        self._frames, self._speech_frames, self._silence = [], 0, 0
+        if speech < self.min_speech_frames:
+            return []
+        return [(self._start / self.rate, np.concatenate(frames))]
+    
+    def flush(self):
+        """Return any utterance still in progress"""
+        return self._finish() if self._frames else []
+
+class AudioPreprocessor:
+    """Vectorised clean-up of an utterance before it is sent to the recognizer
+    
+    Downmixes to mono, resamples to `target_rate` (the rate recognizers
+    expect; lower rates are left alone) through a windowed-sinc low-pass,
+    attenuates frames whose energy stays near the utterance's noise floor
+    and trims leading and trailing silence, so fewer and cleaner bytes are
+    recognised. With compress=True the result is also packed with a
+    lossless delta + deflate codec, for storing or forwarding clips.
+    """
+    
+    FILTER_TAPS = 63
+    
+    def __init__(self, target_rate=16000, frame_ms=10, gate_ratio=2.0, gate_attenuation=0.1,
+                 min_energy=100.0, noise_percentile=10, padding_ms=150, compress=False):
+        self.target_rate = target_rate
+        self.frame_ms = frame_ms
+        self.gate_ratio = gate_ratio
+        self.gate_attenuation = gate_attenuation
+        self.min_energy = min_energy
+        self.noise_percentile = noise_percentile
+        self.padding_ms = padding_ms
+        self.compress = compress
+        self.stats = {"utterances": 0, "input_seconds": 0.0, "output_seconds": 0.0,
+                      "input_bytes": 0, "output_bytes": 0, "compressed_bytes": 0,
+                      "processing_seconds": 0.0}
+        self._lock = threading.Lock()
+    
+    def resample(self, audio, rate):
+        """Low-pass and resample float audio down to target_rate"""
+        if rate <= self.target_rate or len(audio) == 0:
+            return audio, rate
+        ratio = self.target_rate / rate
+        taps = np.arange(self.FILTER_TAPS) - self.FILTER_TAPS // 2
+        kernel = np.sinc(ratio * taps) * np.hamming(self.FILTER_TAPS)
+        filtered = np.convolve(audio, kernel / kernel.sum(), mode='same')
+        if rate % self.target_rate == 0:
+            return filtered[::rate // self.target_rate], self.target_rate
+        positions = np.arange(int(len(audio) * ratio)) / ratio
+        return np.interp(positions, np.arange(len(audio)), filtered), self.target_rate
+    
+    def gate(self, audio, rate):
+        """Attenuate noise-only frames and trim silence at both ends"""
+        frame = max(1, rate * self.frame_ms // 1000)
+        count = len(audio) // frame
+        if count == 0:
+            return audio
+        frames = audio[:count * frame].reshape(count, frame)
+        energies = np.sqrt(np.mean(np.square(frames), axis=1))
+        threshold = max(self.min_energy,
+                        np.percentile(energies, self.noise_percentile) * self.gate_ratio)
+        speech = energies > threshold
+        if not speech.any():
+            return audio[:0]
+        
+        # Keep the gate open for padding_ms around speech so word edges survive
+        padding = max(1, self.padding_ms // self.frame_ms)
+        speech = np.convolve(speech, np.ones(2 * padding + 1), mode='same') > 0
+        first = int(np.argmax(speech))
+        last = count - int(np.argmax(speech[::-1]))
+        
+        gains = np.where(speech, 1.0, self.gate_attenuation)
+        centers = (np.arange(count) + 0.5) * frame
+        positions = np.arange(first * frame, last * frame if last < count else len(audio))
+        return audio[positions] * np.interp(positions, centers, gains)
+    
+    @staticmethod
+    def encode(samples):
+        """Lossless delta + byte-plane + deflate encoding of int16 samples"""
+        deltas = np.diff(samples.astype(np.int16), prepend=np.int16(0))
+        planes = deltas.view(np.uint8).reshape(-1, 2).T
+        return zlib.compress(planes.tobytes(), 6)
+    
+    @staticmethod
+    def decode(data):
+        """Inverse of encode"""
+        planes = np.frombuffer(zlib.decompress(data), dtype=np.uint8).reshape(2, -1)
+        deltas = np.ascontiguousarray(planes.T).view(np.int16).ravel()
+        return np.cumsum(deltas, dtype=np.int16)
+    
+    def process(self, samples, rate):
+        """Return (int16 samples, rate) ready for recognition; may be empty"""
+        started = time.perf_counter()
+        samples = np.asarray(samples)
+        input_bytes = samples.size * 2
+        input_seconds = len(samples) / rate
+        audio = samples.astype(np.float32)
+        if audio.ndim == 2:
+            audio = audio.mean(axis=1)
+        audio, rate = self.resample(audio, rate)
+        audio = self.gate(audio, rate)
+        output = np.clip(np.round(audio), -32768, 32767).astype(np.int16)
+        compressed = len(self.encode(output)) if self.compress else 0
+        elapsed = time.perf_counter() - started
+        
+        METRICS.observe("preprocess", elapsed)
+        with self._lock:
+            self.stats["utterances"] += 1
+            self.stats["input_seconds"] += input_seconds
+            self.stats["output_seconds"] += len(output) / rate
+            self.stats["input_bytes"] += input_bytes
+            self.stats["output_bytes"] += output.size * 2
+            self.stats["compressed_bytes"] += compressed
+            self.stats["processing_seconds"] += elapsed
+        return output, rate
+    
+    def report(self):
+        """One-line summary of bytes saved and processing cost"""
+        with self._lock:
+            stats = dict(self.stats)
+        if not stats["input_bytes"]:
+            return "Preprocessing: no audio"
+        saved = 1 - stats["output_bytes"] / stats["input_bytes"]
+        line = (f"Preprocessing: {stats['utterances']} utterances, "
+                f"{stats['input_seconds']:.1f}s -> {stats['output_seconds']:.1f}s audio, "
+                f"{stats['input_bytes']} -> {stats['output_bytes']} bytes ({saved:.0%} saved)")
+        if stats["compressed_bytes"]:
+            line += f", {stats['compressed_bytes']} bytes compressed"
+        cost = stats["processing_seconds"] / max(stats["input_seconds"], 1e-9)
+        return line + f", {cost * 1000:.2f} ms per second of audio"
+
+def google_speech_recognizer(recognizer, language="en-US"):
+    """Build a recognize(samples, rate) callable backed by recognize_google"""
+    def recognize(samples, rate):
+        audio = sr.AudioData(samples.astype(np.int16).tobytes(), rate, 2)
+        try:
+            return recognizer.recognize_google(audio, language=language)
+        except sr.UnknownValueError:
+            return None  # Ignore unrecognized speech
+    return recognize
+
+def format_stage_timings(timings):
+    """One-line summary of per-stage speech timings"""
+    parts = []
+    if "capture" in timings:
+        parts.append(f"capture {timings['capture']:.1f}s")
+    for stage, label in (("prep", "prep"), ("asr", "ASR"), ("mt", "MT"), ("render", "render"), ("total", "total")):
+        if stage in timings:
+            parts.append(f"{label} {timings[stage] * 1000:.0f} ms")
+    return " | ".join(parts)
+
+class SpeechPipeline:
+    """Continuous capture, VAD segmentation and pooled recognition
+    
+    A capture thread keeps one input stream open and writes into a ring
+    buffer. A segmentation thread reads from the buffer, cuts utterances
+    with EnergyVAD and submits each one to a recognition thread pool, so
+    recognition of one utterance overlaps with capturing the next. Results
+    are delivered to on_text(text, timings) in utterance order.
+    
+    With on_partial set, the utterance still being spoken is recognized
+    every partial_interval seconds of new audio and the hypothesis is passed
+    to on_partial(text) until the final result for it arrives. An
+    AudioPreprocessor, if given, cleans each utterance on the recognizer
+    threads before it is recognized.
+    """
+    
+    def __init__(self, source, recognize, on_text, on_error=None, workers=2,
+                 buffer_seconds=30, vad_options=None, on_partial=None, partial_interval=1.0,
+                 preprocess=None):
+        self.source = source
+        self.recognize = recognize
+        self.preprocess = preprocess
+        self.on_text = on_text
+        self.on_partial = on_partial
+        self.partial_interval = partial_interval
+        self._partial_samples = 0
+        self._partial_pending = False
+        self.on_error = on_error or (lambda e: print(f"Voice recognition error: {e}"))
+        self.workers = workers
+        self.buffer_seconds = buffer_seconds
+        self.vad_options = vad_options or {}
+        self._stop = threading.Event()
+        self._threads = []
+        self._pool = None
+        self.buffer = None
+        self._results = {}
+        self._next_result = 0
+        self._submitted = 0
+        self._results_lock = threading.Lock()
+        self._done = threading.Event()
+    
+    def start(self):
+        self.source.open()
+        self.rate = self.source.rate
+        self.buffer = AudioRingBuffer(int(self.rate * self.buffer_seconds))
+        self.vad = EnergyVAD(self.rate, **self.vad_options)
+        self._pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="recognizer")
+        for target in (self._capture_loop, self._segment_loop):
+            thread = threading.Thread(target=target, daemon=True)
+            thread.start()
+            self._threads.append(thread)
+    
+    def stop(self):
+        self._stop.set()
+        if self.buffer is not None:
+            self.buffer.close()
+    
+    def wait(self, timeout=None):
+        """Wait until the source is exhausted and every utterance is recognized"""
+        return self._done.wait(timeout)
+    
+    def _capture_loop(self):
+        try:
+            while not self._stop.is_set():
+                samples = self.source.read()
+                if samples is None:
+                    break
+                self.buffer.write(samples)
+        except Exception as e:
+            self.on_error(e)
+        finally:
+            self.source.close()
+            self.buffer.close()
+    
+    def _segment_loop(self):
+        position = 0
+        while True:
+            chunk = self.buffer.read(position, timeout=0.5)
+            if chunk is None:
+                break
+            samples, position = chunk
+            for start, utterance in self.vad.feed(samples):
+                self._submit(start, utterance)
+            if self.on_partial is not None and self.vad.in_speech:
+                self._submit_partial()
+        for start, utterance in self.vad.flush():
+            self._submit(start, utterance)
+        
+        self._pool.shutdown(wait=True)
+        self._done.set()
+    
+    def _timed_recognize(self, samples):
+        """Return (text, preprocessing seconds, recognition seconds)"""
+        started = time.perf_counter()
+        rate = self.rate
+        if self.preprocess is not None:
+            samples, rate = self.preprocess.process(samples, rate)
+        preprocessed = time.perf_counter()
+        text = self.recognize(samples, rate) if len(samples) else None
+        return text, preprocessed - started, time.perf_counter() - preprocessed
+    
+    def _submit(self, start, utterance):
+        index = self._submitted
+        self._submitted += 1
+        self._partial_samples = 0
+        timings = {"start": start, "capture": len(utterance) / self.rate,
+                   "endpointed": time.perf_counter()}
+        future = self._pool.submit(self._timed_recognize, utterance)
+        future.add_done_callback(lambda f: self._deliver(index, timings, f))
+    
+    def _submit_partial(self):
+        """Recognize the utterance in progress if enough new audio has arrived"""
+        utterance = self.vad.current_utterance()
+        if self._partial_pending or len(utterance) - self._partial_samples < self.partial_interval * self.rate:
+            return
+        self._partial_samples = len(utterance)
+        self._partial_pending = True
+        index = self._submitted
+        future = self._pool.submit(self._timed_recognize, utterance)
+        future.add_done_callback(lambda f: self._deliver_partial(index, f))
+    
+    def _deliver_partial(self, index, future):
+        self._partial_pending = False
+        try:
+            text, _, _ = future.result()
+        except Exception:
+            return  # A failed partial is simply skipped
+        with self._results_lock:
+            # Drop hypotheses that arrive after their utterance's final result
+            if text and index >= self._next_result and index not in self._results:
+                self.on_partial(text)
+    
+    def _deliver(self, index, timings, future):
+        """Hand results to on_text in utterance order"""
+        with self._results_lock:
+            self._results[index] = (timings, future)
+            while self._next_result in self._results:
+                timings, future = self._results.pop(self._next_result)
+                self._next_result += 1
+                try:
+                    text, timings["prep"], timings["asr"] = future.result()
+                except Exception as e:
+                    self.on_error(e)
+                    continue
+                if text:
+                    self.on_text(text, timings)
+
+class SpeechSynthesizer:
+    """Pipelined, interruptible text-to-speech
+    
+    Text is split into sentences. A synthesis thread renders each sentence
+    to an audio buffer with pyttsx3.save_to_file while a playback thread
+    plays the previous one through PyAudio, so at most one sentence of
+    synthesis latency is ever audible. speak(..., interrupt=True) bumps a
+    generation counter: queued sentences from older requests are dropped
+    and playback stops within one audio block. Rendered sentences are kept
+    in a byte-bounded LRU cache. Without PyAudio, or when a probe at startup
+    shows the driver cannot render to a file, sentences are spoken directly
+    with say/runAndWait, and an interrupt stops the engine mid-sentence.
+    """
+    
+    BLOCK_SECONDS = 0.05
+    
+    def __init__(self, rate=180, volume=1.0, cache_bytes=16 * 1024 * 1024, on_error=None):
+        self.rate = rate
+        self.volume = volume
+        self.cache_bytes = cache_bytes
+        self.on_error = on_error or (lambda e: print(f"TTS error: {e}"))
+        self.generation = 0
+        self.direct = False
+        self.engine = None
+        self._speaking = False  # Direct mode: runAndWait is playing a sentence
+        self.cache = OrderedDict()  # chunk text -> (rate, width, channels, frames)
+        self._cached_bytes = 0
+        self._lock = threading.Lock()
+        self._chunks = queue.Queue()         # (generation, text, requested_at or None)
+        self._audio = queue.Queue(maxsize=1)  # Rendered chunk waiting for playback
+        self.stats = {"requests": 0, "chunks": 0, "cache_hits": 0, "interrupted": 0, "dropped": 0}
+        self.first_audio_latencies = deque(maxlen=200)
+        
+        threading.Thread(target=self._synthesis_loop, name="tts-synthesis", daemon=True).start()
+        threading.Thread(target=self._playback_loop, name="tts-playback", daemon=True).start()
+    
+    def speak(self, text, interrupt=False):
+        """Queue text for speech, optionally cutting off anything older"""
+        chunks = [segment for segment, _ in split_segments(text.strip())]
+        with self._lock:
+            if interrupt:
+                self._interrupt()
+            generation = self.generation
+            self.stats["requests"] += 1
+        requested = time.perf_counter()
+        for i, chunk in enumerate(chunks):
+            self._chunks.put((generation, chunk, requested if i == 0 else None))
+    
+    def flush(self):
+        """Stop speaking and drop everything queued"""
+        with self._lock:
+            self._interrupt()
+    
+    def _interrupt(self):
+        self.generation += 1
+        self.stats["interrupted"] += 1
+        for pending in (self._chunks, self._audio):
+            while True:
+                try:
+                    pending.get_nowait()
+                except queue.Empty:
+                    break
+                self.stats["dropped"] += 1
+        if self._speaking:
+            self.engine.stop()
+    
+    def _is_current(self, generation):
+        return generation == self.generation
+    
+    def _init_engine(self):
+        with startup_timer("text-to-speech"):
+            self.engine = pyttsx3.init()
+        # Voice settings
+        self.engine.setProperty('rate', self.rate)
+        self.engine.setProperty('volume', self.volume)
+        self.direct = importlib.util.find_spec("pyaudio") is None or not self._can_render()
+    
+    def _can_render(self):
+        """Probe once whether the driver can render speech to a WAV file"""
+        try:
+            return bool(self._synthesize("test")[3])
+        except Exception:
+            return False
+    
+    def _synthesize(self, text):
+        """Render text through a temporary WAV file to (rate, width, channels, frames)"""
+        handle, path = tempfile.mkstemp(suffix=".wav")
+        os.close(handle)
+        try:
+            self.engine.save_to_file(text, path)
+            self.engine.runAndWait()
+            with wave.open(path, 'rb') as wav:
+                return (wav.getframerate(), wav.getsampwidth(), wav.getnchannels(),
+                        wav.readframes(wav.getnframes()))
+        finally:
+            os.remove(path)
+    
+    def _render(self, text):
+        """Synthesize one chunk to (rate, width, channels, frames), using the cache"""
+        with self._lock:
+            audio = self.cache.get(text)
+            if audio is not None:
+                self.cache.move_to_end(text)
+                self.stats["cache_hits"] += 1
+                return audio
+        
+        audio = self._synthesize(text)
+        with self._lock:
+            self.cache[text] = audio
+            self._cached_bytes += len(audio[3])
+            while self._cached_bytes > self.cache_bytes and len(self.cache) > 1:
+                _, evicted = self.cache.popitem(last=False)
+                self._cached_bytes -= len(evicted[3])
+        return audio
+    
+    def _synthesis_loop(self):
+        try:
+            self._init_engine()
+        except Exception as e:
+            self.on_error(e)
+            return
+        
+        while True:
+            generation, text, requested = self._chunks.get()
+            if not self._is_current(generation):
+                continue
+            # A failed chunk is reported and skipped; the mode chosen at startup stays
+            try:
+                if self.direct:
+                    if requested is not None:
+                        self.first_audio_latencies.append(time.perf_counter() - requested)
+                    with self._lock:
+                        if not self._is_current(generation):
+                            continue
+                        self.engine.say(text)
+                        self._speaking = True
+                    try:
+                        self.engine.runAndWait()
+                    finally:
+                        self._speaking = False
+                else:
+                    self._audio.put((generation, self._render(text), requested))
+                self.stats["chunks"] += 1
+            except Exception as e:
+                self.on_error(e)
+    
+    def _playback_loop(self):
+        player = None
+        stream, stream_format = None, None
+        while True:
+            generation, (rate, width, channels, frames), requested = self._audio.get()
+            if not self._is_current(generation):
+                continue
+            try:
+                if player is None:
+                    player = pyaudio.PyAudio()
+                if stream_format != (rate, width, channels):
+                    if stream is not None:
+                        stream.close()
+                    stream = player.open(format=player.get_format_from_width(width),
+                                         channels=channels, rate=rate, output=True)
+                    stream_format = (rate, width, channels)
+                
+                block = int(rate * self.BLOCK_SECONDS) * width * channels
+                for offset in range(0, len(frames), block):
+                    if not self._is_current(generation):
+                        break
+                    stream.write(frames[offset:offset + block])
+                    if requested is not None:
+                        self.first_audio_latencies.append(time.perf_counter() - requested)
+                        requested = None
+            except Exception as e:
+                self.on_error(e)
+    
+    def get_stats(self):
+        """Counters plus median and worst time-to-first-audio in seconds"""
+        with self._lock:
+            stats = dict(self.stats, cached_chunks=len(self.cache), cached_bytes=self._cached_bytes)
+        latencies = sorted(self.first_audio_latencies)
+        if latencies:
+            stats["first_audio_p50"] = latencies[len(latencies) // 2]
+            stats["first_audio_max"] = latencies[-1]
+        return stats
+
+class MicroBatcher:
+    """Coalesce concurrent translation requests into backend batch calls
+    
+    Requests wait at most `max_wait` seconds (or until `max_batch` are
+    queued), are grouped by language pair and answered from the cache where
+    possible; the remaining texts of each pair go to the backend in one
+    translate_batch call on a worker thread.
+    """
+    
+    def __init__(self, translator, cache=None, max_batch=64, max_wait=0.01, workers=4):
+        self.translator = translator
+        self.cache = cache
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="service-batch")
+        self.queue = None  # Created on the service's event loop
+        self.stats = {"requests": 0, "batches": 0, "backend_calls": 0, "cache_hits": 0}
+    
+    async def translate(self, text, source_lang, target_lang):
+        """Return (translated text, source language, cached) for one request"""
+        future = asyncio.get_running_loop().create_future()
+        self.stats["requests"] += 1
+        await self.queue.put((text, source_lang, target_lang, future))
+        return await future
+    
+    async def run(self):
+        self.queue = asyncio.Queue()
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self.queue.get()]
+            deadline = loop.time() + self.max_wait
+            while len(batch) < self.max_batch:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self.queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            self.stats["batches"] += 1
+            METRICS.count("service_batches")
+            
+            groups = OrderedDict()
+            for request in batch:
+                groups.setdefault((request[1], request[2]), []).append(request)
+            for (source_lang, target_lang), requests in groups.items():
+                loop.create_task(self._translate_group(source_lang, target_lang, requests))
+    
+    def _lookup(self, texts, source_lang, target_lang):
+        """Executor thread: cached translation (or None) per text"""
+        if self.cache is None:
+            return [None] * len(texts)
+        return [self.cache.get(text, source_lang, target_lang) for text in texts]
+    
+    async def _translate_group(self, source_lang, target_lang, requests):
+        # Cache reads and writes hit SQLite, so they stay off the event loop too
+        loop = asyncio.get_running_loop()
+        lookups = await loop.run_in_executor(self.executor, self._lookup,
+                                             [request[0] for request in requests], source_lang, target_lang)
+        pending = []
+        for request, cached in zip(requests, lookups):
+            future = request[3]
+            if cached is not None:
+                self.stats["cache_hits"] += 1
+                if not future.done():
+                    future.set_result((cached, source_lang, True))
+            else:
+                pending.append(request)
+        if not pending:
+            return
+        
+        texts = list(OrderedDict.fromkeys(request[0] for request in pending))
+        self.stats["backend_calls"] += 1
+        try:
+            results = await loop.run_in_executor(
+                self.executor, self.translator.translate_batch, texts, source_lang, target_lang)
+        except Exception as e:
+            for request in pending:
+                if not request[3].done():
+                    request[3].set_exception(e)
+            return
+        
+        by_text = dict(zip(texts, results))
+        if self.cache is not None:
+            loop.run_in_executor(self.executor, self.cache.put_many,
+                                 [(text, source_lang, target_lang, result.text)
+                                  for text, result in by_text.items()])
+        for text, _, _, future in pending:
+            result = by_text[text]
+            if not future.done():
+                future.set_result((result.text, getattr(result, "src", source_lang), False))
+
+class HTTPError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+class TranslationService:
+    """Local HTTP and WebSocket front-end to one shared translation pipeline
+    
+    The backend, worker pool, cache, history and language detector are
+    created once and shared by every client, and concurrent requests are
+    micro-batched into backend calls. Plain asyncio streams are used, so no
+    web framework is needed:
     
-    def __init__(self):
-        self.model = None
-        self.setup_model()
+        GET  /health                   status and batching statistics
+        GET  /metrics                  Prometheus text metrics
+        POST /detect                   {"text"}
+        POST /translate                {"text", "target", "source"}
+        POST /translate/batch          {"texts", "target", "source"}
+        GET  /ws                       WebSocket; one JSON request per message
+    """
     
-    def setup_model(self):
-        """Setup a simple language detection model"""
-        training_texts = [
-            ("Hello how are you today", "en"),         # English
-    ("Bonjour comment allez-vous", "fr"),      # French
-    ("Hola como estas hoy", "es"),             # Spanish
-    ("Hallo wie geht es dir", "de"),           # German
-    ("Ciao come stai oggi", "it"),             # Italian
-    ("Olá como você está", "pt"),              # Portuguese
-    ("Привет как дела", "ru"),                 # Russian
-    ("こんにちは元気ですか", "ja"),            # Japanese
-    ("你好吗今天", "zh"),                        # Chinese (Simplified)
-    ("안녕하세요 어떻게 지내세요", "ko"),          # Korean
-    ("नमस्ते आप कैसे हैं", "hi"),               # Hindi
-    ("ہیلو آپ کیسے ہیں", "ur"),                  # Urdu
-    ("مرحبًا كيف حالك اليوم", "ar"),             # Arabic
-    ("হ্যালো আপনি কেমন আছেন", "bn"),           # Bengali
-    ("ਸਤ ਸ੍ਰੀ ਅਕਾਲ ਤੁਸੀਂ ਕਿਵੇਂ ਹੋ", "pa"),       # Punjabi
-    ("ഹലോ നിങ്ങൾ ഇന്ന് എങ്ങിനെയാണ്", "ml"),     # Malayalam
-    ("வணக்கம் இன்று எப்படி இருக்கிறீர்கள்", "ta"), # Tamil
-    ("హలో మీరు ఈరోజు ఎలా ఉన్నారు", "te"),         # Telugu
-    ("ನಮಸ್ಕಾರ ನೀವು ಇವತ್ತು ಹೇಗಿದ್ದೀರಿ", "kn"),     # Kannada
-    ("สวัสดีวันนี้คุณเป็นอย่างไรบ้าง", "th"),     # Thai
-    ("Xin chào hôm nay bạn thế nào", "vi"),     # Vietnamese
-    ("Halo apa kabar hari ini", "id"),          # Indonesian
-    ("Salam, bugünkü halınız necədir?", "az"),  # Azerbaijani
-    ("Salom, bugun qalaysiz?", "uz"),           # Uzbek
-        ]
-        
-        texts, labels = zip(*training_texts)
+    WEBSOCKET_GUID = "258EAFA5-E914-47DA-95CA-C5AB0DC85B11"
+    MAX_BODY = 1 << 20
+    STATUS_TEXT = {101: "Switching Protocols", 200: "OK", 400: "Bad Request", 404: "Not Found",
+                   405: "Method Not Allowed", 413: "Payload Too Large", 502: "Bad Gateway"}
+    
+    def __init__(self, backend="google", host="127.0.0.1", port=8765, workers=4, rate=10.0,
+                 max_batch=64, max_wait=0.01):
+        self.host = host
+        self.port = port
+        self.backend_name = backend
+        self.started = time.time()
+        with startup_timer("translation backend"):
+            self.pool = TranslationWorkerPool(create_backend(backend), workers=workers,
+                                              rate=rate, burst=max(rate, max_batch))
+        with startup_timer("history"):
+            self.history = TranslationHistory()
+        with startup_timer("translation cache"):
+            self.cache = TranslationCache()
+            self.cache.warm_from_history(self.history)
+        with startup_timer("language detector"):
+            self.detector = LanguageDetector()
+        self.batcher = MicroBatcher(self.pool, self.cache, max_batch=max_batch, max_wait=max_wait,
+                                    workers=workers)
+        self.connections = 0
+    
+    async def serve(self):
+        batcher = asyncio.get_running_loop().create_task(self.batcher.run())
+        server = await asyncio.start_server(self.handle_connection, self.host, self.port)
+        print(f"Serving on http://{self.host}:{self.port} (WebSocket at /ws)")
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            batcher.cancel()
+            self.history.close()
+            self.cache.close()
+    
+    def parse_request(self, payload):
+        """Validate a translation request, returning (text, source, target, record)"""
+        text = self.parse_text(payload.get("text"), "'text'")
+        return text, *self.parse_languages(payload), not payload.get("partial", False)
+    
+    def parse_text(self, text, name):
+        if not isinstance(text, str) or not text.strip():
+            raise HTTPError(400, f"{name} must be a non-empty string")
+        return text
+    
+    def parse_languages(self, payload):
+        source = payload.get("source", "auto")
+        target = payload.get("target", "en")
+        if target not in LANGUAGES:
+            raise HTTPError(400, f"Unsupported target language: {target}")
+        if source != "auto" and source not in LANGUAGES:
+            raise HTTPError(400, f"Unsupported source language: {source}")
+        return source, target
+    
+    async def translate_one(self, text, source, target, record=True):
+        """Detect if needed, translate through the batcher and record the result"""
+        if source == "auto":
+            detected, confidence = await asyncio.get_running_loop().run_in_executor(
+                self.batcher.executor, self.detector.detect_with_confidence, text)
+            # Leave uncertain guesses to the backend's own detection
+            if confidence >= self.detector.min_confidence:
+                source = detected
+        try:
+            translated, source, cached = await self.batcher.translate(text, source, target)
+        except Exception as e:
+            raise HTTPError(502, f"Translation failed: {e}")
+        if record:
+            self.history.add_translation(text, translated, source, target)
+        return {"text": text, "translation": translated, "source": source, "target": target,
+                "cached": cached}
+    
+    async def route(self, method, path, body):
+        """Return (status, content type, body bytes) for an HTTP request"""
+        path = path.split("?", 1)[0]
+        if path == "/health" and method == "GET":
+            payload = {"status": "ok", "backend": self.backend_name,
+                       "uptime": time.time() - self.started, "connections": self.connections,
+                       "batcher": self.batcher.stats, "pool": self.pool.stats,
+                       "cache": self.cache.get_stats()}
+        elif path == "/metrics" and method == "GET":
+            return 200, "text/plain; version=0.0.4", METRICS.to_prometheus().encode('utf-8')
+        elif path in ("/detect", "/translate", "/translate/batch"):
+            if method != "POST":
+                raise HTTPError(405, "Use POST")
+            try:
+                request = json.loads(body or b"{}")
+            except ValueError:
+                raise HTTPError(400, "Body must be JSON")
+            if not isinstance(request, dict):
+                raise HTTPError(400, "Body must be a JSON object")
+            if path == "/detect":
+                text = self.parse_request(request)[0]
+                language, confidence = await asyncio.get_running_loop().run_in_executor(
+                    self.batcher.executor, self.detector.detect_with_confidence, text)
+                payload = {"language": language, "confidence": confidence}
+            elif path == "/translate":
+                payload = await self.translate_one(*self.parse_request(request))
+            else:
+                texts = request.get("texts")
+                if not isinstance(texts, list):
+                    raise HTTPError(400, "'texts' must be a list of strings")
+                texts = [self.parse_text(text, f"'texts'[{index}]") for index, text in enumerate(texts)]
+                source, target = self.parse_languages(request)
+                payload = {"translations": await asyncio.gather(
+                    *(self.translate_one(text, source, target) for text in texts))}
+        else:
+            raise HTTPError(404, f"No route for {path}")
+        return 200, "application/json", json.dumps(payload, ensure_ascii=False).encode('utf-8')
+    
+    async def handle_connection(self, reader, writer):
+        self.connections += 1
+        try:
+            while True:
+                try:
+                    request_line = await reader.readline()
+                    if not request_line.strip():
+                        break
+                    try:
+                        method, path, _ = request_line.decode('latin-1').split()
+                    except ValueError:
+                        break
+                    headers = {}
+                    while True:
+                        line = await reader.readline()
+                        if line in (b"\r\n", b"\n", b""):
+                            break
+                        name, _, value = line.decode('latin-1').partition(":")
+                        headers[name.strip().lower()] = value.strip()
+                except (asyncio.LimitOverrunError, ValueError):
+                    # A line longer than the stream limit; the rest of it is unread
+                    METRICS.count("service_requests")
+                    await self.write_response(writer, 400, "application/json",
+                                              b'{"error": "Request line or header too long"}', False)
+                    break
+                
+                if path == "/ws" and headers.get("upgrade", "").lower() == "websocket":
+                    await self.handle_websocket(reader, writer, headers)
+                    return
+                
+                body_read = False
+                try:
+                    try:
+                        length = int(headers.get("content-length") or 0)
+                    except ValueError:
+                        length = -1
+                    if length < 0:
+                        raise HTTPError(400, "Invalid Content-Length header")
+                    if length > self.MAX_BODY:
+                        raise HTTPError(413, "Request body too large")
+                    body = await reader.readexactly(length) if length else b""
+                    body_read = True
+                    status, content_type, data = await self.route(method, path, body)
+                except HTTPError as e:
+                    status, content_type = e.status, "application/json"
+                    data = json.dumps({"error": str(e)}).encode('utf-8')
+                METRICS.count("service_requests")
+                # Without the body the stream position is unknown, so the connection ends
+                keep_alive = headers.get("connection", "").lower() != "close" and body_read
+                await self.write_response(writer, status, content_type, data, keep_alive)
+                if not keep_alive:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            self.connections -= 1
+            writer.close()
+    
+    async def write_response(self, writer, status, content_type, data, keep_alive):
+        writer.write(
+            f"HTTP/1.1 {status} {self.STATUS_TEXT.get(status, '')}\r\n"
+            f"Content-Type: {content_type}\r\nContent-Length: {len(data)}\r\n"
+            f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n".encode('latin-1')
+            + data)
+        await writer.drain()
+    
+    def websocket_frame(self, opcode, data):
+        """Encode an unmasked server frame"""
+        if len(data) < 126:
+            header = struct.pack('!BB', 0x80 | opcode, len(data))
+        elif len(data) < 1 << 16:
+            header = struct.pack('!BBH', 0x80 | opcode, 126, len(data))
+        else:
+            header = struct.pack('!BBQ', 0x80 | opcode, 127, len(data))
+        return header + data
+    
+    async def read_websocket_frame(self, reader):
+        """Return (fin, opcode, payload) for one client frame"""
+        first, second = await reader.readexactly(2)
+        length = second & 0x7f
+        if length == 126:
+            length, = struct.unpack('!H', await reader.readexactly(2))
+        elif length == 127:
+            length, = struct.unpack('!Q', await reader.readexactly(8))
+        if length > self.MAX_BODY:
+            raise ConnectionError("WebSocket frame too large")
+        mask = await reader.readexactly(4) if second & 0x80 else None
+        payload = await reader.readexactly(length)
+        if mask:
+            # XOR the whole payload at once against the repeated mask
+            key = (mask * (length // 4 + 1))[:length]
+            payload = (int.from_bytes(payload, 'big') ^ int.from_bytes(key, 'big')).to_bytes(length, 'big')
+        return bool(first & 0x80), first & 0x0f, payload
+    
+    async def handle_websocket(self, reader, writer, headers):
+        """Stream typed or voice segments; each message gets its own reply
         
-        # Create pipeline with TF-IDF and Naive Bayes
-        self.model = Pipeline([
-            ('tfidf', TfidfVectorizer(analyzer='char', ngram_range=(1, 3))),
-            ('clf', MultinomialNB())
-        ])
+        Messages carry "id", "text", "target" and optionally "source",
+        "partial" (not recorded in history) and "field". Results for a field
+        that has since received a newer message are dropped, so a client
+        streaming keystrokes or voice partials only sees the latest.
+        """
+        key = headers.get("sec-websocket-key", "")
+        accept = base64.b64encode(hashlib.sha1((key + self.WEBSOCKET_GUID).encode('latin-1')).digest())
+        writer.write(b"HTTP/1.1 101 Switching Protocols\r\nUpgrade: websocket\r\n"
+                     b"Connection: Upgrade\r\nSec-WebSocket-Accept: " + accept + b"\r\n\r\n")
+        await writer.drain()
         
-        self.model.fit(texts, labels)
-    
-    def detect(self, text):
-        """Detect language of given text"""
-        if not text.strip():
-            return "en"  # Default to English
+        generations = {}
+        tasks = set()
         
+        async def reply(message, generation):
+            field = message.get("field")
+            try:
+                response = await self.translate_one(*self.parse_request(message))
+            except HTTPError as e:
+                response = {"error": str(e)}
+            if field is not None and generations.get(field) != generation:
+                METRICS.count("stale_results_dropped")
+                return
+            response.update(id=message.get("id"), field=field)
+            writer.write(self.websocket_frame(0x1, json.dumps(response, ensure_ascii=False).encode('utf-8')))
+            await writer.drain()
+        
+        fragments = []
         try:
-            prediction = self.model.predict([text])[0]
-            return prediction
-        except:
-            return "en"  # Fallback to English
+            while True:
+                fin, opcode, payload = await self.read_websocket_frame(reader)
+                if opcode == 0x8:
+                    writer.write(self.websocket_frame(0x8, payload[:2]))
+                    await writer.drain()
+                    return
+                if opcode == 0x9:
+                    writer.write(self.websocket_frame(0xA, payload))
+                    continue
+                if opcode in (0x0, 0x1):
+                    fragments.append(payload)
+                    if not fin:
+                        continue
+                    data, fragments = b"".join(fragments), []
+                    try:
+                        message = json.loads(data)
+                    except ValueError:
+                        writer.write(self.websocket_frame(0x1, b'{"error": "Messages must be JSON"}'))
+                        continue
+                    if not isinstance(message, dict):
+                        continue
+                    field = message.get("field")
+                    if field is not None:
+                        generations[field] = generations.get(field, 0) + 1
+                    task = asyncio.get_running_loop().create_task(reply(message, generations.get(field)))
+                    tasks.add(task)
+                    task.add_done_callback(tasks.discard)
+        finally:
+            for task in tasks:
+                task.cancel()
 
-class TranslationHistory:
-    """Manage translation history"""
+class UIDispatcher:
+    """Single queue of worker-to-UI callbacks, drained once per frame on the Tk thread
     
-    def __init__(self):
-        self.history = []
-        self.filename = "translation_history.json"
-        self.load_history()
+    Workers call post() instead of root.after(0, ...), so a burst of events
+    costs one timer per frame rather than one per event, and post_latest()
+    replaces a still-queued message with the same key (status text, voice
+    partials). A drain is only scheduled when something is posted to an
+    empty queue, so an idle app is not woken every frame. A separate
+    heartbeat every HEARTBEAT_MS checks how late it fires: a main-loop
+    block longer than `stall_threshold`, or a single callback running that
+    long, is counted and logged.
+    """
     
-    def add_translation(self, source_text, translated_text, source_lang, target_lang):
-        """Add a translation to history"""
-        entry = {
-            "timestamp": datetime.now().isoformat(),
-            "source_text": source_text,
-            "translated_text": translated_text,
-            "source_language": source_lang,
-            "target_language": target_lang
-        }
-        self.history.append(entry)
-        self.save_history()
+    FRAME_MS = 16
+    HEARTBEAT_MS = 250
     
-    def save_history(self):
-        """Save history to file"""
+    def __init__(self, root, stall_threshold=0.1, budget=0.008):
+        self.root = root
+        self.stall_threshold = stall_threshold
+        self.budget = budget  # Seconds of callbacks per frame; the rest waits a frame
+        self.stalls = deque(maxlen=50)  # (when, seconds, cause)
+        self._queue = deque()
+        self._latest = {}  # key -> (callback, args) for coalesced messages
+        self._lock = threading.Lock()
+        self._scheduled = False
+        self._last_beat = time.perf_counter()
+        self.root.after(self.HEARTBEAT_MS, self._heartbeat)
+    
+    def _enqueue(self, item):
+        """Queue an item (caller holds the lock); True if a drain needs scheduling"""
+        self._queue.append(item)
+        if self._scheduled:
+            return False
+        self._scheduled = True
+        return True
+    
+    def post(self, callback, *args):
+        """Run callback(*args) on the Tk thread at the next frame"""
+        with self._lock:
+            schedule = self._enqueue((None, callback, args))
+        if schedule:
+            self.root.after(0, self._drain)
+    
+    def post_latest(self, key, callback, *args):
+        """Like post, but only the newest message per key is delivered"""
+        schedule = False
+        with self._lock:
+            if key not in self._latest:
+                schedule = self._enqueue((key, None, None))
+            self._latest[key] = (callback, args)
+        if schedule:
+            self.root.after(0, self._drain)
+    
+    def _stall(self, seconds, cause):
+        self.stalls.append((datetime.now(), seconds, cause))
+        METRICS.count("ui_stalls")
+        print(f"UI stall: {cause} blocked the main loop for {seconds * 1000:.0f} ms")
+    
+    def _heartbeat(self):
+        now = time.perf_counter()
+        late = now - self._last_beat - self.HEARTBEAT_MS / 1000
+        METRICS.observe("ui_lag", max(0.0, late))
+        if late > self.stall_threshold:
+            self._stall(late, "event handling")
+        self._last_beat = now
+        self.root.after(self.HEARTBEAT_MS, self._heartbeat)
+    
+    def _drain(self):
+        deadline = time.perf_counter() + self.budget
+        while time.perf_counter() < deadline:
+            with self._lock:
+                if not self._queue:
+                    self._scheduled = False
+                    return
+                key, callback, args = self._queue.popleft()
+                if key is not None:
+                    callback, args = self._latest.pop(key)
+            started = time.perf_counter()
+            try:
+                callback(*args)
+            except Exception as e:
+                print(f"Error in UI update {getattr(callback, '__name__', callback)}: {e}")
+            elapsed = time.perf_counter() - started
+            if elapsed > self.stall_threshold:
+                self._stall(elapsed, getattr(callback, '__name__', repr(callback)))
+        
+        # Over budget with work left: give Tk a frame before continuing
+        self.root.after(self.FRAME_MS, self._drain)
+    
+    def format_stalls(self):
+        """Recent stalls, newest first, for the diagnostics window"""
+        if not self.stalls:
+            return "No main-loop stalls"
+        return "\n".join(f"{when.strftime('%H:%M:%S')}  {seconds * 1000:7.0f} ms  {cause}"
+                         for when, seconds, cause in reversed(self.stalls))
+
+class HistoryBrowser:
+    """Searchable window over the full translation history
+    
+    Rows are virtualized: the listbox only ever holds the visible rows, and
+    the scrollbar is driven by the match count. Entries are fetched from the
+    history backend a page at a time on a background thread and the
+    formatted pages are kept in a small LRU; rows not loaded yet show a
+    placeholder until their page arrives. Each page remembers the id of its
+    last entry, so the next page is a keyset query (id below that anchor)
+    rather than an ever larger OFFSET.
+    """
+    
+    VISIBLE_ROWS = 20
+    PAGE_SIZE = 200
+    CACHED_PAGES = 32
+    ROW_WIDTH = 60
+    
+    def __init__(self, parent, history, ui):
+        self.history = history
+        self.ui = ui
+        self.search_generation = 0
+        self.filters = {}
+        self.total = 0
+        self.first = 0  # Index of the top visible row
+        self.pages = OrderedDict()  # page number -> [(entry, row text)]
+        self.anchors = {}  # page number -> id of its last entry
+        self.requested = set()  # pages being fetched
+        self.fetcher = ThreadPoolExecutor(max_workers=1, thread_name_prefix="history-pages")
+        self.search_job = None
+        
+        self.window = tk.Toplevel(parent)
+        self.window.title("Translation History")
+        self.window.geometry("800x600")
+        self.window.configure(bg='#f0f0f0')
+        self.window.protocol("WM_DELETE_WINDOW", self.close)
+        
+        # Search and filters
+        filter_frame = tk.Frame(self.window, bg='#f0f0f0')
+        filter_frame.pack(fill='x', padx=10, pady=(10, 5))
+        
+        tk.Label(filter_frame, text="Search:", bg='#f0f0f0').pack(side='left')
+        self.query_var = tk.StringVar()
+        tk.Entry(filter_frame, textvariable=self.query_var, width=24).pack(side='left', padx=(5, 10))
+        
+        languages = ["any"] + sorted(LANGUAGES)
+        self.source_var = tk.StringVar(value="any")
+        self.target_var = tk.StringVar(value="any")
+        for label, var in (("From:", self.source_var), ("To:", self.target_var)):
+            tk.Label(filter_frame, text=label, bg='#f0f0f0').pack(side='left')
+            ttk.Combobox(filter_frame, textvariable=var, values=languages,
+                         state="readonly", width=5).pack(side='left', padx=(5, 10))
+        
+        self.since_var = tk.StringVar()
+        self.until_var = tk.StringVar()
+        for label, var in (("Since:", self.since_var), ("Until:", self.until_var)):
+            tk.Label(filter_frame, text=label, bg='#f0f0f0').pack(side='left')
+            tk.Entry(filter_frame, textvariable=var, width=11).pack(side='left', padx=(5, 10))
+        
+        for var in (self.query_var, self.source_var, self.target_var, self.since_var, self.until_var):
+            var.trace_add("write", lambda *_: self.schedule_search())
+        
+        # Virtualized result list
+        list_frame = tk.Frame(self.window, bg='#f0f0f0')
+        list_frame.pack(fill='x', padx=10)
+        
+        self.scrollbar = tk.Scrollbar(list_frame, orient='vertical', command=self.on_scroll)
+        self.scrollbar.pack(side='right', fill='y')
+        self.listbox = tk.Listbox(list_frame, font=('Arial', 10), height=self.VISIBLE_ROWS,
+                                  activestyle='none')
+        self.listbox.pack(side='left', fill='x', expand=True)
+        self.listbox.bind('<<ListboxSelect>>', self.show_selected)
+        self.listbox.bind('<MouseWheel>', lambda e: self.on_scroll("scroll", -e.delta // 120, "units"))
+        self.listbox.bind('<Button-4>', lambda e: self.on_scroll("scroll", -1, "units"))
+        self.listbox.bind('<Button-5>', lambda e: self.on_scroll("scroll", 1, "units"))
+        self.listbox.bind('<Prior>', lambda e: self.on_scroll("scroll", -1, "pages"))
+        self.listbox.bind('<Next>', lambda e: self.on_scroll("scroll", 1, "pages"))
+        
+        # Full text of the selected entry
+        self.detail_text = scrolledtext.ScrolledText(self.window, height=8, font=('Arial', 11),
+                                                     wrap=tk.WORD, state='disabled')
+        self.detail_text.pack(fill='both', expand=True, padx=10, pady=(5, 0))
+        
+        self.status_var = tk.StringVar()
+        tk.Label(self.window, textvariable=self.status_var, anchor='w',
+                 bg='#f0f0f0').pack(fill='x', padx=10, pady=5)
+        
+        self.run_search()
+    
+    def close(self):
+        """Close the window and stop its page fetcher thread"""
+        self.search_generation += 1  # Pages still in flight are discarded
+        if self.search_job is not None:
+            self.window.after_cancel(self.search_job)
+        self.fetcher.shutdown(wait=False, cancel_futures=True)
+        self.window.destroy()
+    
+    def schedule_search(self):
+        """Debounce typing before running a search"""
+        if self.search_job is not None:
+            self.window.after_cancel(self.search_job)
+        self.search_job = self.window.after(250, self.run_search)
+    
+    def parse_date(self, text, end=False):
+        """ISO date or timestamp prefix for a filter; a date-only end bound includes that day"""
+        text = text.strip()
+        if not text:
+            return None
+        value = datetime.fromisoformat(text)
+        if end and len(text) == 10:
+            value += timedelta(days=1)
+        return value.isoformat()
+    
+    def run_search(self):
+        self.search_job = None
         try:
-            with open(self.filename, 'w', encoding='utf-8') as f:
-                json.dump(self.history, f, ensure_ascii=False, indent=2)
-        except Exception as e:
-            print(f"Error saving history: {e}")
+            since = self.parse_date(self.since_var.get())
+            until = self.parse_date(self.until_var.get(), end=True)
+        except ValueError:
+            self.status_var.set("Dates must look like YYYY-MM-DD")
+            return
+        source, target = self.source_var.get(), self.target_var.get()
+        self.filters = {
+            "query": self.query_var.get(),
+            "source_lang": None if source == "any" else source,
+            "target_lang": None if target == "any" else target,
+            "since": since,
+            "until": until,
+        }
+        self.search_generation += 1
+        self.pages.clear()
+        self.anchors.clear()
+        self.requested = set()
+        self.status_var.set("Searching...")
+        # Counting and the first page run off the Tk thread
+        threading.Thread(target=self.load_results, args=(self.search_generation, dict(self.filters)),
+                         daemon=True).start()
     
-    def load_history(self):
-        """Load history from file"""
+    def load_results(self, generation, filters):
+        started = time.perf_counter()
         try:
-            if os.path.exists(self.filename):
-                with open(self.filename, 'r', encoding='utf-8') as f:
-                    self.history = json.load(f)
+            total = self.history.count_matching(**filters)
+            first_page = self.format_page(self.history.search(limit=self.PAGE_SIZE, **filters))
         except Exception as e:
-            print(f"Error loading history: {e}")
+            self.ui.post(self.status_var.set, f"Search error: {e}")
+            return
+        self.ui.post(self.show_results, generation, total, first_page, time.perf_counter() - started)
     
-    def get_recent_translations(self, limit=10):
-        """Get recent translations"""
-        return self.history[-limit:] if self.history else []
+    def show_results(self, generation, total, first_page, elapsed):
+        if generation != self.search_generation or not self.window.winfo_exists():
+            return
+        self.total = total
+        self.first = 0
+        self.store_page(0, first_page)
+        self.refresh()
+        self.status_var.set(f"{self.total} entries ({elapsed * 1000:.0f} ms)")
+    
+    def format_page(self, entries):
+        return [(entry, format_history_entry(entry, self.ROW_WIDTH)) for entry in entries]
+    
+    def request_page(self, number):
+        """Start fetching a page in the background, continuing from the nearest known anchor"""
+        if number in self.pages or number in self.requested:
+            return
+        self.requested.add(number)
+        anchored = [page for page in self.anchors if page < number]
+        if anchored:
+            nearest = max(anchored)
+            before, offset = self.anchors[nearest], (number - nearest - 1) * self.PAGE_SIZE
+        else:
+            before, offset = None, number * self.PAGE_SIZE
+        self.fetcher.submit(self.fetch_page, self.search_generation, dict(self.filters),
+                            number, before, offset)
+    
+    def fetch_page(self, generation, filters, number, before, offset):
+        """Fetcher thread: load one page unless it has been scrolled far out of view"""
+        rows = None
+        if (generation == self.search_generation
+                and abs(number - self.first // self.PAGE_SIZE) <= 1):
+            try:
+                rows = self.format_page(self.history.search(offset=offset, limit=self.PAGE_SIZE,
+                                                            before=before, **filters))
+            except Exception as e:
+                self.ui.post_latest("history-status", self.status_var.set, f"Search error: {e}")
+        self.ui.post(self.show_page, generation, number, rows)
+    
+    def show_page(self, generation, number, rows):
+        if generation != self.search_generation or not self.window.winfo_exists():
+            return
+        self.requested.discard(number)
+        if rows is None:
+            return
+        self.store_page(number, rows)
+        if number * self.PAGE_SIZE < self.first + self.VISIBLE_ROWS and \
+                (number + 1) * self.PAGE_SIZE > self.first:
+            self.refresh()
+    
+    def store_page(self, number, rows):
+        self.pages[number] = rows
+        if rows:
+            self.anchors[number] = rows[-1][0]["id"]
+        while len(self.pages) > self.CACHED_PAGES:
+            self.pages.popitem(last=False)
+    
+    def row(self, index):
+        """(entry, row text) for a result index, or None until its page is loaded"""
+        number = index // self.PAGE_SIZE
+        rows = self.pages.get(number)
+        if rows is None:
+            self.request_page(number)
+            return None
+        self.pages.move_to_end(number)
+        offset = index % self.PAGE_SIZE
+        return rows[offset] if offset < len(rows) else None
+    
+    def refresh(self):
+        """Fill the listbox with the rows currently scrolled into view"""
+        self.first = max(0, min(self.first, self.total - self.VISIBLE_ROWS))
+        last = min(self.total, self.first + self.VISIBLE_ROWS)
+        rows = [self.row(index) for index in range(self.first, last)]
+        self.listbox.delete(0, tk.END)
+        self.listbox.insert(tk.END, *[row[1] if row is not None else "…" for row in rows])
+        if self.total:
+            self.scrollbar.set(self.first / self.total, last / self.total)
+        else:
+            self.scrollbar.set(0.0, 1.0)
+    
+    def on_scroll(self, action, amount, unit=None):
+        """Scrollbar and wheel handler, in the same form as Tk's yview commands"""
+        if action == "moveto":
+            self.first = int(float(amount) * self.total)
+        elif unit == "pages":
+            self.first += int(amount) * self.VISIBLE_ROWS
+        else:
+            self.first += int(amount)
+        self.refresh()
+        return "break"
+    
+    def show_selected(self, event=None):
+        selection = self.listbox.curselection()
+        if not selection:
+            return
+        row = self.row(self.first + selection[0])
+        if row is None:
+            return
+        entry = row[0]
+        self.detail_text.configure(state='normal')
+        self.detail_text.delete(1.0, tk.END)
+        self.detail_text.insert(1.0,
+            f"{entry['timestamp']}  {entry.get('source_language')} → {entry.get('target_language')}\n\n"
+            f"{entry['source_text']}\n\n{entry['translated_text']}")
+        self.detail_text.configure(state='disabled')
 
 class RealTimeTranslatorApp:
-    def __init__(self, root):
+    TRANSLATION_WORKERS = 2
+    DETECT = "detect"  # Source placeholder resolved by the translation workers
+    
+    def __init__(self, root, backend="google"):
         self.root = root
+        self.backend_name = backend
         self.root.title("AI-Powered Real-Time Translator")
         self.root.geometry("900x700")
         self.root.configure(bg='#f0f0f0')
         
-        # Initialize components
-        self.translator = googletrans.Translator()
-        self.lang_detector = LanguageDetector()
-        self.history = TranslationHistory()
-        self.speech_recognizer = sr.Recognizer()
-        self.tts_engine = pyttsx3.init()
-        
-        # Voice settings
-        self.tts_engine.setProperty('rate', 180)  # Slightly faster for clarity
-        self.tts_engine.setProperty('volume', 1.0)  # Max volume
+        # Heavy components are created in the background once the window is up
+        self.components_ready = threading.Event()
         
-        # TTS queue and thread
-        self.tts_queue = queue.Queue()
-        self.tts_thread = threading.Thread(target=self.tts_worker, daemon=True)
-        self.tts_thread.start()
+        # Text-to-speech (the engine itself is created on its synthesis thread)
+        self.tts = SpeechSynthesizer(
+            rate=180,  # Slightly faster for clarity
+            on_error=lambda e: self.ui.post_latest("status", self.update_status, f"TTS error: {e}"))
         
         # State variables
         self.is_listening = False
+        self.speech_pipeline = None
+        self.voice_session = 0  # Bumped by every Start, so a stale start thread can tell
+        self.voice_lock = threading.Lock()
         self.auto_detect = tk.BooleanVar(value=True)
         self.auto_speak = tk.BooleanVar(value=False)
+        self.incremental_voice = tk.BooleanVar(value=True)
+        self.apply_fuzzy_memory = tk.BooleanVar(value=False)
+        self.multi_target = tk.BooleanVar(value=False)
+        self.fanout_targets = ["fr", "es", "de", "zh", "hi"]
+        self.fanout_texts = {}  # target language -> output widget in its tab
+        self.voice_timings = deque(maxlen=100)
+        self.rendered_segments = []  # (rendered text, mark) per output segment
+        self.segment_mark_ids = itertools.count()
         
         # Create GUI
-        self.create_gui()
+        with startup_timer("create gui"):
+            self.create_gui()
+        self.ui = UIDispatcher(self.root)
         
         # Start background processes
         self.setup_background_processing()
+        threading.Thread(target=self.initialize_components, daemon=True).start()
+    
+    def initialize_components(self):
+        """Background thread creating the translator, detector, history and recognizer"""
+        try:
+            with startup_timer("translation backend"):
+                self.backend = create_backend(self.backend_name)
+                self.translation_pool = TranslationWorkerPool(self.backend,
+                                                              workers=self.TRANSLATION_WORKERS,
+                                                              breaker=CircuitBreaker())
+                self.request_journal = RequestJournal()
+                self.journal_replayer = JournalReplayer(self.request_journal, self.translation_pool,
+                                                        self.on_replayed)
+            with startup_timer("history"):
+                self.history = TranslationHistory()
+            with startup_timer("translation cache"):
+                self.translation_cache = TranslationCache()
+                self.translation_cache.warm_from_history(self.history)
+                self.translation_memory = TranslationMemory()
+                self.toggle_memory_auto_apply()
+            with startup_timer("language detector"):
+                self.lang_detector = LanguageDetector()
+            self.segment_translator = SegmentTranslator(self.translation_pool, self.translation_cache,
+                                                        self.translation_memory, self.lang_detector)
+            with startup_timer("speech recognizer"):
+                self.speech_recognizer = sr.Recognizer()
+        except Exception as e:
+            self.ui.post_latest("status", self.update_status, f"Startup error: {e}")
+            return
+        
+        self.translation_pool.start(self.process_translations)
+        self.journal_replayer.start()
+        self.components_ready.set()
+        pending = self.request_journal.count()
+        self.ui.post_latest("status", self.update_status,
+                            f"Ready ({pending} queued translations to replay)" if pending else "Ready")
+        
+        # Fuzzy matches become available as the memory fills in
+        try:
+            with startup_timer("translation memory"):
+                self.translation_memory.build_from_history(self.history)
+        except Exception as e:
+            print(f"Error building translation memory: {e}")
+    
+    def require_components(self, retry):
+        """Return True once components are loaded, otherwise retry the action shortly"""
+        if self.components_ready.is_set():
+            return True
+        self.update_status("Loading components...")
+        self.root.after(200, retry)
+        return False
     
     def create_gui(self):
         """Create the main GUI"""
@@ -235,6 +3679,21 @@ class RealTimeTranslatorApp:
                       variable=self.auto_speak, font=('Arial', 10),
                       bg='#f0f0f0').pack(side='left', padx=(20, 0))
         
+        tk.Checkbutton(options_frame, text="Incremental voice translation", 
+                      variable=self.incremental_voice, font=('Arial', 10),
+                      bg='#f0f0f0').pack(side='left', padx=(20, 0))
+        
+        tk.Checkbutton(options_frame, text="Apply fuzzy memory matches", 
+                      variable=self.apply_fuzzy_memory, font=('Arial', 10),
+                      bg='#f0f0f0', command=self.toggle_memory_auto_apply).pack(side='left', padx=(20, 0))
+        
+        tk.Checkbutton(options_frame, text="Multi-target", 
+                      variable=self.multi_target, font=('Arial', 10),
+                      bg='#f0f0f0').pack(side='left', padx=(20, 0))
+        
+        tk.Button(options_frame, text="Targets...", font=('Arial', 9),
+                 command=self.choose_fanout_targets).pack(side='left', padx=(5, 0))
+        
         # Translation area
         translation_frame = tk.Frame(main_frame, bg='#f0f0f0')
         translation_frame.pack(fill='both', expand=True)
@@ -250,6 +3709,7 @@ class RealTimeTranslatorApp:
                                                    wrap=tk.WORD)
         self.input_text.pack(fill='both', expand=True, padx=10, pady=5)
         self.input_text.bind('<KeyRelease>', self.on_text_change)
+        self.input_text.tag_configure("partial", foreground='#7f8c8d', font=('Arial', 11, 'italic'))
         
         # Control buttons
         btn_frame = tk.Frame(input_frame, bg='#f0f0f0')
@@ -277,10 +3737,14 @@ class RealTimeTranslatorApp:
                                    bg='#f0f0f0', fg='#2c3e50')
         output_frame.pack(fill='both', expand=True, pady=(5, 0))
         
-        self.output_text = scrolledtext.ScrolledText(output_frame, height=8, 
+        # One tab for the selected target language, plus one per multi-target language
+        self.output_tabs = ttk.Notebook(output_frame)
+        self.output_tabs.pack(fill='both', expand=True, padx=10, pady=5)
+        
+        self.output_text = scrolledtext.ScrolledText(self.output_tabs, height=8, 
                                                     font=('Arial', 11),
                                                     wrap=tk.WORD, state='disabled')
-        self.output_text.pack(fill='both', expand=True, padx=10, pady=5)
+        self.output_tabs.add(self.output_text, text="Translation")
         
         # Output control buttons
         output_btn_frame = tk.Frame(output_frame, bg='#f0f0f0')
@@ -301,6 +3765,11 @@ class RealTimeTranslatorApp:
                  bg='#34495e', fg='white',
                  command=self.show_history).pack(side='left')
         
+        tk.Button(output_btn_frame, text="📈 Diagnostics", 
+                 font=('Arial', 10),
+                 bg='#7f8c8d', fg='white',
+                 command=self.show_diagnostics).pack(side='left', padx=(10, 0))
+        
         # Status bar
         self.status_var = tk.StringVar(value="Ready")
         status_bar = tk.Label(self.root, textvariable=self.status_var, 
@@ -319,13 +3788,20 @@ class RealTimeTranslatorApp:
     
     def setup_background_processing(self):
         """Setup background processing"""
-        self.translation_queue = queue.Queue()
+        self.translation_scheduler = TranslationScheduler()
         self.voice_queue = queue.Queue()
+        self.voice_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="voice-translation")
+        self.fanout_executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix="fanout-translation")
         
-        # Start background threads
-        threading.Thread(target=self.process_translations, daemon=True).start()
+        # Translation workers are started by initialize_components
         # threading.Thread(target=self.process_voice_input, daemon=True).start()
     
+    def toggle_memory_auto_apply(self):
+        """Apply fuzzy translation memory matches directly, or only suggest them"""
+        memory = getattr(self, "translation_memory", None)
+        if memory is not None:
+            memory.auto_apply_threshold = memory.threshold if self.apply_fuzzy_memory.get() else 1.0
+    
     def toggle_auto_detect(self):
         """Toggle auto-detect functionality"""
         if self.auto_detect.get():
@@ -339,7 +3815,8 @@ class RealTimeTranslatorApp:
         if hasattr(self, '_translate_timer'):
             self.root.after_cancel(self._translate_timer)
         
-        self._translate_timer = self.root.after(1000, self.auto_translate)
+        delay = self.translation_scheduler.debounce_delay()
+        self._translate_timer = self.root.after(delay, self.auto_translate)
     
     def auto_translate(self):
         """Auto-translate text after delay"""
@@ -359,49 +3836,292 @@ class RealTimeTranslatorApp:
         if not text:
             self.update_status("No text to translate")
             return
+        if not self.require_components(self.translate_text):
+            return
         
         source_lang = self.get_language_code(self.source_lang_var.get())
         target_lang = self.get_language_code(self.target_lang_var.get())
         
         if source_lang == "auto" or self.auto_detect.get():
-            # Use our ML model for language detection
-            detected_lang = self.lang_detector.detect(text)
-            source_lang = detected_lang
+            # Detected on a worker thread, keeping the model off the Tk thread
+            source_lang = self.DETECT
+        
+        if self.multi_target.get() and self.fanout_targets:
+            # Detection runs once and is shared by every target
+            targets = tuple(self.fanout_targets)
+            for target in targets:
+                self.fanout_tab(target, pending=True)
+            self.translation_scheduler.submit("fanout", text, source_lang, targets)
+            self.update_status(f"Translating into {len(targets)} languages...")
+            return
         
-        # Queue translation
-        self.translation_queue.put((text, source_lang, target_lang))
+        # Queue translation, superseding any request still waiting for this field
+        self.translation_scheduler.submit("input", text, source_lang, target_lang)
         self.update_status("Translating...")
     
+    def detect_source_language(self, text):
+        """Detect the source language, or "auto" to let the backend decide"""
+        # Use our ML model for language detection; when it is unsure,
+        # leave the source as "auto" so the backend detects it instead
+        detected_lang, confidence = self.lang_detector.detect_with_confidence(text)
+        if confidence >= self.lang_detector.min_confidence:
+            return detected_lang
+        return "auto"
+    
     def process_translations(self):
         """Background thread to process translations"""
         while True:
             try:
-                text, source_lang, target_lang = self.translation_queue.get(timeout=1)
+                field, generation, text, source_lang, target_lang = self.translation_scheduler.next_request()
+                if source_lang == self.DETECT:
+                    # Each clause is detected separately, so code-mixed input
+                    # is translated run by run with the right source language
+                    source_lang = SegmentTranslator.MIXED
+                if field == "fanout":
+                    self.translate_fanout(generation, text, source_lang, target_lang)
+                    continue
                 
-                # Perform translation
+                # Perform translation; only segments that changed reach the backend
                 try:
-                    translation = self.translator.translate(text, 
-                                                          src=source_lang if source_lang != "auto" else None, 
-                                                          dest=target_lang)
+                    segments, source_lang, stats = self.segment_translator.translate(
+                        text, source_lang, target_lang)
+                    if stats["translated"]:
+                        self.translation_scheduler.record_latency(stats["backend_seconds"])
+                    
+                    # Newer input translated, so an older journaled draft is moot
+                    self.request_journal.discard(field)
                     
                     # Update GUI in main thread
-                    self.root.after(0, self.update_translation, 
-                                  translation.text, source_lang, target_lang, text)
+                    self.ui.post(self.deliver_translation, field, generation,
+                                 segments, source_lang, target_lang, text, stats)
                     
+                except BackendError as e:
+                    # Drafts the user has already typed past are not worth replaying
+                    if self.translation_scheduler.is_current(field, generation):
+                        self.journal_request(text, source_lang, target_lang, e, field)
                 except Exception as e:
-                    self.root.after(0, self.update_status, f"Translation error: {str(e)}")
+                    self.ui.post_latest("status", self.update_status, f"Translation error: {str(e)}")
                 
-            except queue.Empty:
-                continue
             except Exception as e:
                 print(f"Translation processing error: {e}")
     
-    def update_translation(self, translated_text, source_lang, target_lang, original_text):
+    def journal_request(self, text, source_lang, target_lang, error, field=None):
+        """Keep a request that failed on the backend so it is replayed after recovery"""
+        if source_lang == SegmentTranslator.MIXED:
+            source_lang = "auto"
+        try:
+            self.request_journal.append(text, source_lang, target_lang, field)
+            self.journal_replayer.notify()
+            pending = self.request_journal.count()
+        except Exception as e:
+            print(f"Error journaling translation request: {e}")
+            self.ui.post_latest("status", self.update_status, f"Translation error: {str(error)}")
+            return
+        METRICS.count("journaled")
+        self.ui.post_latest("status", self.update_status,
+                            f"Backend unavailable ({error}); {pending} requests queued for replay")
+    
+    def on_replayed(self, translations):
+        """Replayer thread: store recovered translations and hand them to the UI"""
+        self.history.add_translations(translations)
+        for text, translated_text, source_lang, target_lang in translations:
+            self.translation_cache.put(text, source_lang, target_lang, translated_text)
+        self.ui.post(self.show_replayed, translations, self.request_journal.count())
+    
+    def show_replayed(self, translations, pending):
+        """Show a replayed translation if its input is still on screen, else report the recovery"""
+        current_text = self.input_text.get(1.0, tk.END).strip()
+        target_lang = self.get_language_code(self.target_lang_var.get())
+        for text, translated_text, source_lang, target in translations:
+            if text != current_text:
+                continue
+            if self.multi_target.get():
+                output = self.fanout_texts.get(target)
+            else:
+                output = self.output_text if target == target_lang else None
+            if output is None:
+                continue
+            with METRICS.timer("render"):
+                output.configure(state='normal')
+                if output is self.output_text:
+                    self.reset_rendered_segments()
+                output.delete(1.0, tk.END)
+                output.insert(1.0, translated_text)
+                output.configure(state='disabled')
+        message = f"Recovered {len(translations)} queued translations"
+        self.update_status(f"{message}; {pending} still queued" if pending else message)
+    
+    def deliver_translation(self, field, generation, segments, source_lang, target_lang, original_text,
+                            stats=None):
+        """Show a translation unless newer input has superseded it"""
+        if not self.translation_scheduler.is_current(field, generation):
+            METRICS.count("stale_results_dropped")
+            return
+        METRICS.count("translations")
+        if stats:
+            METRICS.count("segments_translated", stats["translated"])
+            METRICS.count("segments_reused", stats["reused"])
+            METRICS.count("segments_from_memory", stats["memory"])
+        self.update_translation("".join(segments), source_lang, target_lang, original_text,
+                                segments=segments)
+        if stats and stats["suggestions"]:
+            index, match = max(stats["suggestions"], key=lambda suggestion: suggestion[1].score)
+            self.update_status(f"Translation memory {match.score:.0%} match for segment {index + 1}: "
+                               f"{match.translated_text[:60]}")
+        elif stats and len(stats["languages"]) > 1:
+            self.update_status(f"Translated {'/'.join(stats['languages'])} text to {target_lang} "
+                               f"({stats['segments']} language runs)")
+        elif stats and stats["memory"]:
+            self.update_status(f"Translated from {source_lang} to {target_lang} "
+                               f"({stats['memory']} segments from translation memory)")
+        elif stats and stats["segments"] > 1:
+            self.update_status(f"Translated from {source_lang} to {target_lang} "
+                               f"({stats['translated']} of {stats['segments']} segments changed)")
+    
+    def translate_fanout(self, generation, text, source_lang, targets):
+        """Translate one input into several targets concurrently, showing each as it arrives"""
+        # Split the text and detect its clause languages once for every target
+        units = self.segment_translator.units(text, source_lang)
+        futures = {self.fanout_executor.submit(self.segment_translator.translate, text, source_lang, target,
+                                               units=units): target
+                   for target in targets}
+        translations = []
+        for future in as_completed(futures):
+            target = futures[future]
+            field = f"fanout:{target}"
+            try:
+                segments, detected_lang, stats = future.result()
+            except Exception as e:
+                self.ui.post(self.deliver_fanout, generation, target, None, source_lang, str(e))
+                if isinstance(e, BackendError) and self.translation_scheduler.is_current("fanout", generation):
+                    self.journal_request(text, source_lang, target, e, field)
+                continue
+            self.request_journal.discard(field)
+            translated_text = "".join(segments)
+            translations.append((text, translated_text, detected_lang, target))
+            self.ui.post(self.deliver_fanout, generation, target, translated_text, detected_lang)
+        
+        # All targets go to history in a single write
+        if translations and self.translation_scheduler.is_current("fanout", generation):
+            self.history.add_translations(translations)
+            self.ui.post_latest("status", self.update_status,
+                                f"Translated into {len(translations)} of {len(targets)} languages")
+    
+    def fanout_tab(self, target_lang, pending=False):
+        """Return the output widget for a multi-target language, creating its tab"""
+        output = self.fanout_texts.get(target_lang)
+        if output is None:
+            output = scrolledtext.ScrolledText(self.output_tabs, height=8, font=('Arial', 11),
+                                               wrap=tk.WORD, state='disabled')
+            self.output_tabs.add(output, text=LANGUAGES[target_lang].title())
+            self.fanout_texts[target_lang] = output
+        suffix = " …" if pending else ""
+        self.output_tabs.tab(output, text=LANGUAGES[target_lang].title() + suffix)
+        return output
+    
+    def deliver_fanout(self, generation, target_lang, translated_text, source_lang, error=None):
+        """Show one target's translation in its tab unless the input has changed since"""
+        if not self.translation_scheduler.is_current("fanout", generation):
+            METRICS.count("stale_results_dropped")
+            return
+        output = self.fanout_tab(target_lang)
+        with METRICS.timer("render"):
+            output.configure(state='normal')
+            output.delete(1.0, tk.END)
+            output.insert(1.0, translated_text if error is None else f"Translation error: {error}")
+            output.configure(state='disabled')
+        METRICS.count("translations")
+    
+    def selected_output(self):
+        """Output widget of the selected tab"""
+        selected = self.output_tabs.select()
+        for output in self.fanout_texts.values():
+            if str(output) == selected:
+                return output
+        return self.output_text
+    
+    def choose_fanout_targets(self):
+        """Pick the languages used in multi-target mode"""
+        dialog = tk.Toplevel(self.root)
+        dialog.title("Multi-target Languages")
+        dialog.configure(bg='#f0f0f0')
+        
+        choices = {}
+        for index, (code, name) in enumerate(LANGUAGES.items()):
+            choices[code] = tk.BooleanVar(value=code in self.fanout_targets)
+            tk.Checkbutton(dialog, text=f"{code} - {name.title()}", variable=choices[code],
+                          bg='#f0f0f0', anchor='w').grid(row=index % 12, column=index // 12,
+                                                         sticky='w', padx=10)
+        
+        def apply():
+            self.fanout_targets = [code for code, chosen in choices.items() if chosen.get()]
+            for code in list(self.fanout_texts):
+                if code not in self.fanout_targets:
+                    self.output_tabs.forget(self.fanout_texts.pop(code))
+            self.update_status(f"Multi-target languages: {', '.join(self.fanout_targets) or 'none'}")
+            dialog.destroy()
+        
+        tk.Button(dialog, text="OK", command=apply, width=10).grid(
+            row=12, column=0, columnspan=3, pady=10)
+    
+    def reset_rendered_segments(self):
+        """Forget segment marks after the output was rewritten wholesale"""
+        for _, mark in self.rendered_segments:
+            self.output_text.mark_unset(mark)
+        self.rendered_segments = []
+    
+    def render_segments(self, segments):
+        """Update the output in place, rewriting only the segments that changed"""
+        out = self.output_text
+        old = self.rendered_segments
+        if not old:
+            out.delete(1.0, tk.END)
+        
+        # Unchanged leading and trailing segments stay in the widget untouched
+        prefix = 0
+        while prefix < min(len(old), len(segments)) and old[prefix][0] == segments[prefix]:
+            prefix += 1
+        suffix = 0
+        while (suffix < min(len(old), len(segments)) - prefix
+               and old[len(old) - 1 - suffix][0] == segments[len(segments) - 1 - suffix]):
+            suffix += 1
+        
+        start = out.index(old[prefix][1]) if prefix < len(old) else out.index("end-1c")
+        end = out.index(old[len(old) - suffix][1]) if suffix else out.index("end-1c")
+        out.delete(start, end)
+        for _, mark in old[prefix:len(old) - suffix]:
+            out.mark_unset(mark)
+        
+        # Insert changed segments back to front at one position; a mark with
+        # right gravity is pushed along by text inserted in front of it
+        moved = [old[len(old) - suffix][1]] if suffix else []
+        for mark in moved:
+            out.mark_gravity(mark, "right")
+        middle = []
+        for segment in reversed(segments[prefix:len(segments) - suffix]):
+            mark = f"segment{next(self.segment_mark_ids)}"
+            out.mark_set(mark, start)
+            out.mark_gravity(mark, "left")
+            out.insert(start, segment)
+            out.mark_gravity(mark, "right")
+            moved.append(mark)
+            middle.append((segment, mark))
+        for mark in moved:
+            out.mark_gravity(mark, "left")
+        middle.reverse()
+        self.rendered_segments = old[:prefix] + middle + old[len(old) - suffix:]
+    
+    def update_translation(self, translated_text, source_lang, target_lang, original_text, segments=None):
         """Update the translation display"""
-        self.output_text.configure(state='normal')
-        self.output_text.delete(1.0, tk.END)
-        self.output_text.insert(1.0, translated_text)
-        self.output_text.configure(state='disabled')
+        with METRICS.timer("render"):
+            self.output_text.configure(state='normal')
+            if segments is not None:
+                self.render_segments(segments)
+            else:
+                self.reset_rendered_segments()
+                self.output_text.delete(1.0, tk.END)
+                self.output_text.insert(1.0, translated_text)
+            self.output_text.configure(state='disabled')
         
         # Add to history
         self.history.add_translation(original_text, translated_text, 
@@ -422,47 +4142,70 @@ class RealTimeTranslatorApp:
     
     def start_voice_input(self):
         """Start voice input"""
-        self.is_listening = True
+        with self.voice_lock:
+            self.is_listening = True
+            self.voice_session += 1
+            session = self.voice_session
         self.voice_btn.configure(text="🔴 Stop Voice Input", bg='#e74c3c')
         self.update_status("Listening for voice input...")
         
         # Start voice recognition in background
-        threading.Thread(target=self.voice_recognition_thread, daemon=True).start()
+        threading.Thread(target=self.voice_recognition_thread, args=(session,), daemon=True).start()
     
     def stop_voice_input(self):
         """Stop voice input"""
-        self.is_listening = False
+        with self.voice_lock:
+            self.is_listening = False
+            pipeline, self.speech_pipeline = self.speech_pipeline, None
+        if pipeline is not None:
+            pipeline.stop()
         self.voice_btn.configure(text="🎤 Start Voice Input", bg='#3498db')
         self.update_status("Voice input stopped")
     
-    def voice_recognition_thread(self):
-        """Background thread for voice recognition"""
-        with sr.Microphone() as source:
-            self.speech_recognizer.adjust_for_ambient_noise(source)
+    def voice_recognition_thread(self, session):
+        """Background thread starting the streaming speech pipeline"""
+        self.components_ready.wait()
         
-        while self.is_listening:
-            try:
-                with sr.Microphone() as source:
-                    # Listen for audio with timeout
-                    audio = self.speech_recognizer.listen(source, timeout=1, phrase_time_limit=5)
-                
-                # Recognize speech
-                try:
-                    text = self.speech_recognizer.recognize_google(audio)
-                    self.root.after(0, self.add_voice_text, text)
-                except sr.UnknownValueError:
-                    pass  # Ignore unrecognized speech
-                except sr.RequestError as e:
-                    self.root.after(0, self.update_status, f"Voice recognition error: {e}")
-                    
-            except sr.WaitTimeoutError:
-                pass  # Continue listening
-            except Exception as e:
-                print(f"Voice recognition thread error: {e}")
-                break
+        on_partial = None
+        if self.incremental_voice.get():
+            on_partial = lambda text: self.ui.post_latest("voice partial", self.show_voice_partial, text)
+        pipeline = SpeechPipeline(
+            MicrophoneSource(),
+            google_speech_recognizer(self.speech_recognizer),
+            on_text=lambda text, timings: self.ui.post(self.add_voice_text, text, timings),
+            on_error=lambda e: self.ui.post_latest("status", self.update_status, f"Voice recognition error: {e}"),
+            on_partial=on_partial,
+            preprocess=AudioPreprocessor())
+        
+        # Publish the pipeline only if this start is still wanted; a Stop
+        # after this point finds it and stops it, even before it has started
+        with self.voice_lock:
+            if not self.is_listening or self.voice_session != session:
+                return
+            self.speech_pipeline = pipeline
+        try:
+            pipeline.start()
+        except Exception as e:
+            print(f"Voice recognition thread error: {e}")
+            self.ui.post_latest("status", self.update_status, f"Voice recognition error: {e}")
+            self.ui.post(self.stop_voice_input)
+    
+    def clear_voice_partial(self):
+        """Remove any partial hypothesis shown in the input box"""
+        ranges = self.input_text.tag_ranges("partial")
+        if ranges:
+            self.input_text.delete(ranges[0], ranges[-1])
     
-    def add_voice_text(self, text):
+    def show_voice_partial(self, text):
+        """Show a partial recognition hypothesis after the input text"""
+        self.clear_voice_partial()
+        separator = " " if self.input_text.get(1.0, tk.END).strip() else ""
+        self.input_text.insert(tk.END, separator + text, "partial")
+        self.input_text.see(tk.END)
+    
+    def add_voice_text(self, text, timings=None):
         """Add recognized voice text to input"""
+        self.clear_voice_partial()
         current_text = self.input_text.get(1.0, tk.END).strip()
         if current_text:
             self.input_text.insert(tk.END, f" {text}")
@@ -471,38 +4214,76 @@ class RealTimeTranslatorApp:
         
         self.update_status(f"Voice recognized: {text}")
         
-        # Auto-translate voice input
-        self.root.after(500, self.translate_text)
+        if self.incremental_voice.get():
+            # Translate only the new segment and append it to the output
+            source_lang = self.get_language_code(self.source_lang_var.get())
+            target_lang = self.get_language_code(self.target_lang_var.get())
+            auto = source_lang == "auto" or self.auto_detect.get()
+            self.voice_executor.submit(self.translate_voice_segment, text,
+                                       "auto" if auto else source_lang, target_lang, timings or {})
+        else:
+            # Auto-translate voice input
+            self.root.after(500, self.translate_text)
+    
+    def translate_voice_segment(self, text, source_lang, target_lang, timings):
+        """Voice worker: translate one recognized segment"""
+        try:
+            started = time.perf_counter()
+            if source_lang == "auto":
+                source_lang = self.detect_source_language(text)
+            translated = self.translation_cache.get(text, source_lang, target_lang)
+            if translated is None:
+                translation = self.translation_pool.translate(text, src=source_lang, dest=target_lang)
+                self.translation_cache.put(text, source_lang, target_lang, translation.text)
+                translated = translation.text
+                if source_lang == "auto":
+                    source_lang = getattr(translation, "src", source_lang)
+            timings["mt"] = time.perf_counter() - started
+            self.ui.post(self.append_voice_translation, translated,
+                         source_lang, target_lang, text, timings)
+        except BackendError as e:
+            # Every recognized segment is kept, so voice requests have no field
+            self.journal_request(text, source_lang, target_lang, e)
+        except Exception as e:
+            self.ui.post_latest("status", self.update_status, f"Translation error: {str(e)}")
+    
+    def append_voice_translation(self, translated_text, source_lang, target_lang, original_text, timings):
+        """Append a translated voice segment to the output and report stage timings"""
+        started = time.perf_counter()
+        self.output_text.configure(state='normal')
+        self.reset_rendered_segments()
+        if self.output_text.get(1.0, tk.END).strip():
+            self.output_text.insert(tk.END, " ")
+        self.output_text.insert(tk.END, translated_text)
+        self.output_text.see(tk.END)
+        self.output_text.configure(state='disabled')
+        timings["render"] = time.perf_counter() - started
+        
+        self.history.add_translation(original_text, translated_text, source_lang, target_lang)
+        if self.auto_speak.get():
+            # Voice segments queue up behind each other instead of cutting in
+            self.speak_text(translated_text, interrupt=False)
+        
+        timings["total"] = time.perf_counter() - timings.get("endpointed", started)
+        self.voice_timings.append(timings)
+        self.update_status(f"Voice {source_lang}→{target_lang}: " + format_stage_timings(timings))
     
     def speak_translation(self):
         """Speak the current translation"""
-        text = self.output_text.get(1.0, tk.END).strip()
+        text = self.selected_output().get(1.0, tk.END).strip()
         if text:
             self.speak_text(text)
     
-    def speak_text(self, text):
-        """Speak given text using TTS"""
+    def speak_text(self, text, interrupt=True):
+        """Speak given text using TTS, by default cutting off older speech"""
         try:
-            self.tts_queue.put(text)
+            self.tts.speak(text, interrupt=interrupt)
         except Exception as e:
             self.update_status(f"TTS error: {e}")
-
-    def tts_worker(self):
-        """Background thread to process TTS queue"""
-        while True:
-            text = self.tts_queue.get()
-            if text is None:
-                break
-            try:
-                self.tts_engine.say(text)
-                self.tts_engine.runAndWait()
-            except Exception as e:
-                self.root.after(0, self.update_status, f"TTS error: {e}")
-            self.tts_queue.task_done()
     
     def copy_translation(self):
         """Copy translation to clipboard"""
-        text = self.output_text.get(1.0, tk.END).strip()
+        text = self.selected_output().get(1.0, tk.END).strip()
         if text:
             self.root.clipboard_clear()
             self.root.clipboard_append(text)
@@ -510,59 +4291,438 @@ class RealTimeTranslatorApp:
     
     def clear_text(self):
         """Clear all text fields"""
+        self.translation_scheduler.invalidate("input")
+        self.translation_scheduler.invalidate("fanout")
         self.input_text.delete(1.0, tk.END)
         self.output_text.configure(state='normal')
+        self.reset_rendered_segments()
         self.output_text.delete(1.0, tk.END)
         self.output_text.configure(state='disabled')
+        for output in self.fanout_texts.values():
+            output.configure(state='normal')
+            output.delete(1.0, tk.END)
+            output.configure(state='disabled')
         self.update_status("Text cleared")
     
     def show_history(self):
-        """Show translation history"""
-        history_window = tk.Toplevel(self.root)
-        history_window.title("Translation History")
-        history_window.geometry("600x400")
-        history_window.configure(bg='#f0f0f0')
+        """Open the history browser"""
+        if not self.require_components(self.show_history):
+            return
+        HistoryBrowser(self.root, self.history, self.ui)
+    
+    def show_diagnostics(self):
+        """Show live stage latencies and pipeline counters"""
+        METRICS.enabled = True
         
-        # History listbox
-        history_frame = tk.Frame(history_window, bg='#f0f0f0')
-        history_frame.pack(fill='both', expand=True, padx=10, pady=10)
+        diagnostics_window = tk.Toplevel(self.root)
+        diagnostics_window.title("Diagnostics")
+        diagnostics_window.geometry("640x360")
+        diagnostics_window.configure(bg='#f0f0f0')
         
-        tk.Label(history_frame, text="Recent Translations", 
-                font=('Arial', 14, 'bold'), bg='#f0f0f0').pack(pady=(0, 10))
+        diagnostics_text = scrolledtext.ScrolledText(diagnostics_window, font=('Courier', 10))
+        diagnostics_text.pack(fill='both', expand=True, padx=10, pady=10)
         
-        history_listbox = tk.Listbox(history_frame, font=('Arial', 10))
-        history_listbox.pack(fill='both', expand=True)
+        def refresh():
+            if not diagnostics_window.winfo_exists():
+                return
+            diagnostics_text.configure(state='normal')
+            diagnostics_text.delete(1.0, tk.END)
+            diagnostics_text.insert(1.0, METRICS.format_table() + "\n\nMain-loop stalls\n" +
+                                    self.ui.format_stalls())
+            diagnostics_text.configure(state='disabled')
+            diagnostics_window.after(1000, refresh)
         
-        # Populate history
-        recent_translations = self.history.get_recent_translations(20)
-        for entry in reversed(recent_translations):
-            timestamp = datetime.fromisoformat(entry['timestamp']).strftime("%m/%d %H:%M")
-            display_text = f"[{timestamp}] {entry['source_text'][:30]}... → {entry['translated_text'][:30]}..."
-            history_listbox.insert(0, display_text)
+        refresh()
     
     def update_status(self, message):
         """Update status bar"""
         self.status_var.set(message)
-        self.root.update_idletasks()
 
-def main():
-    """Main function to run the application"""
-    # Check for required dependencies
+def read_batch_records(path, fmt, field):
+    """Stream (record, text) pairs from a JSONL, CSV or plain text file"""
+    with open(path, 'r', encoding='utf-8', newline='') as f:
+        if fmt == "csv":
+            for row in csv.DictReader(f):
+                yield row, row.get(field) or ""
+        elif fmt == "jsonl":
+            for line in f:
+                if line.strip():
+                    record = json.loads(line)
+                    yield record, record.get(field) or ""
+        else:
+            for line in f:
+                line = line.rstrip('\r\n')
+                yield line, line
+
+def detect_batch_format(path):
+    """Guess the batch file format from its extension"""
+    extension = os.path.splitext(path)[1].lower()
+    if extension in (".jsonl", ".ndjson"):
+        return "jsonl"
+    if extension == ".csv":
+        return "csv"
+    return "txt"
+
+def run_batch_translation(args):
+    """Headless bulk translation of a file, with checkpoint/resume"""
+    fmt = args.format or detect_batch_format(args.input)
+    output = args.output or f"{os.path.splitext(args.input)[0]}.{args.target}{os.path.splitext(args.input)[1]}"
+    checkpoint = args.checkpoint or output + ".checkpoint"
+    
+    # Resume: skip records already written and drop any partial trailing output
+    done, output_size = 0, 0
+    if args.resume and os.path.exists(checkpoint) and os.path.exists(output):
+        with open(checkpoint, 'r', encoding='utf-8') as f:
+            state = json.load(f)
+        if state.get("input") == os.path.abspath(args.input):
+            done, output_size = state["done"], state["output_size"]
+            print(f"Resuming after {done} records")
+    
+    detector = LanguageDetector() if args.source == "auto" and args.detect else None
+    pool = TranslationWorkerPool(create_backend(args.backend), workers=args.workers,
+                                 rate=args.rate, burst=args.rate)
+    engine = BatchTranslator(pool, args.target, args.source, detector,
+                             batch_size=args.batch_size, workers=args.workers)
+    records = itertools.islice(read_batch_records(args.input, fmt, args.field), done, None)
+    
+    def save_checkpoint(out):
+        out.flush()
+        state = {"input": os.path.abspath(args.input), "done": done, "output_size": out.tell()}
+        with open(checkpoint + ".tmp", 'w', encoding='utf-8') as f:
+            json.dump(state, f)
+        os.replace(checkpoint + ".tmp", checkpoint)
+    
+    started = time.perf_counter()
+    with open(output, 'a+', encoding='utf-8', newline='') as out:
+        out.seek(output_size)
+        out.truncate()
+        writer = None
+        try:
+            for record, text, translation, source_lang in engine.translate_records(records):
+                if fmt == "csv":
+                    if writer is None:
+                        writer = csv.DictWriter(out, fieldnames=list(record) + ["translation"])
+                        if out.tell() == 0:
+                            writer.writeheader()
+                    writer.writerow(dict(record, translation=translation))
+                elif fmt == "jsonl":
+                    record = dict(record, translation=translation, source_language=source_lang)
+                    out.write(json.dumps(record, ensure_ascii=False) + "\n")
+                else:
+                    out.write(translation + "\n")
+                done += 1
+                if done % args.batch_size == 0:
+                    save_checkpoint(out)
+        except Exception as e:
+            save_checkpoint(out)
+            print(f"Batch translation stopped after {done} records: {e}")
+            print("Run the same command again to resume")
+            return 1
+    
+    if os.path.exists(checkpoint):
+        os.remove(checkpoint)
+    elapsed = max(time.perf_counter() - started, 1e-9)
+    print(f"Translated {engine.segments} segments ({engine.chars} chars) in {elapsed:.2f}s: "
+          f"{engine.segments / elapsed:.1f} segments/s, {engine.chars / elapsed:.0f} chars/s")
+    print(f"Output written to {output}")
+    return 0
+
+def run_pool_benchmark(args):
+    """Measure worker pool throughput and latency against an offline backend"""
+    if args.backend == "google":
+        args.backend = "mock"  # Never benchmark against the network
+    options = {}
+    if args.backend == "mock":
+        options = {"latency": args.latency, "jitter": args.jitter, "failure_rate": args.failure_rate}
+        print(f"Mock backend latency {args.latency * 1000:.0f} ms, ", end="")
+    print(f"backend {args.backend}, {args.requests} requests, rate limit {args.rate}/s")
+    
+    for workers in args.workers:
+        pool = TranslationWorkerPool(create_backend(args.backend, **options),
+                                     workers=workers, rate=args.rate, burst=args.rate,
+                                     retries=3, backoff=0.01)
+        jobs = queue.Queue()
+        for i in range(args.requests):
+            jobs.put(f"hello friend {i}")
+        latencies = []
+        
+        def worker():
+            while True:
+                try:
+                    text = jobs.get_nowait()
+                except queue.Empty:
+                    return
+                started = time.perf_counter()
+                try:
+                    pool.translate(text, src="en", dest="fr")
+                except Exception:
+                    continue
+                latencies.append(time.perf_counter() - started)
+        
+        started = time.perf_counter()
+        threads = [threading.Thread(target=worker) for _ in range(workers)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - started
+        latencies.sort()
+        p50 = latencies[len(latencies) // 2] if latencies else 0.0
+        p95 = latencies[int(len(latencies) * 0.95)] if latencies else 0.0
+        print(f"workers={workers:<3} {args.requests / elapsed:8.1f} req/s  "
+              f"p50={p50 * 1000:.1f}ms p95={p95 * 1000:.1f}ms  "
+              f"retries={pool.stats['retries']} failures={pool.stats['failures']}")
+    return 0
+
+def run_detect_benchmark(args):
+    """Micro-benchmark language detection throughput"""
+    started = time.perf_counter()
+    detector = LanguageDetector()
+    print(f"Detector ready in {(time.perf_counter() - started) * 1000:.1f} ms")
+    
+    samples = {
+        "script": ["नमस्ते आप कैसे हैं", "안녕하세요 어떻게 지내세요", "こんにちは元気ですか",
+                   "ہیلو آپ کیسے ہیں", "สวัสดีวันนี้คุณเป็นอย่างไรบ้าง", "Привет как дела"],
+        "model": ["Hello how are you today", "Bonjour comment allez-vous", "kaise hain aap",
+                  "Halo apa kabar hari ini", "Salom, bugun qalaysiz?", "Xin chào hôm nay bạn thế nào"],
+    }
+    samples["mixed"] = samples["script"] + samples["model"]
+    for name, texts in samples.items():
+        started = time.perf_counter()
+        for i in range(args.iterations):
+            detector.detect_with_confidence(texts[i % len(texts)])
+        elapsed = time.perf_counter() - started
+        print(f"{name:<7} {args.iterations / elapsed:10.0f} detections/s "
+              f"({elapsed / args.iterations * 1e6:.1f} us each)")
+        
+        batch = [texts[i % len(texts)] for i in range(args.batch)]
+        batches = max(1, args.iterations // args.batch)
+        started = time.perf_counter()
+        for _ in range(batches):
+            detector.detect_many(batch)
+        elapsed = time.perf_counter() - started
+        print(f"{name:<7} {batches * args.batch / elapsed:10.0f} detections/s "
+              f"with detect_many, {args.batch} per call")
+    return 0
+
+def run_listen(args):
+    """Run the streaming speech pipeline headlessly and print what it hears"""
+    source = WavFileSource(args.wav, realtime=args.realtime) if args.wav else MicrophoneSource()
+    if args.vad_only:
+        def recognize(samples, rate):
+            return f"[speech {len(samples) / rate:.2f}s]"
+    else:
+        recognize = google_speech_recognizer(sr.Recognizer(), language=args.language)
+    
+    pool = TranslationWorkerPool(create_backend(args.backend)) if args.translate else None
+    
+    def on_text(text, timings):
+        if pool is not None:
+            # Translate just this segment, as the incremental GUI mode does
+            started = time.perf_counter()
+            text = f"{text} → {pool.translate(text, src=args.source, dest=args.translate).text}"
+            timings["mt"] = time.perf_counter() - started
+        timings["total"] = time.perf_counter() - timings["endpointed"]
+        print(f"[{timings['start']:7.2f}s] {text}    ({format_stage_timings(timings)})")
+    
+    def on_partial(text):
+        print(f"          ... {text}")
+    
+    preprocessor = None if args.no_preprocess else AudioPreprocessor()
+    pipeline = SpeechPipeline(source, recognize, on_text=on_text, workers=args.workers,
+                              on_partial=on_partial if args.partials else None,
+                              preprocess=preprocessor)
+    pipeline.start()
+    try:
+        while not pipeline.wait(timeout=0.5):
+            pass
+    except KeyboardInterrupt:
+        pipeline.stop()
+    if preprocessor is not None:
+        print(preprocessor.report())
+    return 0
+
+def run_preprocess(args):
+    """Run the recognition audio front-end over a WAV file offline"""
+    samples, rate = read_wav_samples(args.input)
+    preprocessor = AudioPreprocessor(target_rate=args.target_rate, compress=args.compress)
+    output, rate = preprocessor.process(samples, rate)
+    if args.output:
+        with wave.open(args.output, 'wb') as wav:
+            wav.setnchannels(1)
+            wav.setsampwidth(2)
+            wav.setframerate(rate)
+            wav.writeframes(output.tobytes())
+        print(f"Output written to {args.output}")
+    print(preprocessor.report())
+    return 0
+
+def run_service(args):
+    """Run the translation pipeline as a long-lived local HTTP/WebSocket service"""
+    service = TranslationService(backend=args.backend, host=args.host, port=args.port,
+                                 workers=args.workers, rate=args.rate, max_batch=args.max_batch,
+                                 max_wait=args.batch_wait / 1000)
+    if args.startup_report:
+        print_startup_report()
+    try:
+        asyncio.run(service.serve())
+    except KeyboardInterrupt:
+        print("\nService stopped")
+    return 0
+
+def read_wav_samples(path):
+    """Decode a whole 16-bit PCM WAV file to mono int16 samples; returns (samples, rate)"""
+    with wave.open(path, 'rb') as wav:
+        if wav.getsampwidth() != 2:
+            raise ValueError(f"{path}: only 16-bit PCM WAV files are supported")
+        rate, channels = wav.getframerate(), wav.getnchannels()
+        samples = np.frombuffer(wav.readframes(wav.getnframes()), dtype=np.int16)
+    if channels > 1:
+        samples = samples.reshape(-1, channels).mean(axis=1).astype(np.int16)
+    return samples, rate
+
+def transcribe_wav_file(path, language="en-US", vad_only=False, preprocess=True):
+    """Process-pool worker: decode, segment and recognise one WAV file"""
+    result = {"path": path, "duration": 0.0, "segments": [], "decode_seconds": 0.0,
+              "asr_seconds": 0.0, "preprocess": None, "error": None}
     try:
-        import speech_recognition
-        import pyttsx3
-        import googletrans
-        import pyaudio
-        import sklearn
-    except ImportError as e:
-        print(f"Missing required dependency: {e}")
+        started = time.perf_counter()
+        samples, rate = read_wav_samples(path)
+        vad = EnergyVAD(rate)
+        utterances = vad.feed(samples) + vad.flush()
+        result["duration"] = len(samples) / rate
+        result["decode_seconds"] = time.perf_counter() - started
+        
+        started = time.perf_counter()
+        if vad_only:
+            def recognize(samples, rate):
+                return f"[speech {len(samples) / rate:.2f}s]"
+        else:
+            recognize = google_speech_recognizer(sr.Recognizer(), language=language)
+        preprocessor = AudioPreprocessor() if preprocess else None
+        for start, utterance in utterances:
+            samples, utterance_rate = (preprocessor.process(utterance, rate) if preprocessor
+                                       else (utterance, rate))
+            text = recognize(samples, utterance_rate) if len(samples) else None
+            if text:
+                result["segments"].append({"start": round(start, 2),
+                                           "end": round(start + len(utterance) / rate, 2),
+                                           "text": text})
+        result["asr_seconds"] = time.perf_counter() - started
+        if preprocessor is not None:
+            result["preprocess"] = preprocessor.stats
+    except Exception as e:
+        result["error"] = str(e) or type(e).__name__
+    return result
+
+def run_bulk_transcription(args):
+    """Transcribe (and optionally translate) every WAV file under a directory"""
+    paths = sorted(os.path.join(folder, name)
+                   for folder, _, names in os.walk(args.directory)
+                   for name in names if name.lower().endswith(".wav"))
+    output_dir = args.output or os.path.join(args.directory, "transcripts")
+    os.makedirs(output_dir, exist_ok=True)
+    
+    def output_name(path, suffix):
+        relative = os.path.splitext(os.path.relpath(path, args.directory))[0]
+        return os.path.join(output_dir, relative.replace(os.sep, "__") + suffix)
+    
+    # Files transcribed by an earlier run are skipped
+    if not args.overwrite:
+        paths = [path for path in paths if not os.path.exists(output_name(path, ".json"))]
+    if not paths:
+        print("No WAV files to transcribe")
+        return 0
+    
+    engine = None
+    if args.translate:
+        detector = LanguageDetector() if args.source == "auto" else None
+        pool = TranslationWorkerPool(create_backend(args.backend), workers=4, rate=args.rate, burst=args.rate)
+        engine = BatchTranslator(pool, args.translate, args.source, detector)
+    
+    processes = args.processes or os.cpu_count() or 1
+    print(f"Transcribing {len(paths)} files with {processes} processes")
+    started = time.perf_counter()
+    audio_seconds = asr_seconds = 0.0
+    preprocess_totals = {}
+    failures = 0
+    with ProcessPoolExecutor(max_workers=processes) as executor:
+        futures = [executor.submit(transcribe_wav_file, path, args.language, args.vad_only,
+                                   not args.no_preprocess)
+                   for path in paths]
+        for done, future in enumerate(as_completed(futures), 1):
+            result = future.result()
+            name = os.path.relpath(result["path"], args.directory)
+            if result["error"]:
+                failures += 1
+                print(f"[{done}/{len(paths)}] {name}: error: {result['error']}")
+                continue
+            
+            segments = result["segments"]
+            if engine is not None and segments:
+                records = ((segment, segment["text"]) for segment in segments)
+                for segment, _, translation, source_lang in engine.translate_records(records):
+                    segment["translation"] = translation
+                    segment["source_language"] = source_lang
+            
+            with open(output_name(result["path"], ".txt"), 'w', encoding='utf-8') as f:
+                for segment in segments:
+                    f.write(f"[{segment['start']:8.2f}] {segment['text']}\n")
+                    if "translation" in segment:
+                        f.write(f"           {segment['translation']}\n")
+            # Written last, so its presence marks the file as done
+            with open(output_name(result["path"], ".json") + ".tmp", 'w', encoding='utf-8') as f:
+                json.dump(result, f, ensure_ascii=False, indent=2)
+            os.replace(output_name(result["path"], ".json") + ".tmp", output_name(result["path"], ".json"))
+            
+            audio_seconds += result["duration"]
+            asr_seconds += result["asr_seconds"] + result["decode_seconds"]
+            if result["preprocess"]:
+                for key, value in result["preprocess"].items():
+                    preprocess_totals[key] = preprocess_totals.get(key, 0) + value
+            rtf = (result["asr_seconds"] + result["decode_seconds"]) / max(result["duration"], 1e-9)
+            print(f"[{done}/{len(paths)}] {name}: {result['duration']:.1f}s audio, "
+                  f"{len(segments)} segments, RTF {rtf:.2f}")
+    
+    elapsed = max(time.perf_counter() - started, 1e-9)
+    print(f"Transcribed {audio_seconds:.1f}s of audio in {elapsed:.1f}s "
+          f"({audio_seconds / elapsed:.1f}x real time, per-process RTF "
+          f"{asr_seconds / max(audio_seconds, 1e-9):.2f}); {failures} failed")
+    if preprocess_totals:
+        preprocessor = AudioPreprocessor()
+        preprocessor.stats.update(preprocess_totals)
+        print(preprocessor.report())
+    print(f"Output written to {output_dir}")
+    return 1 if failures else 0
+
+def run_gui(startup_report=False, backend="google"):
+    """Run the desktop application"""
+    # Check for required dependencies without importing them
+    missing = [name for name in ("tkinter", "speech_recognition", "pyttsx3", "googletrans",
+                                 "pyaudio", "sklearn")
+               if importlib.util.find_spec(name) is None]
+    if missing:
+        print(f"Missing required dependency: {', '.join(missing)}")
         print("Please install required packages:")
         print("pip install SpeechRecognition pyttsx3 googletrans==4.0.0rc1 pyaudio scikit-learn")
         return
     
     # Create and run the application
-    root = tk.Tk()
-    app = RealTimeTranslatorApp(root)
+    with startup_timer("tk window"):
+        root = tk.Tk()
+    app = RealTimeTranslatorApp(root, backend=backend)
+    
+    def window_shown():
+        STARTUP_TIMINGS["window shown (since process start)"] = time.perf_counter() - PROCESS_START
+        if startup_report:
+            threading.Thread(target=report_when_ready, daemon=True).start()
+    
+    def report_when_ready():
+        app.components_ready.wait()
+        STARTUP_TIMINGS["components ready (since process start)"] = time.perf_counter() - PROCESS_START
+        print_startup_report()
+    
+    root.after_idle(window_shown)
     
     try:
         root.mainloop()
@@ -571,5 +4731,117 @@ def main():
     except Exception as e:
         print(f"Application error: {e}")
 
+def build_arg_parser():
+    """Command line interface; without a command the desktop app starts"""
+    parser = argparse.ArgumentParser(description="AI-Powered Real-Time Translator")
+    parser.add_argument("--startup-report", action="store_true",
+                        help="Print per-subsystem import and initialisation times")
+    parser.add_argument("--backend", default="google", choices=sorted(TRANSLATION_BACKENDS),
+                        help="Translation backend ('local' and 'mock' work offline)")
+    parser.add_argument("--metrics", action="store_true",
+                        help="Record stage latencies and counters; printed on exit unless --metrics-file is set")
+    parser.add_argument("--metrics-file", help="Periodically write metrics to this file")
+    parser.add_argument("--metrics-format", default="json", choices=["json", "prometheus"])
+    parser.add_argument("--metrics-interval", type=float, default=10.0,
+                        help="Seconds between metrics file writes")
+    subparsers = parser.add_subparsers(dest="command")
+    
+    batch = subparsers.add_parser("translate", help="Translate a JSONL, CSV or text file headlessly")
+    batch.add_argument("input", help="Input file (.jsonl, .csv or plain text, one segment per line)")
+    batch.add_argument("-o", "--output", help="Output file (default: <input>.<target>.<ext>)")
+    batch.add_argument("-t", "--target", default="en", choices=sorted(LANGUAGES), help="Target language")
+    batch.add_argument("-s", "--source", default="auto", help="Source language or 'auto'")
+    batch.add_argument("--detect", action="store_true",
+                       help="Detect source languages locally and batch by language")
+    batch.add_argument("--format", choices=["jsonl", "csv", "txt"], help="Input format (default: from extension)")
+    batch.add_argument("--field", default="text", help="JSONL key or CSV column holding the text")
+    batch.add_argument("--batch-size", type=int, default=32, help="Segments per backend call")
+    batch.add_argument("--workers", type=int, default=4, help="Concurrent backend calls")
+    batch.add_argument("--rate", type=float, default=20.0, help="Backend requests per second")
+    batch.add_argument("--checkpoint", help="Checkpoint file (default: <output>.checkpoint)")
+    batch.add_argument("--no-resume", dest="resume", action="store_false",
+                       help="Ignore any existing checkpoint and start over")
+    
+    bench = subparsers.add_parser("bench-pool", help="Measure worker pool throughput and latency offline")
+    bench.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8], help="Pool sizes to try")
+    bench.add_argument("--requests", type=int, default=200, help="Requests per run")
+    bench.add_argument("--latency", type=float, default=0.05, help="Mock backend latency in seconds")
+    bench.add_argument("--jitter", type=float, default=0.0, help="Random latency jitter in seconds")
+    bench.add_argument("--failure-rate", type=float, default=0.0, help="Fraction of mock calls that fail")
+    bench.add_argument("--rate", type=float, default=1000.0, help="Rate limit in requests per second")
+    
+    detect = subparsers.add_parser("bench-detect", help="Measure language detection throughput")
+    detect.add_argument("--iterations", type=int, default=5000, help="Detections per sample set")
+    detect.add_argument("--batch", type=int, default=256, help="Texts per detect_many call")
+    
+    listen = subparsers.add_parser("listen", help="Transcribe the microphone or a WAV file headlessly")
+    listen.add_argument("--wav", help="16-bit WAV file to use instead of the microphone")
+    listen.add_argument("--realtime", action="store_true", help="Feed the WAV file at real-time speed")
+    listen.add_argument("--vad-only", action="store_true",
+                        help="Print detected utterances without calling the recognizer")
+    listen.add_argument("--language", default="en-US", help="Recognition language")
+    listen.add_argument("--workers", type=int, default=2, help="Concurrent recognition requests")
+    listen.add_argument("--translate", metavar="LANG", help="Translate each segment into LANG")
+    listen.add_argument("--source", default="auto", help="Source language for --translate")
+    listen.add_argument("--partials", action="store_true", help="Print partial hypotheses as they arrive")
+    listen.add_argument("--no-preprocess", action="store_true",
+                        help="Send raw utterances to the recognizer")
+    
+    preprocess = subparsers.add_parser("preprocess", help="Run the audio front-end over a WAV file")
+    preprocess.add_argument("input", help="16-bit WAV file")
+    preprocess.add_argument("-o", "--output", help="Write the processed audio to this WAV file")
+    preprocess.add_argument("--target-rate", type=int, default=16000, help="Resample down to this rate")
+    preprocess.add_argument("--compress", action="store_true", help="Also report losslessly compressed size")
+    
+    transcribe = subparsers.add_parser("transcribe", help="Transcribe a directory of WAV files in parallel")
+    transcribe.add_argument("directory", help="Directory searched recursively for .wav files")
+    transcribe.add_argument("-o", "--output", help="Output directory (default: <directory>/transcripts)")
+    transcribe.add_argument("--language", default="en-US", help="Recognition language")
+    transcribe.add_argument("--processes", type=int, help="Recognition processes (default: CPU count)")
+    transcribe.add_argument("--translate", metavar="LANG", choices=sorted(LANGUAGES),
+                            help="Also translate each segment into LANG")
+    transcribe.add_argument("--source", default="auto", help="Source language for --translate")
+    transcribe.add_argument("--rate", type=float, default=10.0, help="Translation requests per second")
+    transcribe.add_argument("--vad-only", action="store_true",
+                            help="Only segment the audio, without calling the recognizer")
+    transcribe.add_argument("--overwrite", action="store_true", help="Redo files transcribed before")
+    transcribe.add_argument("--no-preprocess", action="store_true",
+                            help="Send raw utterances to the recognizer")
+    
+    serve = subparsers.add_parser("serve", help="Run as a local HTTP/WebSocket translation service")
+    serve.add_argument("--host", default="127.0.0.1", help="Address to listen on")
+    serve.add_argument("--port", type=int, default=8765)
+    serve.add_argument("--workers", type=int, default=4, help="Concurrent backend calls")
+    serve.add_argument("--rate", type=float, default=10.0, help="Backend requests per second")
+    serve.add_argument("--max-batch", type=int, default=64, help="Most requests merged into one batch")
+    serve.add_argument("--batch-wait", type=float, default=10.0,
+                       help="Milliseconds to wait for more requests before calling the backend")
+    return parser
+
+def main(argv=None):
+    """Main function to run the application"""
+    args = build_arg_parser().parse_args(argv)
+    if args.metrics or args.metrics_file:
+        METRICS.enabled = True
+        if args.metrics_file:
+            METRICS.start_periodic_dump(args.metrics_file, args.metrics_interval, args.metrics_format)
+        else:
+            atexit.register(lambda: print(METRICS.format_table(), file=sys.stderr))
+    if args.command == "translate":
+        return run_batch_translation(args)
+    if args.command == "bench-pool":
+        return run_pool_benchmark(args)
+    if args.command == "bench-detect":
+        return run_detect_benchmark(args)
+    if args.command == "listen":
+        return run_listen(args)
+    if args.command == "serve":
+        return run_service(args)
+    if args.command == "transcribe":
+        return run_bulk_transcription(args)
+    if args.command == "preprocess":
+        return run_preprocess(args)
+    run_gui(startup_report=args.startup_report, backend=args.backend)
+
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    sys.exit(main())
\ No newline at end of file
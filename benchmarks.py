@@ -0,0 +1,387 @@
+"""Benchmark suite for the translator's hot paths
+
+Runs headless in a scratch directory against the offline mock backend, so no
+network, display or audio device is needed. Results are written as JSON and
+can be compared against an earlier run:
+
+    python benchmarks.py -o baseline.json
+    python benchmarks.py --sizes 10000 100000 1000000 -o current.json --compare baseline.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+
+import app
+
+DETECT_SAMPLES = {
+    "script": ["नमस्ते आप कैसे हैं", "안녕하세요 어떻게 지내세요", "こんにちは元気ですか",
+               "ہیلو آپ کیسے ہیں", "สวัสดีวันนี้คุณเป็นอย่างไรบ้าง", "Привет как дела"],
+    "model": ["Hello how are you today", "Bonjour comment allez-vous", "kaise hain aap",
+              "Halo apa kabar hari ini", "Salom, bugun qalaysiz?", "Xin chào hôm nay bạn thế nào"],
+}
+
+def make_entry(i):
+    return {
+        "timestamp": datetime.now().isoformat(),
+        "source_text": f"Sentence number {i} that somebody typed into the translator",
+        "translated_text": f"Phrase numéro {i} que quelqu'un a tapée dans le traducteur",
+        "source_language": "en",
+        "target_language": "fr",
+    }
+
+def percentiles(latencies):
+    latencies = sorted(latencies)
+    if not latencies:
+        return {}
+    return {"p50_ms": latencies[len(latencies) // 2] * 1000,
+            "p95_ms": latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))] * 1000}
+
+def bench_detect(iterations, batch_size=256):
+    """Language detection per second, per sample group, one string at a time and batched"""
+    detector = app.LanguageDetector()
+    results = {}
+    for group, texts in DETECT_SAMPLES.items():
+        latencies = []
+        started = time.perf_counter()
+        for i in range(iterations):
+            call_started = time.perf_counter()
+            detector.detect(texts[i % len(texts)])
+            latencies.append(time.perf_counter() - call_started)
+        elapsed = time.perf_counter() - started
+        results[f"detect.{group}"] = dict(ops_per_sec=iterations / elapsed, **percentiles(latencies))
+
+        # The same texts through detect_many, batch_size at a time
+        batch = [texts[i % len(texts)] for i in range(batch_size)]
+        batches = max(1, iterations // batch_size)
+        started = time.perf_counter()
+        for _ in range(batches):
+            detector.detect_many(batch)
+        elapsed = time.perf_counter() - started
+        results[f"detect.{group}.batch{batch_size}"] = {"ops_per_sec": batches * batch_size / elapsed}
+    return results
+
+def bench_segment_detection(iterations=200):
+    """Code-mixed documents split and detected clause by clause, without translation"""
+    detector = app.LanguageDetector()
+    sentences = ["मैं आज बहुत थका हुआ हूँ, but the meeting went really well.",
+                 "kal milte hain, see you at the office tomorrow.",
+                 "ہیلو آپ کیسے ہیں؟ I will call you in the morning."]
+    started = time.perf_counter()
+    clauses = 0
+    for i in range(iterations):
+        # A fresh translator, so no clause language is reused between documents
+        translator = app.SegmentTranslator(app.MockBackend(latency=0.0), detector=detector)
+        document = " ".join(f"{sentences[j % len(sentences)]} Item {i}-{j}." for j in range(30))
+        clauses += len(translator.units(document, translator.MIXED))
+    elapsed = time.perf_counter() - started
+    return {"ops_per_sec": iterations / elapsed, "runs_per_document": clauses / iterations}
+
+def bench_history_add(backend, size):
+    """add_translation throughput including the final flush to storage"""
+    history = app.TranslationHistory(backend=backend)
+    latencies = []
+    started = time.perf_counter()
+    for i in range(size):
+        if i % 100 == 0:
+            call_started = time.perf_counter()
+            history.add_translation(f"text {i}", f"texte {i}", "en", "fr")
+            latencies.append(time.perf_counter() - call_started)
+        else:
+            history.add_translation(f"text {i}", f"texte {i}", "en", "fr")
+    history.close()
+    elapsed = time.perf_counter() - started
+    return dict(ops_per_sec=size / elapsed, **percentiles(latencies))
+
+def bench_history_load(backend, size):
+    """Legacy JSON migration and reopening a populated store, in entries per second"""
+    with open("translation_history.json", 'w', encoding='utf-8') as f:
+        json.dump([make_entry(i) for i in range(size)], f)
+
+    started = time.perf_counter()
+    app.TranslationHistory(backend=backend).close()
+    migrate = time.perf_counter() - started
+    os.remove("translation_history.json")
+
+    started = time.perf_counter()
+    history = app.TranslationHistory(backend=backend)
+    history.get_recent_translations(50)
+    reopen = time.perf_counter() - started
+
+    started = time.perf_counter()
+    scanned = sum(1 for _ in history.backend.iter_entries())
+    scan = time.perf_counter() - started
+    history.close()
+    return {
+        "migrate": {"ops_per_sec": size / migrate},
+        "reopen": {"ops_per_sec": 1 / reopen, "latency_ms": reopen * 1000},
+        "scan": {"ops_per_sec": scanned / scan},
+    }
+
+def bench_queue(requests, fields=64):
+    """Scheduler plus segment translation against a zero-latency backend
+    
+    Submissions superseded while still queued are coalesced away, so
+    ops_per_sec counts translations actually processed; the submitted count
+    and the latency from the last submission to its result are reported
+    alongside.
+    """
+    scheduler = app.TranslationScheduler()
+    translator = app.SegmentTranslator(app.MockBackend(latency=0.0),
+                                       app.TranslationCache(disk_filename=None))
+    processed = [0]
+    done = threading.Event()
+
+    def consume():
+        while not done.is_set():
+            request = scheduler.next_request(timeout=0.1)
+            if request is None:
+                continue
+            field, generation, text, src, dst = request
+            if field == "done":
+                done.set()
+                return
+            translator.translate(text, src, dst)
+            processed[0] += 1
+
+    consumer = threading.Thread(target=consume, daemon=True)
+    consumer.start()
+    started = time.perf_counter()
+    for i in range(requests):
+        scheduler.submit(f"field{i % fields}", f"Hello world number {i}. How are you?", "en", "fr")
+    last_submitted = time.perf_counter()
+    # Requests are served oldest field first, so this one comes out last
+    scheduler.submit("done", "", "en", "fr")
+    consumer.join()
+    finished = time.perf_counter()
+    return {"ops_per_sec": processed[0] / (finished - started), "processed": processed[0],
+            "submitted": requests, "final_latency_ms": (finished - last_submitted) * 1000}
+
+def bench_render(size, windows=(20, 1000)):
+    """Fetching and formatting history rows for the history window"""
+    history = app.TranslationHistory(backend="sqlite")
+    history.backend.append_many([make_entry(i) for i in range(size)])
+    results = {}
+    for window in windows:
+        rows = 0
+        started = time.perf_counter()
+        while time.perf_counter() - started < 0.5:
+            rows += len([app.format_history_entry(entry)
+                         for entry in history.get_recent_translations(window)])
+        results[f"render.window{window}"] = {"ops_per_sec": rows / (time.perf_counter() - started)}
+    history.close()
+    return results
+
+def bench_memory(size, lookups=2000):
+    """Translation memory build rate and fuzzy lookups per second"""
+    rng = random.Random(0)
+    vocab = ["".join(rng.choice("abcdefghijklmnopqrstuvwxyz") for _ in range(rng.randint(2, 9)))
+             for _ in range(8000)]
+    sentences = [" ".join(rng.choice(vocab) for _ in range(rng.randint(4, 14))) for _ in range(size)]
+    history = app.TranslationHistory(backend="sqlite")
+    history.backend.append_many([dict(make_entry(i), source_text=sentence, translated_text=sentence.upper())
+                                 for i, sentence in enumerate(sentences)])
+    memory = app.TranslationMemory()
+    started = time.perf_counter()
+    memory.build_from_history(history)
+    build = time.perf_counter() - started
+    history.close()
+
+    queries = []
+    for sentence in rng.sample(sentences, min(lookups, size)):
+        words = sentence.split()
+        words[rng.randrange(len(words))] = rng.choice(vocab)
+        queries.append(" ".join(words))
+    latencies = []
+    found = 0
+    started = time.perf_counter()
+    for query in queries:
+        call_started = time.perf_counter()
+        found += memory.lookup(query, "en", "fr") is not None
+        latencies.append(time.perf_counter() - call_started)
+    elapsed = time.perf_counter() - started
+    return {
+        "build": {"ops_per_sec": size / build},
+        "lookup": dict(ops_per_sec=len(queries) / elapsed, recall=found / len(queries),
+                       **percentiles(latencies)),
+    }
+
+class OutageBackend(app.MockBackend):
+    """Mock backend that fails every call while `down` is set"""
+    
+    def __init__(self, **options):
+        super().__init__(**options)
+        self.down = False
+    
+    def translate_batch(self, texts, src="auto", dest="en"):
+        if self.down:
+            self.calls += 1
+            raise ConnectionError("Simulated outage")
+        return super().translate_batch(texts, src=src, dest=dest)
+
+def bench_recovery(requests, outage=1.0, latency=0.01):
+    """Journal requests during an outage, then time the replay once the backend is back"""
+    backend = OutageBackend(latency=latency, per_item_latency=latency / 100)
+    breaker = app.CircuitBreaker(reset_timeout=0.05, max_timeout=0.2)
+    pool = app.TranslationWorkerPool(backend, rate=1000.0, burst=1000, retries=1, backoff=0.01,
+                                     breaker=breaker)
+    journal = app.RequestJournal()
+
+    # Every request fails or is rejected by the open breaker; half are repeats
+    backend.down = True
+    started = time.perf_counter()
+    for i in range(requests):
+        text = f"Queued sentence number {i % max(1, requests // 2)}"
+        try:
+            pool.translate(text, src="en", dest="fr")
+        except Exception:
+            journal.append(text, "en", "fr")
+    journal_elapsed = time.perf_counter() - started
+    pending = journal.count()
+
+    recovered = []
+    drained = threading.Event()
+
+    def on_results(translations):
+        recovered.append((time.perf_counter(), len(translations)))
+        if sum(count for _, count in recovered) >= pending:
+            drained.set()
+
+    replayer = app.JournalReplayer(journal, pool, on_results, poll_interval=0.01)
+    replayer.start()
+    time.sleep(outage)
+    probes = backend.calls
+    backend.down = False
+    restored = time.perf_counter()
+    drained.wait(60)
+    finished = time.perf_counter()
+    replayer.stop()
+    journal.close()
+    recover = recovered[0][0] - restored
+    return {
+        "journal": {"ops_per_sec": requests / journal_elapsed, "journaled": pending},
+        "recover": {"ops_per_sec": 1 / recover, "latency_ms": recover * 1000,
+                    "calls_during_outage": probes},
+        "drain": {"ops_per_sec": pending / (finished - restored), "batches": replayer.stats["batches"]},
+    }
+
+def run_suite(args):
+    results = {}
+
+    def record(name, runs):
+        # Median of repeated runs, by throughput
+        runs = sorted(runs, key=lambda run: run["ops_per_sec"])
+        results[name] = runs[len(runs) // 2]
+        print(f"{name:<36} {results[name]['ops_per_sec']:>14.1f} ops/s")
+
+    def fresh_dir():
+        for name in os.listdir("."):
+            if os.path.isdir(name):
+                shutil.rmtree(name)
+            else:
+                os.remove(name)
+
+    if "detect" in args.only:
+        for name, result in bench_detect(args.detect_iterations).items():
+            record(name, [result])
+        record("detect.segments", [bench_segment_detection()])
+    for size in args.sizes:
+        for backend in sorted(app.HISTORY_BACKENDS):
+            if "history" in args.only:
+                runs = []
+                for _ in range(args.repeat):
+                    fresh_dir()
+                    runs.append(bench_history_add(backend, size))
+                record(f"history.add.{backend}.{size}", runs)
+
+                fresh_dir()
+                for stage, result in bench_history_load(backend, size).items():
+                    record(f"history.{stage}.{backend}.{size}", [result])
+        if "render" in args.only:
+            fresh_dir()
+            for name, result in bench_render(size).items():
+                record(f"{name}.{size}", [result])
+        if "memory" in args.only:
+            fresh_dir()
+            for stage, result in bench_memory(size).items():
+                record(f"memory.{stage}.{size}", [result])
+    if "recovery" in args.only:
+        fresh_dir()
+        for stage, result in bench_recovery(args.recovery_requests).items():
+            record(f"recovery.{stage}.{args.recovery_requests}", [result])
+    if "queue" in args.only:
+        record(f"queue.{args.queue_requests}",
+               [bench_queue(args.queue_requests) for _ in range(args.repeat)])
+    return results
+
+def compare(results, baseline, threshold):
+    """Print throughput changes against a baseline; return the regressed names"""
+    regressions = []
+    print(f"\n{'benchmark':<36} {'baseline':>14} {'current':>14} {'change':>8}")
+    for name, result in results.items():
+        if name not in baseline:
+            continue
+        before, after = baseline[name]["ops_per_sec"], result["ops_per_sec"]
+        change = (after - before) / before if before else 0.0
+        flag = ""
+        if change < -threshold:
+            regressions.append(name)
+            flag = "  REGRESSION"
+        print(f"{name:<36} {before:>14.1f} {after:>14.1f} {change:>+7.1%}{flag}")
+    return regressions
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark translation, detection and history hot paths")
+    parser.add_argument("-o", "--output", help="Write results as JSON to this file")
+    parser.add_argument("--compare", help="Baseline JSON from an earlier run")
+    parser.add_argument("--threshold", type=float, default=0.10,
+                        help="Throughput drop treated as a regression (default 0.10 = 10%%)")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10000, 100000],
+                        help="History sizes to benchmark")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per benchmark; the median is kept")
+    parser.add_argument("--detect-iterations", type=int, default=20000)
+    parser.add_argument("--queue-requests", type=int, default=20000)
+    parser.add_argument("--recovery-requests", type=int, default=5000)
+    parser.add_argument("--only", nargs="+",
+                        default=["detect", "history", "queue", "render", "memory", "recovery"],
+                        choices=["detect", "history", "queue", "render", "memory", "recovery"])
+    args = parser.parse_args(argv)
+
+    output = os.path.abspath(args.output) if args.output else None
+    baseline = None
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)["results"]
+
+    workdir = os.getcwd()
+    scratch = tempfile.mkdtemp(prefix="translator-bench-")
+    os.chdir(scratch)
+    try:
+        results = run_suite(args)
+    finally:
+        os.chdir(workdir)
+        shutil.rmtree(scratch, ignore_errors=True)
+
+    if output:
+        report = {
+            "meta": {"timestamp": datetime.now().isoformat(), "python": sys.version.split()[0],
+                     "platform": platform.platform(), "sizes": args.sizes, "repeat": args.repeat},
+            "results": results,
+        }
+        with open(output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+        print(f"Results written to {args.output}")
+    if baseline is not None and compare(results, baseline, args.threshold):
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
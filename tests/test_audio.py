@@ -0,0 +1,60 @@
+import os
+
+import numpy as np
+import pytest
+
+from app import AudioPreprocessor, read_wav_samples
+
+FIXTURE = os.path.join(os.path.dirname(__file__), "fixtures", "two_utterances.wav")
+
+
+@pytest.mark.parametrize("samples", [
+    np.zeros(0, dtype=np.int16),
+    np.array([0, 1, -1, 32767, -32768, 32767, -32768], dtype=np.int16),
+    np.random.default_rng(1).integers(-32768, 32768, 10007).astype(np.int16),
+])
+def test_codec_round_trip(samples):
+    assert np.array_equal(AudioPreprocessor.decode(AudioPreprocessor.encode(samples)), samples)
+
+
+def test_codec_compresses_smooth_audio():
+    samples, _ = read_wav_samples(FIXTURE)
+    encoded = AudioPreprocessor.encode(samples)
+    assert np.array_equal(AudioPreprocessor.decode(encoded), samples)
+    assert len(encoded) < samples.nbytes
+
+
+def test_resample_keeps_low_tones_and_removes_high_ones():
+    rate = 48000
+    t = np.arange(rate) / rate
+    preprocessor = AudioPreprocessor()
+    low, output_rate = preprocessor.resample(np.sin(2 * np.pi * 440 * t), rate)
+    high, _ = preprocessor.resample(np.sin(2 * np.pi * 12000 * t), rate)
+    assert output_rate == 16000 and len(low) == 16000
+    # A 12 kHz tone is above the new Nyquist limit and must not alias back in
+    assert np.std(low[100:-100]) > 0.6 and np.std(high[100:-100]) < 0.05
+    
+    same, same_rate = preprocessor.resample(low, 16000)
+    assert same is low and same_rate == 16000
+
+
+def test_preprocess_resamples_and_trims():
+    samples, rate = read_wav_samples(FIXTURE)
+    preprocessor = AudioPreprocessor(compress=True)
+    output, output_rate = preprocessor.process(samples, rate)
+    assert output_rate == 16000
+    assert output.dtype == np.int16
+    assert 0 < len(output) / output_rate < len(samples) / rate
+    assert preprocessor.stats["compressed_bytes"] > 0
+    assert preprocessor.report().startswith("Preprocessing: 1 utterances")
+    
+    silent, _ = preprocessor.process(np.zeros(4000, dtype=np.int16), 16000)
+    assert len(silent) == 0
+
+
+def test_preprocess_downmixes_stereo():
+    samples, rate = read_wav_samples(FIXTURE)
+    stereo = np.stack([samples, samples], axis=1)
+    mono, _ = AudioPreprocessor().process(samples, rate)
+    mixed, _ = AudioPreprocessor().process(stereo, rate)
+    assert np.array_equal(mixed, mono)
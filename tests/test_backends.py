@@ -0,0 +1,62 @@
+import json
+
+import pytest
+
+from app import LocalPhraseBackend, MockBackend, create_backend
+
+
+@pytest.fixture
+def backend(tmp_path):
+    table = tmp_path / "phrases.json"
+    table.write_text(json.dumps({
+        "en-fr": {"thank you": "merci", "thank you very much": "merci beaucoup",
+                  "good": "bon", "coffee": "café"},
+        "en-de": {"thank you": "danke", "coffee": "Kaffee"},
+    }), encoding="utf-8")
+    return LocalPhraseBackend(str(table))
+
+
+def test_longest_phrase_wins(backend):
+    assert backend.translate("thank you very much", src="en", dest="fr").text == "merci beaucoup"
+    assert backend.translate("thank you", src="en", dest="fr").text == "merci"
+
+
+def test_unknown_words_and_punctuation_pass_through(backend):
+    result = backend.translate("Good coffee, thank you!", src="en", dest="fr")
+    assert result.text == "Bon café, merci!"
+    assert (result.src, result.dest) == ("en", "fr")
+
+
+def test_reverse_direction_is_derived(backend):
+    assert backend.translate("merci beaucoup", src="fr", dest="en").text == "thank you very much"
+    assert backend.supports("de", "en") and backend.supports("auto", "de")
+    assert not backend.supports("fr", "de")
+
+
+def test_auto_picks_best_covering_source(backend):
+    assert backend.translate("danke", dest="en").src == "de"
+    assert backend.translate("merci", dest="en").src == "fr"
+    unknown = backend.translate("xyz", dest="en")
+    assert (unknown.text, unknown.src) == ("xyz", "auto")
+
+
+def test_unsupported_pair_returns_input(backend):
+    assert backend.translate("Kaffee", src="de", dest="fr").text == "Kaffee"
+    assert backend.translate("coffee", src="en", dest="en").text == "coffee"
+
+
+def test_batch_matches_single_calls(backend):
+    texts = ["good coffee", "thank you", ""]
+    assert [r.text for r in backend.translate_batch(texts, src="en", dest="de")] == [
+        backend.translate(t, src="en", dest="de").text for t in texts]
+
+
+def test_shipped_phrase_table_loads():
+    backend = create_backend("local")
+    assert backend.translate("Thank you very much", src="en", dest="fr").text == "Merci beaucoup"
+
+
+def test_create_backend():
+    assert isinstance(create_backend("mock", latency=0), MockBackend)
+    with pytest.raises(ValueError):
+        create_backend("nope")
@@ -0,0 +1,94 @@
+import functools
+import json
+import os
+from types import SimpleNamespace
+
+import app
+from app import BatchTranslator, MockBackend
+
+
+class RecordingBackend(MockBackend):
+    """Mock backend that remembers every batch and can fail after some calls"""
+    
+    def __init__(self, fail_after=None):
+        super().__init__(latency=0)
+        self.fail_after = fail_after
+        self.batches = []
+    
+    def translate_batch(self, texts, src="auto", dest="en"):
+        if self.fail_after is not None and len(self.batches) >= self.fail_after:
+            raise ConnectionError("backend down")
+        self.batches.append((list(texts), src))
+        return super().translate_batch(texts, src, dest)
+
+
+def fake_detector(languages):
+    return SimpleNamespace(min_confidence=0.5, detect_many=lambda texts: [
+        languages.get(text, ("en", 0.1)) for text in texts])
+
+
+def test_results_keep_input_order_and_pass_blanks_through():
+    backend = RecordingBackend()
+    engine = BatchTranslator(backend, "fr", batch_size=3, workers=3)
+    texts = [f"line {i}" if i % 4 else "  " for i in range(20)]
+    results = list(engine.translate_records((i, text) for i, text in enumerate(texts)))
+    
+    assert [record for record, *_ in results] == list(range(20))
+    assert [translation for _, _, translation, _ in results] == [
+        f"[fr] {text}" if text.strip() else text for text in texts]
+    assert all(len(batch) <= 3 for batch, _ in backend.batches)
+    assert engine.segments == 20
+
+
+def test_batches_split_by_detected_language_and_size():
+    backend = RecordingBackend()
+    detector = fake_detector({"hola": ("es", 0.9), "adios": ("es", 0.9), "hallo": ("de", 0.4)})
+    engine = BatchTranslator(backend, "en", detector=detector, batch_size=10, max_chars=12, workers=1)
+    texts = ["hola", "adios", "hello", "hallo", "", "a long sentence here"]
+    results = list(engine.translate_records(enumerate(texts)))
+    
+    # Low-confidence guesses stay "auto"; blanks join the current batch
+    assert backend.batches == [(["hola", "adios"], "es"), (["hello", "hallo"], "auto"),
+                               (["a long sentence here"], "auto")]
+    assert [source for *_, source in results] == ["es", "es", "auto", "auto", "auto", "auto"]
+
+
+def run_translate(tmp_path, *extra):
+    return app.main(["--backend", "mock", "translate", str(tmp_path / "input.txt"), "-t", "fr",
+                     "--batch-size", "2", "--workers", "1", "--rate", "1000", *extra])
+
+
+def test_translate_command_resumes_from_checkpoint(tmp_path, monkeypatch):
+    lines = [f"segment {i}" for i in range(9)]
+    (tmp_path / "input.txt").write_text("\n".join(lines) + "\n", encoding="utf-8")
+    output = tmp_path / "input.fr.txt"
+    checkpoint = str(output) + ".checkpoint"
+    monkeypatch.setattr(app, "TranslationWorkerPool",
+                        functools.partial(app.TranslationWorkerPool, retries=0, backoff=0))
+    
+    failing = RecordingBackend(fail_after=2)
+    monkeypatch.setattr(app, "create_backend", lambda name: failing)
+    assert run_translate(tmp_path) == 1
+    with open(checkpoint, encoding="utf-8") as f:
+        state = json.load(f)
+    assert state["done"] == 4
+    # A write torn by the crash is cut off on resume
+    with open(output, "a", encoding="utf-8") as f:
+        f.write("[fr] segm")
+    
+    working = RecordingBackend()
+    monkeypatch.setattr(app, "create_backend", lambda name: working)
+    assert run_translate(tmp_path) == 0
+    assert output.read_text(encoding="utf-8").splitlines() == [f"[fr] {line}" for line in lines]
+    assert [text for batch, _ in working.batches for text in batch] == lines[4:]
+    assert not os.path.exists(checkpoint)
+
+
+def test_translate_command_jsonl_keeps_records(tmp_path, monkeypatch):
+    source = tmp_path / "input.jsonl"
+    source.write_text('{"id": 1, "text": "hello"}\n\n{"id": 2, "body": "x"}\n', encoding="utf-8")
+    monkeypatch.setattr(app, "create_backend", lambda name: RecordingBackend())
+    assert app.main(["translate", str(source), "-t", "de", "--rate", "1000"]) == 0
+    records = [json.loads(line) for line in (tmp_path / "input.de.jsonl").read_text("utf-8").splitlines()]
+    assert records == [{"id": 1, "text": "hello", "translation": "[de] hello", "source_language": "auto"},
+                       {"id": 2, "body": "x", "translation": "", "source_language": "auto"}]
@@ -0,0 +1,97 @@
+import time
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+from app import TranslationCache
+
+
+def test_memory_tier_evicts_least_recently_used():
+    cache = TranslationCache(max_size=2, disk_filename=None)
+    cache.put("one", "en", "fr", "un")
+    cache.put("two", "en", "fr", "deux")
+    assert cache.get("one", "en", "fr") == "un"
+    cache.put("three", "en", "fr", "trois")
+    
+    assert cache.get("two", "en", "fr") is None
+    assert cache.get("one", "en", "fr") == "un"
+    assert cache.get("three", "en", "fr") == "trois"
+    stats = cache.get_stats()
+    assert stats["evictions"] == 1 and stats["size"] == 2
+    assert stats["hits"] == 3 and stats["misses"] == 1 and stats["hit_rate"] == 0.75
+
+
+def test_keys_include_both_languages():
+    cache = TranslationCache(disk_filename=None)
+    cache.put("hello", "en", "fr", "bonjour")
+    assert cache.get("hello", "en", "de") is None
+    assert cache.get("hello", "auto", "fr") is None
+
+
+def test_expired_entries_are_dropped():
+    cache = TranslationCache(ttl=60, disk_filename=None)
+    cache.put_many([("old", "en", "fr", "vieux")], created=time.time() - 120)
+    cache.put("new", "en", "fr", "nouveau")
+    assert cache.get("old", "en", "fr") is None
+    assert cache.get("new", "en", "fr") == "nouveau"
+    assert cache.get_stats()["expired"] == 1
+
+
+def test_disk_tier_survives_restart_and_promotes(tmp_path):
+    path = str(tmp_path / "cache.db")
+    cache = TranslationCache(disk_filename=path)
+    cache.put("hello", "en", "fr", "bonjour")
+    cache.close()
+    
+    cache = TranslationCache(disk_filename=path)
+    assert cache.get("hello", "en", "fr") == "bonjour"
+    assert cache.get("hello", "en", "fr") == "bonjour"
+    stats = cache.get_stats()
+    assert stats["disk_hits"] == 1 and stats["hits"] == 1
+    cache.close()
+
+
+def test_disk_tier_has_its_own_ttl(tmp_path):
+    cache = TranslationCache(ttl=60, disk_ttl=3600, disk_filename=str(tmp_path / "cache.db"))
+    cache.put_many([("recent", "en", "fr", "récent")], created=time.time() - 600)
+    cache.put_many([("stale", "en", "fr", "périmé")], created=time.time() - 7200)
+    assert cache.get("recent", "en", "fr") == "récent"
+    assert cache.get("stale", "en", "fr") is None
+    cache.close()
+
+
+def test_bypass_and_clear(tmp_path):
+    cache = TranslationCache(disk_filename=str(tmp_path / "cache.db"))
+    cache.put("hello", "en", "fr", "bonjour")
+    cache.bypass = True
+    assert cache.get("hello", "en", "fr") is None
+    cache.put("bye", "en", "fr", "au revoir")
+    cache.bypass = False
+    assert cache.get("bye", "en", "fr") is None
+    
+    cache.clear()
+    assert cache.get("hello", "en", "fr") is None
+    assert cache.get_stats()["size"] == 0
+    cache.close()
+
+
+def test_warm_from_history_keeps_ages_and_skips_expired(tmp_path):
+    now = datetime.now()
+    entries = [
+        {"timestamp": (now - timedelta(hours=2)).isoformat(), "source_text": "old",
+         "translated_text": "vieux", "source_language": "en", "target_language": "fr"},
+        {"timestamp": (now - timedelta(minutes=5)).isoformat(), "source_text": "new",
+         "translated_text": "nouveau", "source_language": "en", "target_language": "fr"},
+        {"timestamp": "not a date", "source_text": "bad",
+         "translated_text": "mauvais", "source_language": "en", "target_language": "fr"},
+    ]
+    history = SimpleNamespace(get_recent_translations=lambda limit: entries[-limit:])
+    cache = TranslationCache(ttl=3600, disk_filename=str(tmp_path / "cache.db"))
+    
+    assert cache.warm_from_history(history) == 1
+    assert cache.get("new", "en", "fr") == "nouveau"
+    assert cache.get("old", "en", "fr") is None
+    created = cache._entries[("new", "en", "fr")][1]
+    assert abs(created - (now - timedelta(minutes=5)).timestamp()) < 1
+    # Warming leaves the disk tier untouched
+    assert cache.disk.execute("SELECT COUNT(*) FROM cache").fetchone()[0] == 0
+    cache.close()
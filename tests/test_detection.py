@@ -0,0 +1,107 @@
+import hashlib
+import json
+import os
+import subprocess
+import sys
+
+import numpy as np
+import pytest
+
+from app import LanguageDetector, NgramLanguageModel
+
+
+@pytest.fixture
+def model_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(LanguageDetector, "MODEL_DIR", str(tmp_path))
+    monkeypatch.setattr(LanguageDetector, "MODEL_FILE", str(tmp_path / "language_model.npz"))
+    return tmp_path
+
+
+@pytest.fixture
+def detector(model_dir):
+    return LanguageDetector()
+
+
+def forbid_training(monkeypatch):
+    def train(self, corpus):
+        raise AssertionError("model was retrained")
+    monkeypatch.setattr(LanguageDetector, "train", train)
+
+
+@pytest.mark.parametrize("text, lang", [
+    ("मैं ठीक हूँ", "hi"),
+    ("안녕하세요", "ko"),
+    ("これは日本語です", "ja"),
+    ("你好世界", "zh"),
+    ("สวัสดีครับ", "th"),
+    ("Привет мир", "ru"),
+    ("مرحبا بالعالم", "ar"),
+    ("آپ کیسے ہیں", "ur"),
+])
+def test_script_detection(detector, text, lang):
+    assert detector.detect_with_confidence(text) == (lang, 1.0)
+
+
+def test_mostly_latin_text_goes_to_the_model(detector):
+    assert detector.detect_script("Meeting at 東京 station tomorrow morning") is None
+    assert detector.detect("how are you doing today") == "en"
+
+
+def test_detect_many_matches_single_detection(detector):
+    texts = ["how are you", "bonjour mon ami", "", "मैं ठीक हूँ", "gracias por todo", "   "]
+    assert detector.detect_many(texts) == [detector.detect_with_confidence(t) for t in texts]
+    assert detector.detect_many([""]) == [("en", 0.0)]
+
+
+def test_short_ambiguous_text_is_below_threshold(detector):
+    lang, confidence = detector.detect_with_confidence("hello friend")
+    assert confidence < detector.min_confidence
+
+
+def test_numpy_scorer_matches_sklearn(detector):
+    pytest.importorskip("sklearn")
+    from sklearn.feature_extraction.text import TfidfVectorizer
+    from sklearn.naive_bayes import MultinomialNB
+    from sklearn.pipeline import Pipeline
+    
+    corpus = detector._corpus()
+    pipeline = Pipeline([
+        ('tfidf', TfidfVectorizer(analyzer='char_wb', ngram_range=(1, 3), sublinear_tf=True)),
+        ('clf', MultinomialNB(alpha=0.05))
+    ]).fit([t for lang in corpus for t in corpus[lang]], [lang for lang in corpus for _ in corpus[lang]])
+    texts = ["hello friend", "Guten  Tag\tzusammen", "zzz qqq", "", "Olá, tudo bem?"]
+    model = NgramLanguageModel.from_bytes(NgramLanguageModel.from_pipeline(pipeline).to_bytes())
+    assert list(model.classes_) == list(pipeline.classes_)
+    assert np.allclose(model.predict_proba(texts), pipeline.predict_proba(texts))
+
+
+def test_cached_model_is_reused(detector, monkeypatch):
+    forbid_training(monkeypatch)
+    assert LanguageDetector().detect("how are you doing today") == "en"
+
+
+def test_tampered_cache_is_retrained(detector, model_dir):
+    with open(detector.MODEL_FILE, "ab") as f:
+        f.write(b"tampered")
+    retrained = LanguageDetector()
+    with open(retrained.MODEL_FILE, "rb") as f:
+        data = f.read()
+    with open(retrained.MODEL_FILE + ".json", encoding="utf-8") as f:
+        assert json.load(f)["model_hash"] == hashlib.sha256(data).hexdigest()
+
+
+def test_corpus_change_invalidates_cache(detector, model_dir, monkeypatch):
+    corpus = model_dir / "corpus.json"
+    corpus.write_text(json.dumps({"en": ["good morning"], "fr": ["bonjour"]}), encoding="utf-8")
+    monkeypatch.setattr(LanguageDetector, "CORPUS_FILE", str(corpus))
+    assert sorted(LanguageDetector().model.classes_) == ["en", "fr"]
+
+
+def test_warm_start_does_not_import_sklearn(detector, model_dir):
+    script = ("import sys, app; app.LanguageDetector.MODEL_DIR = sys.argv[1]; "
+              "app.LanguageDetector.MODEL_FILE = sys.argv[2]; app.LanguageDetector().detect('hello'); "
+              "print('sklearn' in sys.modules)")
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    output = subprocess.run([sys.executable, "-c", script, str(model_dir), detector.MODEL_FILE],
+                            cwd=root, capture_output=True, text=True, check=True).stdout
+    assert output.strip() == "False"
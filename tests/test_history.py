@@ -0,0 +1,94 @@
+import json
+import os
+
+import pytest
+
+from app import AppendLogHistoryBackend, TranslationHistory
+
+
+def entry(i):
+    return {"timestamp": f"2024-01-01T00:00:{i:02d}", "source_text": f"text {i}",
+            "translated_text": f"texte {i}", "source_language": "en", "target_language": "fr"}
+
+
+def test_append_log_round_trip(tmp_path):
+    path = str(tmp_path / "history.log")
+    log = AppendLogHistoryBackend(path)
+    log.append_many([entry(i) for i in range(5)])
+    assert log.count() == 5
+    assert [e["source_text"] for e in log.tail(2)] == ["text 3", "text 4"]
+    log.close()
+    
+    log = AppendLogHistoryBackend(path)
+    assert list(log.iter_entries()) == [entry(i) for i in range(5)]
+    log.close()
+
+
+def test_append_log_truncates_torn_tail(tmp_path):
+    path = str(tmp_path / "history.log")
+    log = AppendLogHistoryBackend(path)
+    log.append_many([entry(i) for i in range(3)])
+    log.close()
+    intact = os.path.getsize(path)
+    
+    # Simulate a crash part way through writing a fourth record
+    frame = AppendLogHistoryBackend.HEADER.pack(100, 0) + b'{"timestamp": "2024'
+    with open(path, 'ab') as f:
+        f.write(frame)
+    
+    log = AppendLogHistoryBackend(path)
+    assert os.path.getsize(path) == intact
+    assert log.count() == 3
+    log.append_many([entry(3)])
+    assert [e["source_text"] for e in log.tail(10)] == [f"text {i}" for i in range(4)]
+    log.close()
+
+
+def test_append_log_truncates_corrupt_last_record(tmp_path):
+    path = str(tmp_path / "history.log")
+    log = AppendLogHistoryBackend(path)
+    log.append_many([entry(i) for i in range(3)])
+    log.close()
+    
+    # Flip a payload byte of the last record so its CRC no longer matches
+    with open(path, 'r+b') as f:
+        f.seek(-AppendLogHistoryBackend.TRAILER.size - 3, os.SEEK_END)
+        byte = f.read(1)
+        f.seek(-1, os.SEEK_CUR)
+        f.write(bytes([byte[0] ^ 0xff]))
+    
+    log = AppendLogHistoryBackend(path)
+    assert list(log.iter_entries()) == [entry(0), entry(1)]
+    assert log.count() == 2
+    log.close()
+
+
+@pytest.mark.parametrize("backend", ["sqlite", "log"])
+def test_legacy_json_is_imported_once_and_left_in_place(tmp_path, monkeypatch, backend):
+    monkeypatch.chdir(tmp_path)
+    with open("translation_history.json", "w", encoding="utf-8") as f:
+        json.dump([entry(0), entry(1)], f)
+    
+    history = TranslationHistory(backend=backend)
+    assert history.backend.count() == 2
+    history.add_translation("text 2", "texte 2", "en", "fr")
+    history.close()
+    assert os.path.exists("translation_history.json")
+    
+    history = TranslationHistory(backend=backend)
+    assert [e["source_text"] for e in history.get_recent_translations(10)] == ["text 0", "text 1", "text 2"]
+    history.close()
+
+
+def test_pending_entries_are_visible_before_flush(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    history = TranslationHistory(backend=AppendLogHistoryBackend(str(tmp_path / "history.log")),
+                                 flush_interval=60, batch_size=1000)
+    history.add_translations([("a", "b", "en", "fr")])
+    history.add_translation("c", "d", "en", "fr")
+    assert [e["source_text"] for e in history.get_recent_translations(5)] == ["a", "c"]
+    assert history.backend.count() == 1
+    history.close()
+    log = AppendLogHistoryBackend(str(tmp_path / "history.log"))
+    assert log.count() == 2
+    log.close()
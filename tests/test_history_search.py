@@ -0,0 +1,148 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+
+import pytest
+
+from app import AppendLogHistoryBackend, HistoryBrowser, SQLiteHistoryBackend
+
+TEXTS = [
+    ("Good morning", "Bonjour", "en", "fr"),
+    ("Good night", "Bonne nuit", "en", "fr"),
+    ("Good morning", "Guten Morgen", "en", "de"),
+    ("A coffee please", "Un café s'il vous plaît", "en", "fr"),
+    ("He said \"hi\" AND left", "Il a dit \"salut\" et il est parti", "en", "fr"),
+    ("col:on NEAR(x) -minus star*", "deux-points", "en", "fr"),
+    ("你好世界", "Hello world", "zh", "en"),
+    ("今天天气很好", "The weather is nice today", "zh", "en"),
+    ("สวัสดีครับ", "Hello", "th", "en"),
+    ("Bonjour tout le monde", "Hello everyone", "fr", "en"),
+]
+
+
+def entries(count=3):
+    """Each text repeated `count` times on consecutive days"""
+    result = []
+    for day in range(count):
+        for source, translated, src, dest in TEXTS:
+            result.append({"timestamp": f"2024-03-{day + 1:02d}T12:00:00", "source_text": source,
+                           "translated_text": translated, "source_language": src,
+                           "target_language": dest})
+    return result
+
+
+@pytest.fixture(params=["sqlite", "log"])
+def backend(request, tmp_path):
+    if request.param == "sqlite":
+        backend = SQLiteHistoryBackend(str(tmp_path / "history.db"))
+    else:
+        backend = AppendLogHistoryBackend(str(tmp_path / "history.log"))
+    backend.append_many(entries())
+    yield backend
+    backend.close()
+
+
+@pytest.fixture
+def sqlite(tmp_path):
+    backend = SQLiteHistoryBackend(str(tmp_path / "history.db"))
+    backend.append_many(entries())
+    yield backend
+    backend.close()
+
+
+def sources(results):
+    return [entry["source_text"] for entry in results]
+
+
+def test_results_are_newest_first_with_growing_ids(backend):
+    results = backend.search(limit=5)
+    assert [entry["id"] for entry in results] == [30, 29, 28, 27, 26]
+    assert backend.count_matching() == 30
+
+
+def test_every_word_must_match_in_either_column(backend):
+    results = backend.search("good bonjour", limit=100)
+    assert sources(results) == ["Good morning"] * 3
+    assert backend.count_matching("GOOD morning") == 6
+
+
+def test_language_and_date_filters(backend):
+    assert backend.count_matching(source_lang="zh") == 6
+    assert backend.count_matching(source_lang="en", target_lang="de") == 3
+    assert backend.count_matching(since="2024-03-02", until="2024-03-03") == 10
+    results = backend.search("good", target_lang="fr", since="2024-03-03", limit=100)
+    assert sources(results) == ["Good night", "Good morning"]
+
+
+def test_unspaced_scripts_match_inside_words(backend):
+    assert backend.count_matching("世界") == 3
+    assert backend.count_matching("天气") == 3
+    assert backend.count_matching("สวัสดี") == 3
+    assert backend.count_matching("世界 hello") == 3
+
+
+def test_keyset_pages_match_offset_pages(backend):
+    offset_pages = [backend.search(offset=offset, limit=7) for offset in range(0, 30, 7)]
+    keyset_pages, before = [], None
+    while True:
+        page = backend.search(limit=7, before=before)
+        if not page:
+            break
+        keyset_pages.append(page)
+        before = page[-1]["id"]
+    assert keyset_pages == offset_pages
+    assert backend.search("good", limit=100, before=15) == [
+        entry for entry in backend.search("good", limit=100) if entry["id"] < 15]
+
+
+@pytest.mark.parametrize("query", ['"hi"', '"', 'AND', 'col:on', 'NEAR(x)', '-minus', 'star*', "s'il"])
+def test_query_syntax_is_matched_literally(sqlite, query):
+    results = sqlite.search(query, limit=100)
+    assert len(results) == sqlite.count_matching(query) > 0
+
+
+def test_prefix_and_diacritic_insensitive_matching(sqlite):
+    assert sqlite.count_matching("morn") == 6
+    assert sqlite.count_matching("cafe") == 3
+    assert sqlite.count_matching("plait") == 3
+
+
+def test_like_fallback_without_fts(sqlite):
+    sqlite.fts = False
+    assert sqlite.count_matching("good morning") == 6
+    assert sources(sqlite.search("世界", limit=1)) == ["你好世界"]
+
+
+def test_full_text_index_is_backfilled_for_existing_databases(tmp_path):
+    path = str(tmp_path / "history.db")
+    backend = SQLiteHistoryBackend(path)
+    backend.append_many(entries(1))
+    backend.conn.execute("DROP TABLE history_fts")
+    backend.conn.commit()
+    backend.close()
+    
+    backend = SQLiteHistoryBackend(path)
+    assert backend.fts and backend.count_matching("night") == 1
+    backend.close()
+
+
+def test_closing_the_browser_stops_its_fetcher():
+    browser = object.__new__(HistoryBrowser)
+    browser.search_generation = 1
+    browser.search_job = None
+    destroyed = []
+    browser.window = SimpleNamespace(destroy=lambda: destroyed.append(True))
+    browser.fetcher = ThreadPoolExecutor(max_workers=1, thread_name_prefix="history-pages")
+    release = threading.Event()
+    running = browser.fetcher.submit(release.wait, 5)
+    queued = browser.fetcher.submit(lambda: None)
+    
+    browser.close()
+    assert destroyed and browser.search_generation == 2
+    assert queued.cancelled()
+    release.set()
+    running.result(timeout=5)
+    for thread in threading.enumerate():
+        if thread.name.startswith("history-pages"):
+            thread.join(timeout=5)
+            assert not thread.is_alive()
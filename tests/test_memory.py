@@ -0,0 +1,152 @@
+import threading
+from types import SimpleNamespace
+
+import numpy as np
+
+import app
+from app import SegmentTranslator, TranslationMemory
+
+SENTENCE = "The quick brown fox jumps over the lazy dog near the river bank"
+
+
+def filler(count):
+    for i in range(count):
+        yield f"Unrelated filler sentence number {i} about item {i * 7}", f"filler {i}"
+
+
+def assert_index_is_sorted(memory):
+    count = len(memory)
+    assert memory._indexed == count
+    for band in range(memory.BANDS):
+        keys = memory._sorted_keys[band]
+        assert np.array_equal(keys, np.sort(memory._keys[:count, band]))
+        assert np.array_equal(memory._keys[memory._sorted_ids[band], band], keys)
+        assert sorted(memory._sorted_ids[band].tolist()) == list(range(count))
+
+
+def test_exact_match_ignores_case_and_whitespace():
+    memory = TranslationMemory()
+    memory.add("Hello   World", "Bonjour le monde", "en", "fr")
+    match = memory.lookup("  hello world ", "en", "fr")
+    assert (match.translated_text, match.score) == ("Bonjour le monde", 1.0)
+
+
+def test_fuzzy_match_before_and_after_reindex():
+    memory = TranslationMemory()
+    memory.add(SENTENCE, "translated", "en", "fr")
+    near = SENTENCE.replace("jumps", "jumped")
+    match = memory.lookup(near, "en", "fr")
+    assert match.translated_text == "translated"
+    assert memory.threshold <= match.score < 1.0
+    assert memory.lookup("Something else entirely", "en", "fr") is None
+    
+    memory._reindex()
+    assert memory._indexed == 1
+    assert memory.lookup(near, "en", "fr").translated_text == "translated"
+
+
+def test_language_pairs_are_isolated():
+    memory = TranslationMemory()
+    memory.add(SENTENCE, "en-fr", "en", "fr")
+    memory._reindex()
+    near = SENTENCE.replace("jumps", "jumped")
+    assert memory.lookup(near, "en", "de") is None
+    assert memory.lookup(SENTENCE, "es", "fr") is None
+    assert memory.lookup(near, "en", "fr").translated_text == "en-fr"
+
+
+def test_auto_source_and_blank_text_are_not_remembered():
+    memory = TranslationMemory()
+    memory.add(SENTENCE, "translated", "auto", "fr")
+    memory.add("   ", "blank", "en", "fr")
+    assert len(memory) == 0
+    assert memory.lookup(SENTENCE, "auto", "fr") is None
+
+
+def test_duplicate_replaces_target():
+    memory = TranslationMemory()
+    memory.add("Hello", "Salut", "en", "fr")
+    memory.add("hello", "Bonjour", "en", "fr")
+    assert len(memory) == 1
+    assert memory.lookup("Hello", "en", "fr").translated_text == "Bonjour"
+
+
+def test_build_from_history_aligns_segments():
+    entries = [
+        {"source_text": "Good morning. See you later.", "translated_text": "Bonjour. À plus tard.",
+         "source_language": "en", "target_language": "fr"},
+        # Uneven split: remembered as a whole
+        {"source_text": "One. Two.", "translated_text": "Un et deux.",
+         "source_language": "en", "target_language": "fr"},
+    ]
+    history = SimpleNamespace(backend=SimpleNamespace(iter_entries=lambda: iter(entries)))
+    memory = TranslationMemory()
+    assert memory.build_from_history(history) == 3
+    assert memory.lookup("See you later.", "en", "fr").translated_text == "À plus tard."
+    assert memory.lookup("One. Two.", "en", "fr").translated_text == "Un et deux."
+    assert_index_is_sorted(memory)
+
+
+def test_incremental_reindex_matches_a_full_sort():
+    memory = TranslationMemory()
+    for source, target in filler(50):
+        memory.add(source, target, "en", "fr", reindex=False)
+    memory._reindex()
+    for source, target in filler(130):
+        memory.add(source + " again", target, "en", "fr", reindex=False)
+    memory._reindex()
+    assert_index_is_sorted(memory)
+    assert memory.lookup("Unrelated filler sentence number 7 about item 49 again",
+                         "en", "fr").translated_text == "filler 7"
+
+
+def test_background_reindex_does_not_block_lookups(monkeypatch):
+    memory = TranslationMemory()
+    memory.REINDEX_EVERY = 16
+    merging, release = threading.Event(), threading.Event()
+    real_insert = np.insert
+    
+    def slow_insert(*args):
+        merging.set()
+        assert release.wait(timeout=5)
+        return real_insert(*args)
+    
+    monkeypatch.setattr(app.np, "insert", slow_insert)
+    memory.add(SENTENCE, "translated", "en", "fr")
+    for source, target in filler(15):
+        memory.add(source, target, "en", "fr")
+    assert merging.wait(timeout=5)
+    
+    # The merge is stalled, yet lookups and adds still go through
+    assert memory.lookup(SENTENCE.replace("jumps", "jumped"), "en", "fr").translated_text == "translated"
+    memory.add("Added during the merge", "pendant", "en", "fr")
+    assert memory.lookup("Added during the merge", "en", "fr").score == 1.0
+    
+    release.set()
+    for thread in threading.enumerate():
+        if thread.name == "memory-reindex":
+            thread.join(timeout=5)
+    assert memory._indexed == 16 and not memory._reindexing
+    memory._reindex()
+    assert_index_is_sorted(memory)
+
+
+def test_segment_translator_applies_or_suggests_memory_matches():
+    memory = TranslationMemory()
+    memory.add(SENTENCE, "remembered", "en", "fr")
+    translator = SegmentTranslator(app.MockBackend(latency=0), memory=memory)
+    near = SENTENCE.replace("jumps", "jumped")
+    rendered, _, stats = translator.translate(near, "en", "fr")
+    assert rendered == [f"[fr] {near}"]
+    assert stats["memory"] == 0
+    assert [(index, match.translated_text) for index, match in stats["suggestions"]] == [(0, "remembered")]
+    
+    # The backend's translation was remembered as an exact match
+    assert memory.lookup(near, "en", "fr").translated_text == f"[fr] {near}"
+    
+    memory = TranslationMemory(auto_apply_threshold=0.7)
+    memory.add(SENTENCE, "remembered", "en", "fr")
+    translator = SegmentTranslator(app.MockBackend(latency=0), memory=memory)
+    rendered, _, stats = translator.translate(near, "en", "fr")
+    assert rendered == ["remembered"]
+    assert stats["memory"] == 1
@@ -0,0 +1,88 @@
+import json
+
+import pytest
+
+from app import Metrics
+
+
+def test_disabled_metrics_record_nothing():
+    metrics = Metrics()
+    metrics.count("requests")
+    metrics.observe("backend", 0.1)
+    with metrics.timer("render"):
+        pass
+    assert metrics.snapshot()["counters"] == {} and metrics.snapshot()["stages"] == {}
+
+
+def test_percentiles_and_counters():
+    metrics = Metrics(enabled=True)
+    for ms in range(100, 0, -1):
+        metrics.observe("backend", ms / 1000)
+    metrics.count("cache_hits")
+    metrics.count("cache_hits", 2)
+    
+    snapshot = metrics.snapshot()
+    assert snapshot["counters"] == {"cache_hits": 3}
+    stage = snapshot["stages"]["backend"]
+    assert stage["count"] == 100
+    assert stage["mean"] == pytest.approx(0.0505)
+    assert (stage["p50"], stage["p95"], stage["p99"], stage["max"]) == (0.051, 0.096, 0.1, 0.1)
+
+
+def test_window_bounds_samples_but_not_totals():
+    metrics = Metrics(enabled=True)
+    for _ in range(Metrics.WINDOW):
+        metrics.observe("asr", 1.0)
+    for _ in range(Metrics.WINDOW):
+        metrics.observe("asr", 0.001)
+    stage = metrics.snapshot()["stages"]["asr"]
+    assert stage["count"] == 2 * Metrics.WINDOW
+    assert stage["mean"] == pytest.approx(0.5005)
+    assert stage["max"] == 0.001
+
+
+def test_timer_records_a_sample():
+    metrics = Metrics(enabled=True)
+    with metrics.timer("render"):
+        pass
+    stage = metrics.snapshot()["stages"]["render"]
+    assert stage["count"] == 1 and stage["max"] >= 0
+
+
+def test_prometheus_export():
+    metrics = Metrics(enabled=True)
+    metrics.count("history_entries", 5)
+    metrics.observe("mt", 0.25)
+    metrics.observe("mt", 0.75)
+    assert metrics.to_prometheus().splitlines() == [
+        "# TYPE translator_history_entries_total counter",
+        "translator_history_entries_total 5",
+        "# TYPE translator_mt_seconds summary",
+        'translator_mt_seconds{quantile="0.5"} 0.750000',
+        'translator_mt_seconds{quantile="0.95"} 0.750000',
+        'translator_mt_seconds{quantile="0.99"} 0.750000',
+        "translator_mt_seconds_sum 1.000000",
+        "translator_mt_seconds_count 2",
+    ]
+
+
+def test_dump_writes_json_and_prometheus(tmp_path):
+    metrics = Metrics(enabled=True)
+    metrics.observe("detect", 0.002)
+    metrics.dump(str(tmp_path / "metrics.json"))
+    metrics.dump(str(tmp_path / "metrics.prom"), "prometheus")
+    data = json.loads((tmp_path / "metrics.json").read_text())
+    assert data["stages"]["detect"]["count"] == 1
+    assert "translator_detect_seconds_count 1" in (tmp_path / "metrics.prom").read_text()
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["metrics.json", "metrics.prom"]
+
+
+def test_reset_and_table():
+    metrics = Metrics(enabled=True)
+    metrics.observe("render", 0.004)
+    metrics.count("ui_stalls")
+    table = metrics.format_table().splitlines()
+    assert table[1].split() == ["render", "1", "4.0", "4.0", "4.0", "4.0"]
+    assert table[-1].split() == ["ui_stalls", "1"]
+    metrics.reset()
+    assert metrics.snapshot()["stages"] == {}
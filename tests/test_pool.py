@@ -0,0 +1,104 @@
+import threading
+import time
+
+import pytest
+
+import app
+from app import MockBackend, TokenBucket, TranslationWorkerPool
+
+
+class FakeClock:
+    """Stands in for app's time module: sleeping just advances the clock"""
+    
+    def __init__(self):
+        self.now = 1000.0
+        self.sleeps = []
+    
+    def monotonic(self):
+        return self.now
+    
+    def sleep(self, seconds):
+        # Like a real sleep, never return without time having passed
+        self.sleeps.append(seconds)
+        self.now += max(seconds, 1e-6)
+    
+    def __getattr__(self, name):
+        return getattr(time, name)
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(app, "time", clock)
+    return clock
+
+
+def test_bucket_allows_burst_then_throttles_to_rate(clock):
+    bucket = TokenBucket(rate=10, capacity=5)
+    bucket.acquire(5)
+    assert clock.sleeps == []
+    
+    started = clock.now
+    bucket.acquire(20)
+    assert clock.now - started == pytest.approx(2.0)
+
+
+def test_bucket_refills_while_idle_up_to_capacity(clock):
+    bucket = TokenBucket(rate=2, capacity=4)
+    bucket.acquire(4)
+    clock.now += 60
+    bucket.acquire(4)
+    assert clock.sleeps == []
+    bucket.acquire()
+    assert sum(clock.sleeps) == pytest.approx(0.5)
+
+
+class FlakyBackend(MockBackend):
+    def __init__(self, failures):
+        super().__init__(latency=0)
+        self.failures = failures
+    
+    def translate_batch(self, texts, src="auto", dest="en"):
+        if self.failures:
+            self.failures -= 1
+            raise ConnectionError("temporary failure")
+        return super().translate_batch(texts, src, dest)
+
+
+def test_pool_retries_with_backoff(clock):
+    pool = TranslationWorkerPool(FlakyBackend(failures=2), rate=1000, burst=1000, retries=3, backoff=0.5)
+    assert pool.translate("hello", src="en", dest="fr").text == "[fr] hello"
+    assert pool.stats == {"requests": 3, "retries": 2, "failures": 0}
+    # Exponential backoff with up to 50% jitter
+    assert 0.5 <= clock.sleeps[0] <= 0.75 and 1.0 <= clock.sleeps[1] <= 1.5
+
+
+def test_pool_splits_batches_to_backend_limits():
+    backend = MockBackend(latency=0)
+    backend.max_batch_size = 3
+    backend.max_chars = 10
+    pool = TranslationWorkerPool(backend, rate=1000, burst=1000)
+    texts = ["aaaa", "bbbb", "cc", "d", "e", "f", "gggggggggggg", "h"]
+    assert list(pool.chunks(texts)) == [["aaaa", "bbbb", "cc"], ["d", "e", "f"],
+                                        ["gggggggggggg"], ["h"]]
+    results = pool.translate_batch(texts, src="en", dest="de")
+    assert [r.text for r in results] == [f"[de] {t}" for t in texts]
+    assert backend.calls == 4
+
+
+def test_pool_workers_share_the_backend():
+    backend = MockBackend(latency=0)
+    pool = TranslationWorkerPool(backend, workers=3, rate=1000, burst=1000)
+    done = []
+    lock = threading.Lock()
+    
+    def work():
+        result = pool.translate(threading.current_thread().name, dest="fr")
+        with lock:
+            done.append(result.text)
+    
+    pool.start(work)
+    for thread in pool.threads:
+        thread.join(timeout=5)
+    assert sorted(done) == [f"[fr] translation-worker-{i}" for i in range(3)]
+    assert backend.calls == 3
@@ -0,0 +1,136 @@
+import pytest
+
+from app import (BackendError, BackendUnavailable, CircuitBreaker, JournalReplayer, MockBackend,
+                 RequestJournal, TranslationWorkerPool)
+
+
+def expire(breaker):
+    """Pretend the breaker's open timeout has elapsed"""
+    breaker.opened_at -= breaker.timeout
+
+
+def test_breaker_opens_after_threshold():
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=5.0)
+    breaker.record_failure()
+    assert breaker.state == "closed" and breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == "open"
+    assert not breaker.allow()
+    assert 0 < breaker.retry_after() <= 5.0
+
+
+def test_breaker_half_open_allows_one_probe():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=5.0)
+    breaker.record_failure()
+    expire(breaker)
+    assert breaker.allow()
+    assert breaker.state == "half-open"
+    assert not breaker.allow()
+    breaker.record_success()
+    assert breaker.state == "closed" and breaker.failures == 0
+    assert breaker.allow()
+
+
+def test_breaker_backs_off_on_failed_probe():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=1.0, max_timeout=3.0)
+    breaker.record_failure()
+    for expected in (2.0, 3.0, 3.0):
+        expire(breaker)
+        assert breaker.allow()
+        breaker.record_failure()
+        assert breaker.state == "open" and breaker.timeout == expected
+    expire(breaker)
+    assert breaker.allow()
+    breaker.record_success()
+    assert breaker.timeout == 1.0
+
+
+def new_pool(backend, breaker=None):
+    return TranslationWorkerPool(backend, workers=1, rate=1000, burst=1000, retries=0,
+                                 backoff=0, breaker=breaker)
+
+
+def test_pool_wraps_failures_and_fails_fast_when_open():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=60.0)
+    pool = new_pool(MockBackend(latency=0, failure_rate=1.0), breaker)
+    with pytest.raises(BackendError) as error:
+        pool.translate_batch(["hello"], src="en", dest="fr")
+    assert isinstance(error.value.__cause__, ConnectionError)
+    with pytest.raises(BackendUnavailable):
+        pool.translate_batch(["hello"], src="en", dest="fr")
+    assert pool.backend.calls == 1
+
+
+def test_journal_dedupes_and_keeps_one_draft_per_field(tmp_path):
+    journal = RequestJournal(str(tmp_path / "journal.db"))
+    assert journal.append("Hello", "en", "fr")
+    assert not journal.append("Hello", "en", "fr")
+    assert journal.append("Hel", "en", "fr", field="input")
+    assert journal.append("Hello wor", "en", "fr", field="input")
+    assert journal.count() == 2
+    
+    journal.discard("input")
+    assert journal.next_batch() == ("en", "fr", [(1, "Hello")])
+    journal.close()
+    
+    journal = RequestJournal(str(tmp_path / "journal.db"))
+    assert journal.count() == 1
+    journal.close()
+
+
+def test_pending_request_takes_the_new_field(tmp_path):
+    journal = RequestJournal(str(tmp_path / "journal.db"))
+    assert journal.append("Hello", "en", "fr")
+    assert journal.append("Bye", "en", "fr", field="output")
+    # Already pending: the row keeps its place but is now the field's draft
+    assert not journal.append("Hello", "en", "fr", field="input")
+    assert not journal.append("Bye", "en", "fr", field="output")
+    assert journal.next_batch() == ("en", "fr", [(1, "Hello"), (2, "Bye")])
+    
+    journal.discard("input")
+    assert journal.next_batch() == ("en", "fr", [(2, "Bye")])
+    journal.discard("output")
+    assert journal.count() == 0
+    journal.close()
+
+
+def test_replay_drains_journal_per_language_pair(tmp_path):
+    journal = RequestJournal(str(tmp_path / "journal.db"))
+    for text, source, target in [("one", "en", "fr"), ("uno", "es", "en"),
+                                 ("two", "en", "fr"), ("three", "en", "fr")]:
+        journal.append(text, source, target)
+    delivered = []
+    replayer = JournalReplayer(journal, new_pool(MockBackend(latency=0)), delivered.extend,
+                               batch_size=2)
+    
+    assert replayer.replay_once() == 2
+    assert delivered == [("one", "[fr] one", "en", "fr"), ("two", "[fr] two", "en", "fr")]
+    assert replayer.replay_once() == 1
+    assert delivered[-1] == ("uno", "[en] uno", "es", "en")
+    assert replayer.replay_once() == 1
+    assert replayer.replay_once() == 0
+    assert journal.count() == 0
+    assert replayer.stats == {"replayed": 4, "batches": 3, "failed_batches": 0}
+    journal.close()
+
+
+def test_replay_keeps_requests_until_backend_recovers(tmp_path):
+    journal = RequestJournal(str(tmp_path / "journal.db"))
+    journal.append("hello", "en", "fr")
+    backend = MockBackend(latency=0, failure_rate=1.0)
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=60.0)
+    delivered = []
+    replayer = JournalReplayer(journal, new_pool(backend, breaker), delivered.extend)
+    
+    with pytest.raises(BackendError):
+        replayer.replay_once()
+    with pytest.raises(BackendUnavailable):
+        replayer.replay_once()
+    assert journal.count() == 1 and replayer.stats["failed_batches"] == 2
+    
+    backend.failure_rate = 0.0
+    expire(breaker)
+    assert replayer.replay_once() == 1
+    assert delivered == [("hello", "[fr] hello", "en", "fr")]
+    assert journal.count() == 0 and breaker.state == "closed"
+    journal.close()
@@ -0,0 +1,44 @@
+from app import TranslationScheduler
+
+
+def test_latest_submit_per_field_wins():
+    scheduler = TranslationScheduler()
+    scheduler.submit("input", "H", "auto", "fr")
+    scheduler.submit("input", "He", "auto", "fr")
+    generation = scheduler.submit("input", "Hello", "auto", "fr")
+    
+    assert scheduler.next_request(timeout=0) == ("input", generation, "Hello", "auto", "fr")
+    assert scheduler.next_request(timeout=0) is None
+    assert scheduler.is_current("input", generation)
+
+
+def test_fields_are_served_oldest_first():
+    scheduler = TranslationScheduler()
+    scheduler.submit("a", "one", "en", "fr")
+    scheduler.submit("b", "two", "en", "de")
+    scheduler.submit("a", "one more", "en", "fr")
+    
+    assert scheduler.next_request(timeout=0)[:3] == ("a", 2, "one more")
+    assert scheduler.next_request(timeout=0)[:3] == ("b", 1, "two")
+
+
+def test_in_flight_result_goes_stale():
+    scheduler = TranslationScheduler()
+    scheduler.submit("input", "Hello", "en", "fr")
+    field, generation = scheduler.next_request(timeout=0)[:2]
+    scheduler.submit(field, "Hello world", "en", "fr")
+    assert not scheduler.is_current(field, generation)
+    
+    scheduler.invalidate(field)
+    assert scheduler.next_request(timeout=0) is None
+
+
+def test_debounce_follows_latency():
+    scheduler = TranslationScheduler(initial_delay=1000, min_delay=250, max_delay=2000)
+    assert scheduler.debounce_delay() == 1000
+    scheduler.record_latency(0.01)
+    assert scheduler.debounce_delay() == 250
+    scheduler.record_latency(5.0, weight=1.0)
+    assert scheduler.debounce_delay() == 2000
+    scheduler.record_latency(0.3, weight=1.0)
+    assert scheduler.debounce_delay() == 600
@@ -0,0 +1,278 @@
+import itertools
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+
+from app import (MockBackend, RealTimeTranslatorApp, SegmentTranslator, TranslationCache, split_clauses,
+                 split_segments)
+
+
+def test_split_segments_on_sentences_and_lines():
+    assert split_segments("Hello there. How are you?\nFine") == [
+        ("Hello there.", " "), ("How are you?", "\n"), ("Fine", "")]
+
+
+def test_split_segments_without_breaks():
+    assert split_segments("No break here") == [("No break here", "")]
+    assert split_segments("") == []
+
+
+def test_split_segments_unspaced_punctuation():
+    assert split_segments("你好。再见！") == [("你好。", ""), ("再见！", "")]
+
+
+def test_split_segments_urdu_and_hindi():
+    assert split_segments("آپ کیسے ہیں؟ میں ٹھیک ہوں۔ Thank you.") == [
+        ("آپ کیسے ہیں؟", " "), ("میں ٹھیک ہوں۔", " "), ("Thank you.", "")]
+    assert split_segments("मैं ठीक हूँ। How are you?") == [("मैं ठीक हूँ।", " "), ("How are you?", "")]
+
+
+def test_split_clauses():
+    assert split_clauses("Main theek hoon, but आज बहुत काम है; kal milte hain - see you") == [
+        ("Main theek hoon,", " "), ("but आज बहुत काम है;", " "), ("kal milte hain", " - "), ("see you", "")]
+    assert split_clauses("یہ اچھا ہے، lekin mehnga") == [("یہ اچھا ہے،", " "), ("lekin mehnga", "")]
+    assert split_clauses("你好，再见") == [("你好，", ""), ("再见", "")]
+    assert split_clauses("well-known") == [("well-known", "")]
+
+
+def test_split_segments_rejoins_losslessly():
+    text = "One. Two!  Three?\n\n  Four\tfive. "
+    assert "".join(s + sep for s, sep in split_segments(text)) == text
+
+
+class FakeText:
+    """Single-widget stand-in for tk.Text: text, marks and mark gravity"""
+    
+    def __init__(self):
+        self.text = ""
+        self.marks = {}  # name -> [offset, gravity]
+    
+    def _offset(self, index):
+        index = str(index)
+        if index in self.marks:
+            return self.marks[index][0]
+        if index in ("end", "end-1c"):
+            return len(self.text)
+        line, column = map(int, index.split("."))
+        lines = self.text.split("\n")
+        return sum(len(l) + 1 for l in lines[:line - 1]) + min(column, len(lines[line - 1]))
+    
+    def index(self, index):
+        offset = self._offset(index)
+        before = self.text[:offset]
+        return f"{before.count(chr(10)) + 1}.{offset - before.rfind(chr(10)) - 1}"
+    
+    def delete(self, start, end):
+        start, end = self._offset(start), self._offset(end)
+        self.text = self.text[:start] + self.text[end:]
+        for mark in self.marks.values():
+            if mark[0] > end:
+                mark[0] -= end - start
+            elif mark[0] > start:
+                mark[0] = start
+    
+    def insert(self, index, text):
+        offset = self._offset(index)
+        self.text = self.text[:offset] + text + self.text[offset:]
+        for mark in self.marks.values():
+            if mark[0] > offset or (mark[0] == offset and mark[1] == "right"):
+                mark[0] += len(text)
+    
+    def mark_set(self, name, index):
+        self.marks[name] = [self._offset(index), "right"]
+    
+    def mark_gravity(self, name, gravity):
+        self.marks[name][1] = gravity
+    
+    def mark_unset(self, name):
+        del self.marks[name]
+
+
+def render(view, segments):
+    RealTimeTranslatorApp.render_segments(view, segments)
+    for segment, mark in view.rendered_segments:
+        start = view.output_text.marks[mark][0]
+        assert view.output_text.text[start:start + len(segment)] == segment
+    assert set(view.output_text.marks) == {mark for _, mark in view.rendered_segments}
+    return view.output_text.text
+
+
+def new_view():
+    return SimpleNamespace(output_text=FakeText(), rendered_segments=[],
+                           segment_mark_ids=itertools.count())
+
+
+def test_render_segments_first_render():
+    view = new_view()
+    assert render(view, ["Bonjour. ", "Ça va?\n", "Bien"]) == "Bonjour. Ça va?\nBien"
+
+
+def test_render_segments_rewrites_only_changed_middle():
+    view = new_view()
+    render(view, ["A. ", "B. ", "C. ", "D"])
+    kept = [mark for _, mark in view.rendered_segments]
+    
+    assert render(view, ["A. ", "X. ", "Y. ", "C. ", "D"]) == "A. X. Y. C. D"
+    marks = [mark for _, mark in view.rendered_segments]
+    assert marks[0] == kept[0] and marks[3:] == kept[2:]
+    assert kept[1] not in view.output_text.marks
+
+
+def test_render_segments_edits_at_both_ends():
+    view = new_view()
+    render(view, ["one\n", "two\n", "three"])
+    assert render(view, ["zero\n", "one\n", "two\n", "three"]) == "zero\none\ntwo\nthree"
+    assert render(view, ["zero\n", "one\n", "two\n", "three\n", "four"]) == "zero\none\ntwo\nthree\nfour"
+    assert render(view, ["one\n", "two\n"]) == "one\ntwo\n"
+    assert render(view, ["one\n", "two\n", "two\n"]) == "one\ntwo\ntwo\n"
+    assert render(view, []) == ""
+    assert render(view, ["again"]) == "again"
+
+
+class RecordingBackend(MockBackend):
+    def __init__(self):
+        super().__init__(latency=0)
+        self.batches = []
+    
+    def translate_batch(self, texts, src="auto", dest="en"):
+        self.batches.append((list(texts), src))
+        return super().translate_batch(texts, src, dest)
+
+
+def test_only_changed_segments_are_retranslated():
+    backend = RecordingBackend()
+    translator = SegmentTranslator(backend)
+    rendered, _, stats = translator.translate("One. Two. Three.", "en", "fr")
+    assert rendered == ["[fr] One. ", "[fr] Two. ", "[fr] Three."]
+    assert stats["translated"] == 3
+    
+    rendered, _, stats = translator.translate("One. Deux. Three.", "en", "fr")
+    assert rendered == ["[fr] One. ", "[fr] Deux. ", "[fr] Three."]
+    assert backend.batches[-1] == (["Deux."], "en")
+    assert (stats["translated"], stats["reused"]) == (1, 2)
+
+
+def test_reuse_is_per_target_and_source_language():
+    backend = RecordingBackend()
+    translator = SegmentTranslator(backend)
+    translator.translate("One. Two.", "en", "fr")
+    translator.translate("One. Two.", "en", "de")
+    translator.translate("One. Two.", "es", "fr")
+    assert [src for _, src in backend.batches] == ["en", "en", "es"]
+    _, _, stats = translator.translate("One. Two.", "en", "de")
+    assert stats["translated"] == 0 and len(backend.batches) == 3
+
+
+def test_repeated_segments_are_sent_once():
+    backend = RecordingBackend()
+    rendered, _, stats = SegmentTranslator(backend).translate("Hello. Hello. Hello.", "en", "fr")
+    assert backend.batches == [(["Hello."], "en")]
+    assert rendered == ["[fr] Hello. ", "[fr] Hello. ", "[fr] Hello."]
+    assert (stats["translated"], stats["reused"]) == (1, 2)
+
+
+def test_cache_fills_segments_across_translators():
+    cache = TranslationCache(disk_filename=None)
+    SegmentTranslator(RecordingBackend(), cache=cache).translate("Good morning. Bye.", "en", "fr")
+    backend = RecordingBackend()
+    rendered, _, stats = SegmentTranslator(backend, cache=cache).translate("Bye. Hi.", "en", "fr")
+    assert rendered == ["[fr] Bye. ", "[fr] Hi."]
+    assert backend.batches == [(["Hi."], "en")]
+
+
+class WordDetector:
+    """Spanish if a clause says "hola", English otherwise"""
+    
+    min_confidence = 0.8
+    
+    def __init__(self):
+        self.calls = 0
+    
+    def detect_many(self, texts):
+        self.calls += 1
+        return [("es" if "hola" in text.lower() else "en", 0.99) for text in texts]
+
+
+def test_fanout_detects_clause_languages_once():
+    backend = RecordingBackend()
+    detector = WordDetector()
+    translator = SegmentTranslator(backend, detector=detector)
+    split = []
+    
+    def units(text, source_lang):
+        split.append(text)
+        return SegmentTranslator.units(translator, text, source_lang)
+    
+    translator.units = units
+    view = object.__new__(RealTimeTranslatorApp)
+    view.segment_translator = translator
+    view.fanout_executor = ThreadPoolExecutor(max_workers=3)
+    delivered = []
+    view.ui = SimpleNamespace(post=lambda callback, *args: delivered.append(args),
+                              post_latest=lambda *args: None)
+    view.translation_scheduler = SimpleNamespace(is_current=lambda kind, generation: True)
+    view.request_journal = SimpleNamespace(discard=lambda field: None)
+    view.history = SimpleNamespace(add_translations=lambda translations: None)
+    
+    view.translate_fanout(1, "Hola amigo, how are you?", SegmentTranslator.MIXED, ["fr", "de", "it"])
+    view.fanout_executor.shutdown()
+    assert split == ["Hola amigo, how are you?"] and detector.calls == 1
+    assert sorted(args[1] for args in delivered) == ["de", "fr", "it"]
+    assert sorted(src for _, src in backend.batches) == ["en"] * 3 + ["es"] * 3
+
+
+class ScriptDetector:
+    """Hindi for Devanagari, Urdu for Arabic script, English otherwise; unsure of "OK" """
+    
+    min_confidence = 0.8
+    
+    def __init__(self):
+        self.batches = []
+    
+    def detect_many(self, texts):
+        self.batches.append(list(texts))
+        results = []
+        for text in texts:
+            if any("\u0900" <= char <= "\u097f" for char in text):
+                results.append(("hi", 0.99))
+            elif any("\u0600" <= char <= "\u06ff" for char in text):
+                results.append(("ur", 0.99))
+            else:
+                results.append(("en", 0.3 if text.strip(",. ") == "OK" else 0.99))
+        return results
+
+
+def test_mixed_units_group_adjacent_clauses_by_language():
+    detector = ScriptDetector()
+    translator = SegmentTranslator(RecordingBackend(), detector=detector)
+    text = "I am fine, लेकिन आज बहुत काम है, OK, so see you. آپ کیسے ہیں؟"
+    assert translator.units(text, SegmentTranslator.MIXED) == [
+        ("I am fine,", " ", "en"), ("लेकिन आज बहुत काम है, OK,", " ", "hi"), ("so see you.", " ", "en"),
+        ("آپ کیسے ہیں؟", "", "ur")]
+    # All clauses of the document are detected in one call
+    assert len(detector.batches) == 1 and len(detector.batches[0]) == 5
+    
+    # Unchanged clauses are not detected again
+    translator.units(text + " Bye.", SegmentTranslator.MIXED)
+    assert detector.batches[1] == ["Bye."]
+
+
+def test_mixed_without_detector_falls_back_to_auto():
+    translator = SegmentTranslator(RecordingBackend())
+    assert translator.units("One, two. Three.", SegmentTranslator.MIXED) == [
+        ("One, two.", " ", "auto"), ("Three.", "", "auto")]
+
+
+def test_mixed_translation_batches_each_language():
+    backend = RecordingBackend()
+    translator = SegmentTranslator(backend, detector=ScriptDetector())
+    text = "Good morning, मैं ठीक हूँ। See you soon, have fun."
+    rendered, source, stats = translator.translate(text, SegmentTranslator.MIXED, "fr")
+    assert "".join(rendered) == "[fr] Good morning, [fr] मैं ठीक हूँ। [fr] See you soon, have fun."
+    assert sorted(backend.batches) == [(["Good morning,", "See you soon, have fun."], "en"),
+                                       (["मैं ठीक हूँ।"], "hi")]
+    assert stats["languages"] == ["en", "hi"] and stats["segments"] == 3
+    # The language covering most of the text is reported
+    assert source == "en"
+    
+    _, _, stats = translator.translate(text, SegmentTranslator.MIXED, "fr")
+    assert stats["translated"] == 0 and len(backend.batches) == 2
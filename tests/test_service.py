@@ -0,0 +1,252 @@
+import asyncio
+import json
+import os
+import struct
+import time
+
+import pytest
+
+from app import MicroBatcher, MockBackend, TranslationCache, TranslationService, TranslationWorkerPool
+
+
+@pytest.fixture
+def service():
+    # Framing needs no backend, cache or history, so skip __init__
+    return object.__new__(TranslationService)
+
+
+def client_frame(opcode, payload, fin=True):
+    """Encode a masked client frame as a browser would send it"""
+    mask = os.urandom(4)
+    length = len(payload)
+    if length < 126:
+        header = struct.pack('!BB', (0x80 if fin else 0) | opcode, 0x80 | length)
+    elif length < 1 << 16:
+        header = struct.pack('!BBH', (0x80 if fin else 0) | opcode, 0x80 | 126, length)
+    else:
+        header = struct.pack('!BBQ', (0x80 if fin else 0) | opcode, 0x80 | 127, length)
+    masked = bytes(b ^ mask[i % 4] for i, b in enumerate(payload))
+    return header + mask + masked
+
+
+def read_frames(service, data, count):
+    async def read():
+        reader = asyncio.StreamReader()
+        reader.feed_data(data)
+        reader.feed_eof()
+        return [await service.read_websocket_frame(reader) for _ in range(count)]
+    return asyncio.run(read())
+
+
+@pytest.mark.parametrize("length", [0, 5, 125, 126, 65535, 65536])
+def test_server_frame_lengths(service, length):
+    payload = bytes(range(256)) * (length // 256 + 1)
+    payload = payload[:length]
+    frame = service.websocket_frame(0x2, payload)
+    assert frame[0] == 0x82
+    assert frame.endswith(payload)
+    header = len(frame) - length
+    assert header == (2 if length < 126 else 4 if length < 65536 else 10)
+    # Server frames are never masked
+    assert not frame[1] & 0x80
+
+
+@pytest.mark.parametrize("length", [0, 3, 125, 126, 70000])
+def test_read_masked_client_frame(service, length):
+    payload = os.urandom(length)
+    assert read_frames(service, client_frame(0x2, payload), 1) == [(True, 0x2, payload)]
+
+
+def test_read_consecutive_frames(service):
+    data = (client_frame(0x1, '{"text": "héllo"}'.encode('utf-8'), fin=False)
+            + client_frame(0x0, b'', fin=True) + client_frame(0x8, b''))
+    assert read_frames(service, data, 3) == [
+        (False, 0x1, '{"text": "héllo"}'.encode('utf-8')), (True, 0x0, b''), (True, 0x8, b'')]
+
+
+def test_oversized_frame_is_rejected(service):
+    header = struct.pack('!BBQ', 0x82, 0x80 | 127, TranslationService.MAX_BODY + 1)
+    with pytest.raises(ConnectionError):
+        read_frames(service, header, 1)
+
+
+class RecordingBackend(MockBackend):
+    def __init__(self):
+        super().__init__(latency=0)
+        self.batches = []
+    
+    def translate_batch(self, texts, src="auto", dest="en"):
+        self.batches.append((list(texts), src, dest))
+        return super().translate_batch(texts, src, dest)
+
+
+class FakeDetector:
+    min_confidence = 0.8
+    
+    def __init__(self, confidence=0.99):
+        self.confidence = confidence
+    
+    def detect_with_confidence(self, text):
+        return "es", self.confidence
+
+
+class FakeHistory:
+    def __init__(self):
+        self.entries = []
+    
+    def add_translation(self, *entry):
+        self.entries.append(entry)
+
+
+class FakeWriter:
+    def __init__(self):
+        self.data = b""
+        self.closed = False
+    
+    def write(self, data):
+        self.data += data
+    
+    async def drain(self):
+        pass
+    
+    def close(self):
+        self.closed = True
+
+
+@pytest.fixture
+def http_service():
+    # Everything but the backend is real or an in-memory stand-in
+    service = object.__new__(TranslationService)
+    service.backend = RecordingBackend()
+    service.backend_name = "mock"
+    service.started = time.time()
+    service.connections = 0
+    service.pool = TranslationWorkerPool(service.backend, rate=1000, burst=1000)
+    service.cache = TranslationCache(disk_filename=None)
+    service.history = FakeHistory()
+    service.detector = FakeDetector()
+    service.batcher = MicroBatcher(service.pool, service.cache, max_wait=0.01)
+    return service
+
+
+def parse_responses(data):
+    """Split raw HTTP responses into (status, headers, JSON or text body)"""
+    responses = []
+    while data:
+        head, _, data = data.partition(b"\r\n\r\n")
+        lines = head.decode('latin-1').split("\r\n")
+        headers = dict(line.split(": ", 1) for line in lines[1:])
+        length = int(headers["Content-Length"])
+        body, data = data[:length], data[length:]
+        if headers["Content-Type"] == "application/json":
+            body = json.loads(body)
+        responses.append((int(lines[0].split()[1]), headers, body))
+    return responses
+
+
+def http_request(method, path, payload=None, connection="keep-alive"):
+    body = b"" if payload is None else json.dumps(payload).encode('utf-8')
+    return (f"{method} {path} HTTP/1.1\r\nHost: localhost\r\nConnection: {connection}\r\n"
+            f"Content-Length: {len(body)}\r\n\r\n").encode('latin-1') + body
+
+
+def exchange(service, data, limit=1 << 16):
+    """Feed raw request bytes through handle_connection with the batcher running"""
+    async def run():
+        batcher = asyncio.get_running_loop().create_task(service.batcher.run())
+        await asyncio.sleep(0)
+        reader = asyncio.StreamReader(limit=limit)
+        reader.feed_data(data)
+        reader.feed_eof()
+        writer = FakeWriter()
+        try:
+            await service.handle_connection(reader, writer)
+        finally:
+            batcher.cancel()
+        assert writer.closed
+        return parse_responses(writer.data)
+    return asyncio.run(run())
+
+
+def test_batcher_groups_by_language_pair(http_service):
+    batcher = http_service.batcher
+    
+    async def run():
+        task = asyncio.get_running_loop().create_task(batcher.run())
+        await asyncio.sleep(0)
+        requests = [("one", "en", "fr"), ("two", "en", "fr"), ("one", "en", "fr"),
+                    ("uno", "es", "fr"), ("one", "en", "de")]
+        results = await asyncio.gather(*(batcher.translate(*request) for request in requests))
+        again = await batcher.translate("two", "en", "fr")
+        task.cancel()
+        return results, again
+    
+    results, again = asyncio.run(run())
+    assert [text for text, _, _ in results] == ["[fr] one", "[fr] two", "[fr] one", "[fr] uno", "[de] one"]
+    # One backend call per pair, with repeated texts sent once
+    assert sorted(http_service.backend.batches) == [
+        (["one"], "en", "de"), (["one", "two"], "en", "fr"), (["uno"], "es", "fr")]
+    assert batcher.stats["backend_calls"] == 3
+    # The later request is a batch of its own, answered from the cache
+    assert again == ("[fr] two", "en", True)
+    assert batcher.stats["batches"] == 2 and batcher.stats["cache_hits"] == 1
+
+
+def test_translate_uses_confident_detection_and_records(http_service):
+    [(status, _, body)] = exchange(http_service, http_request(
+        "POST", "/translate", {"text": "hola", "target": "fr"}, connection="close"))
+    assert status == 200
+    assert body == {"text": "hola", "translation": "[fr] hola", "source": "es", "target": "fr",
+                    "cached": False}
+    assert http_service.history.entries == [("hola", "[fr] hola", "es", "fr")]
+
+
+def test_uncertain_detection_is_left_to_the_backend(http_service):
+    http_service.detector.confidence = 0.5
+    [(status, _, body)] = exchange(http_service, http_request(
+        "POST", "/translate", {"text": "hola", "target": "fr", "partial": True}, connection="close"))
+    assert status == 200 and body["source"] == "auto"
+    assert http_service.backend.batches == [(["hola"], "auto", "fr")]
+    assert http_service.history.entries == []
+
+
+def test_batch_translation_and_keep_alive(http_service):
+    data = (http_request("POST", "/translate/batch", {"texts": ["a", "b"], "source": "en", "target": "de"})
+            + http_request("GET", "/health", connection="close"))
+    (status, headers, body), (health_status, _, health) = exchange(http_service, data)
+    assert status == 200 and headers["Connection"] == "keep-alive"
+    assert [item["translation"] for item in body["translations"]] == ["[de] a", "[de] b"]
+    assert health_status == 200 and health["status"] == "ok" and health["batcher"]["requests"] == 2
+
+
+@pytest.mark.parametrize("method, path, payload, status", [
+    ("GET", "/nowhere", None, 404),
+    ("GET", "/translate", None, 405),
+    ("POST", "/translate", {"text": "   "}, 400),
+    ("POST", "/translate", {"text": "hi", "target": "xx"}, 400),
+    ("POST", "/translate", ["not", "an", "object"], 400),
+    ("POST", "/translate/batch", {"texts": "hi"}, 400),
+    ("POST", "/translate/batch", {"texts": ["hi", ""]}, 400),
+    ("POST", "/translate/batch", {"texts": ["hi", " \n"]}, 400),
+])
+def test_request_errors(http_service, method, path, payload, status):
+    [(got, _, body)] = exchange(http_service, http_request(method, path, payload, connection="close"))
+    assert got == status and "error" in body
+    assert http_service.backend.batches == []
+
+
+def test_invalid_json_and_oversized_bodies(http_service):
+    bad_json = b"POST /translate HTTP/1.1\r\nContent-Length: 3\r\n\r\n{x}"
+    [(status, headers, _)] = exchange(http_service, bad_json)
+    assert status == 400
+    too_large = f"POST /translate HTTP/1.1\r\nContent-Length: {TranslationService.MAX_BODY + 1}\r\n\r\n"
+    [(status, headers, _)] = exchange(http_service, too_large.encode('latin-1'))
+    # The body was never read, so the connection cannot be reused
+    assert status == 413 and headers["Connection"] == "close"
+
+
+def test_overlong_header_line_is_rejected(http_service):
+    data = b"GET /health HTTP/1.1\r\nX-Padding: " + b"a" * 2000 + b"\r\n\r\n"
+    [(status, headers, body)] = exchange(http_service, data, limit=1024)
+    assert status == 400 and headers["Connection"] == "close"
+    assert body == {"error": "Request line or header too long"}
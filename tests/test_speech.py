@@ -0,0 +1,114 @@
+import os
+import threading
+import time
+
+import numpy as np
+
+from app import AudioRingBuffer, EnergyVAD, SpeechPipeline, WavFileSource, read_wav_samples
+
+FIXTURE = os.path.join(os.path.dirname(__file__), "fixtures", "two_utterances.wav")
+
+
+def test_ring_buffer_wraps_around():
+    buffer = AudioRingBuffer(8)
+    buffer.write(np.arange(6, dtype=np.int16))
+    samples, position = buffer.read(0)
+    assert samples.tolist() == [0, 1, 2, 3, 4, 5] and position == 6
+    buffer.write(np.arange(6, 11, dtype=np.int16))
+    samples, position = buffer.read(position)
+    assert samples.tolist() == [6, 7, 8, 9, 10] and position == 11
+
+
+def test_ring_buffer_skips_audio_a_slow_reader_missed():
+    buffer = AudioRingBuffer(4)
+    buffer.write(np.arange(10, dtype=np.int16))
+    samples, position = buffer.read(0)
+    assert samples.tolist() == [6, 7, 8, 9] and position == 10
+    assert buffer.overruns == 6
+
+
+def test_ring_buffer_drains_before_reporting_close():
+    buffer = AudioRingBuffer(4)
+    buffer.write(np.array([1, 2], dtype=np.int16))
+    buffer.close()
+    samples, position = buffer.read(0)
+    assert samples.tolist() == [1, 2]
+    assert buffer.read(position) is None
+
+
+def test_ring_buffer_read_times_out_empty():
+    buffer = AudioRingBuffer(4)
+    samples, position = buffer.read(0, timeout=0.01)
+    assert len(samples) == 0 and position == 0
+
+
+def test_wav_source_streams_whole_file():
+    source = WavFileSource(FIXTURE, frame_ms=30)
+    source.open()
+    blocks = []
+    while (block := source.read()) is not None:
+        blocks.append(block)
+    source.close()
+    assert all(len(block) == source.frame_samples for block in blocks[:-1])
+    assert np.array_equal(np.concatenate(blocks), read_wav_samples(FIXTURE)[0])
+
+
+def test_vad_finds_both_utterances_in_any_block_size():
+    samples, rate = read_wav_samples(FIXTURE)
+    whole = EnergyVAD(rate)
+    expected = whole.feed(samples) + whole.flush()
+    assert len(expected) == 2
+    # Speech starts at 0.4s and 1.7s; utterances include up to 300 ms of pre-roll
+    assert 0.0 <= expected[0][0] < 0.4 and 0.9 < expected[1][0] < 1.7
+    
+    vad = EnergyVAD(rate)
+    streamed = []
+    for start in range(0, len(samples), 661):
+        streamed += vad.feed(samples[start:start + 661])
+    streamed += vad.flush()
+    assert [start for start, _ in streamed] == [start for start, _ in expected]
+    assert all(np.array_equal(a, b) for (_, a), (_, b) in zip(streamed, expected))
+
+
+def test_vad_ignores_short_clicks():
+    rate = 16000
+    samples = np.zeros(rate, dtype=np.int16)
+    samples[8000:8100] = 20000
+    vad = EnergyVAD(rate)
+    assert vad.feed(samples) + vad.flush() == []
+
+
+def test_pipeline_delivers_results_in_utterance_order():
+    delays = iter([0.2, 0.0])
+    lock = threading.Lock()
+    
+    def recognize(samples, rate):
+        # The first utterance is recognised slower than the second
+        with lock:
+            delay = next(delays)
+        time.sleep(delay)
+        return f"{len(samples) / rate:.2f}s"
+    
+    texts = []
+    pipeline = SpeechPipeline(WavFileSource(FIXTURE), recognize,
+                              on_text=lambda text, timings: texts.append((text, timings)), workers=2)
+    pipeline.start()
+    assert pipeline.wait(timeout=10)
+    
+    assert len(texts) == 2
+    assert texts[0][1]["start"] < texts[1][1]["start"]
+    assert float(texts[0][0][:-1]) > float(texts[1][0][:-1])
+    assert all("asr" in timings and "capture" in timings for _, timings in texts)
+
+
+def test_pipeline_reports_recognizer_errors():
+    errors = []
+    
+    def recognize(samples, rate):
+        raise RuntimeError("recognizer offline")
+    
+    pipeline = SpeechPipeline(WavFileSource(FIXTURE), recognize, on_text=lambda *a: None,
+                              on_error=errors.append)
+    pipeline.start()
+    assert pipeline.wait(timeout=10)
+    assert [str(e) for e in errors] == ["recognizer offline"] * 2
@@ -0,0 +1,57 @@
+import json
+import os
+import shutil
+
+import numpy as np
+import pytest
+
+import app
+from app import read_wav_samples, transcribe_wav_file
+
+FIXTURE = os.path.join(os.path.dirname(__file__), "fixtures", "two_utterances.wav")
+
+
+def test_read_wav_fixture():
+    samples, rate = read_wav_samples(FIXTURE)
+    assert rate == 22050
+    assert samples.dtype == np.int16
+    assert len(samples) / rate == pytest.approx(2.4, abs=0.01)
+
+
+def test_transcribe_wav_fixture_offline():
+    result = transcribe_wav_file(FIXTURE, vad_only=True)
+    assert result["error"] is None
+    assert result["duration"] == pytest.approx(2.4, abs=0.01)
+    starts = [segment["start"] for segment in result["segments"]]
+    assert len(starts) == 2
+    # Speech starts at 0.4s and 1.7s; utterances include up to 300 ms of pre-roll
+    assert 0.0 <= starts[0] < 0.4 and 0.9 < starts[1] < 1.7
+    assert all(segment["text"].startswith("[speech ") for segment in result["segments"])
+    assert result["preprocess"]["utterances"] == 2
+    assert result["preprocess"]["output_bytes"] < result["preprocess"]["input_bytes"]
+
+
+def test_transcribe_reports_bad_input(tmp_path):
+    result = transcribe_wav_file(str(tmp_path / "missing.wav"), vad_only=True)
+    assert result["error"] and result["segments"] == []
+
+
+def test_bulk_transcription_translates_and_skips_done_files(tmp_path, capsys):
+    os.makedirs(tmp_path / "calls" / "monday")
+    shutil.copy(FIXTURE, tmp_path / "calls" / "first.wav")
+    shutil.copy(FIXTURE, tmp_path / "calls" / "monday" / "second.wav")
+    argv = ["--backend", "mock", "transcribe", str(tmp_path / "calls"), "--vad-only",
+            "--processes", "1", "--translate", "fr", "--source", "en", "--rate", "1000"]
+    assert app.main(argv) == 0
+    
+    transcripts = tmp_path / "calls" / "transcripts"
+    assert sorted(os.listdir(transcripts)) == ["first.json", "first.txt",
+                                              "monday__second.json", "monday__second.txt"]
+    with open(transcripts / "monday__second.json", encoding='utf-8') as f:
+        result = json.load(f)
+    assert [segment["translation"] for segment in result["segments"]] == [
+        f"[fr] {segment['text']}" for segment in result["segments"]]
+    assert "Transcribed 4.8s of audio" in capsys.readouterr().out
+    
+    assert app.main(argv) == 0
+    assert "No WAV files to transcribe" in capsys.readouterr().out
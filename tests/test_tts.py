@@ -0,0 +1,84 @@
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+
+import app
+from app import SpeechSynthesizer
+
+
+class FakeEngine:
+    """pyttsx3 stand-in whose runAndWait 'plays' until stopped or timed out"""
+    
+    def __init__(self):
+        self.spoken = []
+        self.stops = 0
+        self.playing = threading.Event()
+        self._stopped = threading.Event()
+        self._queued = []
+    
+    def setProperty(self, name, value):
+        pass
+    
+    def save_to_file(self, text, path):
+        raise RuntimeError("driver cannot render to a file")
+    
+    def say(self, text):
+        self._queued.append(text)
+    
+    def runAndWait(self):
+        queued, self._queued = self._queued, []
+        for text in queued:
+            self.spoken.append(text)
+            self.playing.set()
+            self._stopped.wait(0.3)
+            self.playing.clear()
+            if self._stopped.is_set():
+                break
+        self._stopped.clear()
+    
+    def stop(self):
+        self.stops += 1
+        self._queued = []
+        self._stopped.set()
+
+
+@pytest.fixture
+def engine(monkeypatch):
+    engine = FakeEngine()
+    monkeypatch.setattr(app, "pyttsx3", SimpleNamespace(init=lambda: engine))
+    return engine
+
+
+def wait_for(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline
+        time.sleep(0.005)
+
+
+def test_direct_mode_interrupt_stops_the_playing_sentence(engine):
+    tts = SpeechSynthesizer()
+    # The render probe fails, so the synthesizer settles on direct mode
+    wait_for(lambda: tts.direct)
+    
+    tts.speak("First sentence. Second sentence.")
+    assert engine.playing.wait(2)
+    started = time.monotonic()
+    tts.speak("Newer text.", interrupt=True)
+    wait_for(lambda: engine.spoken[-1:] == ["Newer text."])
+    
+    assert engine.spoken == ["First sentence.", "Newer text."]
+    assert engine.stops == 1
+    assert time.monotonic() - started < 0.25
+    assert tts.get_stats()["dropped"] == 1
+
+
+def test_interrupt_while_idle_does_not_stop_the_engine(engine):
+    tts = SpeechSynthesizer()
+    wait_for(lambda: tts.direct)
+    tts.speak("Hello.")
+    wait_for(lambda: engine.spoken == ["Hello."] and not tts._speaking)
+    tts.flush()
+    assert engine.stops == 0
@@ -0,0 +1,120 @@
+import os
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+
+import app
+from app import RealTimeTranslatorApp, SpeechPipeline, WavFileSource
+
+FIXTURE = os.path.join(os.path.dirname(__file__), "fixtures", "two_utterances.wav")
+
+
+class PacedWavSource(WavFileSource):
+    """WAV source delivering blocks a little faster than real time"""
+    
+    def read(self):
+        time.sleep(0.005)
+        return super().read()
+
+
+def test_partials_precede_each_final_result():
+    events = []
+    lock = threading.Lock()
+    
+    def record(kind, text):
+        with lock:
+            events.append((kind, text))
+    
+    pipeline = SpeechPipeline(PacedWavSource(FIXTURE), lambda samples, rate: f"{len(samples)}",
+                              on_text=lambda text, timings: record("final", text),
+                              on_partial=lambda text: record("partial", text), partial_interval=0.1)
+    pipeline.start()
+    assert pipeline.wait(timeout=20)
+    
+    finals = [i for i, (kind, _) in enumerate(events) if kind == "final"]
+    assert len(finals) == 2
+    assert events[0][0] == "partial"
+    # Partials grow with the utterance and never outlast its final result
+    first = [int(text) for kind, text in events[:finals[0]]]
+    assert first == sorted(first) and first[-1] <= int(events[finals[0]][1])
+    assert events[-1][0] == "final"
+
+
+def test_pipeline_stopped_before_start_releases_the_source():
+    closed = []
+    source = WavFileSource(FIXTURE)
+    source.close = lambda: closed.append(True)
+    texts = []
+    pipeline = SpeechPipeline(source, lambda samples, rate: "text", on_text=lambda *a: texts.append(a))
+    pipeline.stop()
+    pipeline.start()
+    assert pipeline.wait(timeout=5)
+    assert closed and texts == []
+
+
+class FakePipeline:
+    created = []
+    
+    def __init__(self, *args, **kwargs):
+        self.started = self.stopped = False
+        FakePipeline.created.append(self)
+        if FakePipeline.on_create:
+            FakePipeline.on_create()
+    
+    def start(self):
+        self.started = True
+    
+    def stop(self):
+        self.stopped = True
+
+
+@pytest.fixture
+def view(monkeypatch):
+    FakePipeline.created = []
+    FakePipeline.on_create = None
+    monkeypatch.setattr(app, "SpeechPipeline", FakePipeline)
+    monkeypatch.setattr(app, "MicrophoneSource", lambda: None)
+    monkeypatch.setattr(app, "google_speech_recognizer", lambda recognizer: None)
+    monkeypatch.setattr(threading, "Thread", lambda **kwargs: SimpleNamespace(start=lambda: None))
+    view = object.__new__(RealTimeTranslatorApp)
+    view.components_ready = threading.Event()
+    view.components_ready.set()
+    view.is_listening = False
+    view.speech_pipeline = None
+    view.voice_session = 0
+    view.voice_lock = threading.Lock()
+    view.incremental_voice = SimpleNamespace(get=lambda: False)
+    view.speech_recognizer = None
+    view.voice_btn = SimpleNamespace(configure=lambda **options: None)
+    view.update_status = lambda message: None
+    return view
+
+
+def test_stop_while_pipeline_is_created_never_opens_the_microphone(view):
+    view.start_voice_input()
+    FakePipeline.on_create = view.stop_voice_input
+    view.voice_recognition_thread(view.voice_session)
+    assert not FakePipeline.created[0].started
+    assert view.speech_pipeline is None
+
+
+def test_stop_after_start_stops_the_pipeline(view):
+    view.start_voice_input()
+    view.voice_recognition_thread(view.voice_session)
+    pipeline = view.speech_pipeline
+    assert pipeline.started
+    view.stop_voice_input()
+    assert pipeline.stopped and view.speech_pipeline is None
+
+
+def test_stale_start_thread_does_not_start_a_second_pipeline(view):
+    view.start_voice_input()
+    stale = view.voice_session
+    view.stop_voice_input()
+    view.start_voice_input()
+    view.voice_recognition_thread(stale)
+    assert view.speech_pipeline is None
+    view.voice_recognition_thread(view.voice_session)
+    assert [p.started for p in FakePipeline.created] == [False, True]